@@ -74,7 +74,7 @@ def close_quietly(cursor, conn):
 # --- schema / data operations ----------------------------------------------
 def create_core_schema(cursor):
     """
-    Create core tables (users, accounts, transactions) after dropping dependent objects
+    Create core tables (users, accounts, transactions, ledger_outbox, idempotency_keys) after dropping dependent objects
     in a safe order.
     """
     sql = """
@@ -84,6 +84,8 @@ IF OBJECT_ID('chat_history', 'U') IS NOT NULL DROP TABLE chat_history;
 IF OBJECT_ID('tool_definitions', 'U') IS NOT NULL DROP TABLE tool_definitions;
 IF OBJECT_ID('agent_definitions', 'U') IS NOT NULL DROP TABLE agent_definitions;
 IF OBJECT_ID('chat_sessions', 'U') IS NOT NULL DROP TABLE chat_sessions;
+IF OBJECT_ID('ledger_outbox', 'U') IS NOT NULL DROP TABLE ledger_outbox;
+IF OBJECT_ID('idempotency_keys', 'U') IS NOT NULL DROP TABLE idempotency_keys;
 IF OBJECT_ID('transactions', 'U') IS NOT NULL DROP TABLE transactions;
 IF OBJECT_ID('accounts', 'U') IS NOT NULL DROP TABLE accounts;
 IF OBJECT_ID('users', 'U') IS NOT NULL DROP TABLE users;
@@ -106,7 +108,7 @@ CREATE TABLE accounts (
 );
 
 CREATE TABLE transactions (
-    id NVARCHAR(255) PRIMARY KEY,
+    id NVARCHAR(255) CONSTRAINT pk_transactions PRIMARY KEY,
     from_account_id NVARCHAR(255) FOREIGN KEY REFERENCES accounts(id),
     to_account_id NVARCHAR(255) FOREIGN KEY REFERENCES accounts(id),
     amount DECIMAL(15, 2) NOT NULL,
@@ -116,10 +118,56 @@ CREATE TABLE transactions (
     status NVARCHAR(255) NOT NULL,
     created_at DATETIMEOFFSET DEFAULT SYSDATETIMEOFFSET()
 );
+CREATE INDEX ix_transactions_from_created ON transactions (from_account_id, created_at DESC, id DESC)
+    INCLUDE (to_account_id, amount, type, category, status);
+CREATE INDEX ix_transactions_to_created ON transactions (to_account_id, created_at DESC, id DESC)
+    INCLUDE (from_account_id, amount, type, category, status);
+
+CREATE TABLE ledger_outbox (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    event_type NVARCHAR(50) NOT NULL,
+    user_id NVARCHAR(255) NOT NULL,
+    payload NVARCHAR(MAX) NOT NULL,
+    created_at DATETIME2 DEFAULT SYSUTCDATETIME()
+);
+CREATE INDEX ix_ledger_outbox_created_at ON ledger_outbox (created_at);
+
+CREATE TABLE idempotency_keys (
+    id CHAR(64) PRIMARY KEY,
+    operation NVARCHAR(50) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    response NVARCHAR(MAX) NULL,
+    created_at DATETIME2 DEFAULT SYSUTCDATETIME()
+);
+CREATE INDEX ix_idempotency_keys_created_at ON idempotency_keys (created_at);
 """
     exec_script(cursor, sql)
 
 
+def create_search_index(conn, cursor):
+    """
+    Full-text index for transaction search. CREATE FULLTEXT cannot run inside a transaction,
+    so this runs in autocommit; without full-text support the banking service falls back to LIKE.
+    """
+    sql = """
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'banking_search')
+        EXEC('CREATE FULLTEXT CATALOG banking_search');
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('transactions'))
+        EXEC('CREATE FULLTEXT INDEX ON transactions (description, category) KEY INDEX pk_transactions
+              ON banking_search WITH CHANGE_TRACKING AUTO');
+END;
+"""
+    conn.autocommit = True
+    try:
+        exec_script(cursor, sql)
+    except Exception as e:
+        print(f"Full-text index not created ({e}); transaction search will use LIKE")
+    finally:
+        conn.autocommit = False
+
+
 def insert_core_data(cursor):
     SQL_USER_INSERT = """
 INSERT INTO users (id, name, email, created_at)
@@ -289,6 +337,7 @@ def setup_customer_banking(client: requests.Session, workspace_id: str):
         create_core_schema(cursor)
         # commit schema creation
         conn.commit()
+        create_search_index(conn, cursor)
         insert_core_data(cursor)
         conn.commit()
         print("Inserted core sample data")
@@ -1,4 +1,6 @@
 -- Drop tables if they exist to start from a clean slate
+IF OBJECT_ID('ledger_outbox', 'U') IS NOT NULL DROP TABLE ledger_outbox;
+IF OBJECT_ID('idempotency_keys', 'U') IS NOT NULL DROP TABLE idempotency_keys;
 IF OBJECT_ID('transactions', 'U') IS NOT NULL DROP TABLE transactions;
 IF OBJECT_ID('accounts', 'U') IS NOT NULL DROP TABLE accounts;
 IF OBJECT_ID('users', 'U') IS NOT NULL DROP TABLE users;
@@ -24,7 +26,7 @@ CREATE TABLE accounts (
 
 -- Create the 'transactions' table
 CREATE TABLE transactions (
-    id NVARCHAR(255) PRIMARY KEY,
+    id NVARCHAR(255) CONSTRAINT pk_transactions PRIMARY KEY,
     from_account_id NVARCHAR(255) FOREIGN KEY REFERENCES accounts(id),
     to_account_id NVARCHAR(255) FOREIGN KEY REFERENCES accounts(id),
     amount DECIMAL(15, 2) NOT NULL,
@@ -34,6 +36,45 @@ CREATE TABLE transactions (
     status NVARCHAR(255) NOT NULL,
     created_at DATETIMEOFFSET DEFAULT SYSDATETIMEOFFSET()
 );
+-- Newest-first pages of an account's transactions for GET /api/transactions/search
+CREATE INDEX ix_transactions_from_created ON transactions (from_account_id, created_at DESC, id DESC)
+    INCLUDE (to_account_id, amount, type, category, status);
+CREATE INDEX ix_transactions_to_created ON transactions (to_account_id, created_at DESC, id DESC)
+    INCLUDE (from_account_id, amount, type, category, status);
+
+-- Full-text index over description/category for transaction search. CREATE FULLTEXT
+-- cannot run inside a transaction; where full-text search is unavailable the service
+-- searches with LIKE instead (backend/transaction_search.py)
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'banking_search')
+        EXEC('CREATE FULLTEXT CATALOG banking_search');
+    IF NOT EXISTS (SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('transactions'))
+        EXEC('CREATE FULLTEXT INDEX ON transactions (description, category) KEY INDEX pk_transactions
+              ON banking_search WITH CHANGE_TRACKING AUTO');
+END;
+
+-- Create the 'ledger_outbox' table: change events written in the same transaction as each
+-- ledger change and tailed by the banking service (see backend/shared/outbox.py)
+CREATE TABLE ledger_outbox (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    event_type NVARCHAR(50) NOT NULL,
+    user_id NVARCHAR(255) NOT NULL,
+    payload NVARCHAR(MAX) NOT NULL,
+    created_at DATETIME2 DEFAULT SYSUTCDATETIME()
+);
+CREATE INDEX ix_ledger_outbox_created_at ON ledger_outbox (created_at);
+
+-- Create the 'idempotency_keys' table: results of writes made with an Idempotency-Key,
+-- inserted in the same transaction as the write (see backend/shared/idempotency.py)
+CREATE TABLE idempotency_keys (
+    id CHAR(64) PRIMARY KEY,
+    operation NVARCHAR(50) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    response NVARCHAR(MAX) NULL,
+    created_at DATETIME2 DEFAULT SYSUTCDATETIME()
+);
+CREATE INDEX ix_idempotency_keys_created_at ON idempotency_keys (created_at);
 
 -- Insert data into the 'users' table
 INSERT INTO users (id, name, email, created_at) VALUES
@@ -0,0 +1,518 @@
+"""Generate realistic banking and chat data at scale.
+
+Users, accounts and transactions go to the customer banking database; chat
+sessions, chat history and tool usage go to the agentic (banking_app)
+database. Rows are generated per user chunk with a per-user seed, so chunks
+are independent: each worker process generates a chunk and streams it to SQL
+with pyodbc fast_executemany (or writes CSV/Parquet part files) in batches.
+
+Examples:
+
+    # 1M users / 100M transactions / 500k chat sessions into Fabric SQL, 8 writers
+    python synthetic_data.py --users 1000000 --transactions 100000000 --chat-sessions 500000 \\
+        --target sql --bank-conn "$FABRIC_SQL_CONNECTION_URL_BANK_DATA" \\
+        --agentic-conn "$FABRIC_SQL_CONNECTION_URL" --workers 8
+
+    # A smaller set as Parquet for offline analysis
+    python synthetic_data.py --users 10000 --transactions 1000000 --target parquet --out-dir synthetic
+
+Parallel SQL writers each open their own connection, so use a non-interactive
+Authentication mode (e.g. ActiveDirectoryDefault or ActiveDirectoryServicePrincipal).
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# --- table layouts ----------------------------------------------------------
+COLUMNS = {
+    "users": ("id", "name", "email", "created_at"),
+    "accounts": ("id", "user_id", "account_number", "account_type", "balance", "name", "created_at"),
+    "transactions": ("id", "from_account_id", "to_account_id", "amount", "type", "description",
+                     "category", "status", "created_at"),
+    "chat_sessions": ("session_id", "user_id", "title", "created_at", "updated_at"),
+    "chat_history": ("message_id", "session_id", "trace_id", "user_id", "agent_id", "message_type", "content",
+                     "model_name", "content_filter_results", "total_tokens", "completion_tokens",
+                     "prompt_tokens", "finish_reason", "response_time_ms", "trace_end", "tool_call_id",
+                     "tool_name", "tool_input", "tool_output", "tool_id"),
+    "tool_usage": ("tool_call_id", "session_id", "trace_id", "tool_id", "tool_name", "tool_input",
+                   "tool_output", "status", "tokens_used"),
+}
+BANK_TABLES = ("users", "accounts", "transactions")
+CHAT_TABLES = ("chat_sessions", "chat_history", "tool_usage")
+
+# --- distributions ----------------------------------------------------------
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David",
+               "Elizabeth", "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah",
+               "Carlos", "Maria", "Wei", "Priya", "Ahmed", "Fatima", "Hiroshi", "Yuki", "Olga", "Ivan",
+               "Aisha", "Kwame", "Sofia", "Mateo", "Chloe", "Lucas", "Emma", "Noah", "Ava", "Liam"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore",
+              "Nguyen", "Kim", "Patel", "Chen", "Singh", "Khan", "Tanaka", "Ivanova", "Okafor", "Mensah",
+              "Rossi", "Müller", "Dubois", "Silva", "Cohen", "Kowalski", "Novak", "Larsen"]
+
+# category: (weight, lognormal mu, lognormal sigma, merchants)
+SPENDING = {
+    "Groceries": (22, 4.0, 0.5, ["Grocery Store", "Whole Foods", "Trader Joe's", "Costco", "Local Market"]),
+    "Food": (24, 3.0, 0.6, ["Coffee Shop", "Fast Food Restaurant", "Pizza Place", "Sushi Bar", "Food Delivery"]),
+    "Shopping": (14, 3.8, 0.9, ["Online Shopping", "Electronics Store", "Clothing Store", "Department Store"]),
+    "Transportation": (12, 3.6, 0.5, ["Gas Station", "Rideshare", "Transit Pass", "Parking Garage"]),
+    "Utilities": (5, 4.8, 0.4, ["Utility Bill", "Internet Provider", "Mobile Phone Bill", "Water Bill"]),
+    "Health": (5, 3.8, 0.8, ["Pharmacy", "Dental Clinic", "Gym Membership", "Doctor Visit"]),
+    "Entertainment": (9, 3.2, 0.7, ["Streaming Service", "Movie Theater", "Concert Tickets", "Bookstore"]),
+    "Travel": (3, 5.5, 0.8, ["Airline", "Hotel", "Car Rental", "Travel Agency"]),
+    "Education": (2, 4.5, 0.7, ["Online Course", "Tuition Payment", "Bookstore"]),
+    "Home": (4, 4.6, 0.9, ["Home Improvement Store", "Furniture Store", "Hardware Store"]),
+}
+_SPENDING_NAMES = list(SPENDING)
+_SPENDING_WEIGHTS = [SPENDING[c][0] for c in _SPENDING_NAMES]
+INCOME_SOURCES = ["Paycheck", "Salary Deposit", "Freelance Project", "Client Payment", "Tax Refund", "Bonus Payment"]
+
+# Monday..Sunday relative transaction volume, and hour-of-day volume (UTC-agnostic "local" time)
+WEEKDAY_WEIGHTS = [0.9, 0.95, 1.0, 1.05, 1.25, 1.3, 0.8]
+HOUR_WEIGHTS = [0.2, 0.1, 0.1, 0.1, 0.2, 0.4, 0.8, 1.5, 2.2, 2.6, 2.8, 3.2,
+                4.0, 3.6, 3.0, 2.9, 3.1, 3.6, 4.2, 3.8, 3.0, 2.2, 1.2, 0.5]
+
+CHAT_QUESTIONS = {
+    "get_user_accounts": ["What are my account balances?", "How much money do I have?",
+                          "Show me all my accounts"],
+    "get_transactions_summary": ["How much did I spend this month?", "What did I spend on food last month?",
+                                 "Summarize my spending in the last 6 months"],
+    "search_support_documents": ["What is the overdraft fee?", "How do I dispute a charge?",
+                                 "What are the wire transfer limits?"],
+    "transfer_money": ["Transfer $200 from checking to savings", "Move $50 to my savings account"],
+    "create_new_account": ["Open a new savings account", "I want to create a checking account"],
+}
+# Relative frequency of each tool in chat traces; None is a trace answered without tools
+TOOL_WEIGHTS = {"get_user_accounts": 30, "get_transactions_summary": 25, "search_support_documents": 25,
+                "transfer_money": 8, "create_new_account": 4, None: 8}
+SAFE_FILTER_RESULTS = json.dumps({
+    "hate": {"filtered": False, "severity": "safe"}, "jailbreak": {"filtered": False, "detected": False},
+    "self_harm": {"filtered": False, "severity": "safe"}, "sexual": {"filtered": False, "severity": "safe"},
+    "violence": {"filtered": False, "severity": "safe"},
+})
+MODEL_NAME = "gpt-4.1-2025-04-14"
+
+
+# --- generators -------------------------------------------------------------
+def _rng(seed: int, stream: str, n: int) -> random.Random:
+    """Independent, reproducible RNG for one entity (so any chunk can be generated on its own)."""
+    return random.Random(f"{seed}:{stream}:{n}")
+
+
+class Calendar:
+    """Samples timestamps in [end - days, end) with a growth trend, weekly and daily seasonality."""
+
+    def __init__(self, days: int, end: datetime):
+        self.start = end - timedelta(days=days)
+        weights = []
+        for d in range(days):
+            day = self.start + timedelta(days=d)
+            # ~40% more activity at the end of the window than at its start
+            weights.append(WEEKDAY_WEIGHTS[day.weekday()] * (1 + 0.4 * d / max(days - 1, 1)))
+        self.days = days
+        self._day_cum = _cumulative(weights)
+        self._hour_cum = _cumulative(HOUR_WEIGHTS)
+
+    def sample(self, rng: random.Random, not_before: Optional[datetime] = None) -> datetime:
+        day = rng.choices(range(self.days), cum_weights=self._day_cum)[0]
+        hour = rng.choices(range(24), cum_weights=self._hour_cum)[0]
+        ts = self.start + timedelta(days=day, hours=hour, seconds=rng.randrange(3600))
+        return max(ts, not_before) if not_before else ts
+
+    def day_of_month(self, rng: random.Random, day: int, not_before: datetime) -> datetime:
+        """A timestamp on the given day of a random month in the window (for recurring payments)."""
+        months = max(1, self.days // 30)
+        base = self.start + timedelta(days=30 * rng.randrange(months))
+        ts = base.replace(day=min(day, 28), hour=rng.randint(5, 9), minute=rng.randrange(60))
+        return max(ts, not_before)
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    total, out = 0.0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def generate_user(n: int, args, calendar: Calendar) -> Tuple[tuple, List[tuple], Iterator[tuple]]:
+    """User n with their accounts, plus a lazy iterator over their transactions."""
+    rng = _rng(args.seed, "user", n)
+    prefix = args.id_prefix
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    user_id = f"{prefix}_user_{n}"
+    joined = calendar.start - timedelta(days=rng.randrange(3 * 365))
+    user = (user_id, f"{first} {last}", f"{first.lower()}.{last.lower()}.{n}@example.com", joined)
+
+    kinds = ["checking"]
+    if rng.random() < 0.6:
+        kinds.append("savings")
+    if rng.random() < 0.45:
+        kinds.append("credit")
+    if rng.random() < 0.1:
+        kinds.append("checking")
+    accounts = []
+    for k, kind in enumerate(kinds):
+        balance = {"checking": rng.lognormvariate(8.0, 1.0), "savings": rng.lognormvariate(9.0, 1.2),
+                   "credit": -rng.lognormvariate(6.5, 1.0)}[kind]
+        label = {"checking": "Checking", "savings": "Savings", "credit": "Credit Card"}[kind]
+        accounts.append((f"{prefix}_acc_{n}_{k}", user_id, f"9{n:011d}{k:02d}", kind, round(balance, 2),
+                         f"{label} {k + 1}" if k else f"Primary {label}", joined))
+
+    # Heavy-tailed activity: most users are light, a few are very active (mean stays at the target)
+    mean = args.transactions / args.users
+    count = int(round(mean * rng.lognormvariate(-0.32, 0.8)))
+    return user, accounts, _transactions(rng, n, accounts, count, calendar, prefix)
+
+
+def _transactions(rng: random.Random, n: int, accounts: List[tuple], count: int,
+                  calendar: Calendar, prefix: str) -> Iterator[tuple]:
+    checking = [a for a in accounts if a[3] == "checking"]
+    credit = [a for a in accounts if a[3] == "credit"]
+    opened = accounts[0][6]
+    for seq in range(count):
+        r = rng.random()
+        txn_id = f"{prefix}_txn_{n}_{seq}"
+        if r < 0.08:
+            # Paychecks land on the 1st/15th, early in the morning
+            account = rng.choice(checking)
+            yield (txn_id, None, account[0], round(rng.lognormvariate(7.8, 0.4), 2), "deposit",
+                   rng.choice(INCOME_SOURCES), "Income", "completed",
+                   calendar.day_of_month(rng, rng.choice((1, 15)), opened))
+        elif r < 0.12 and len(accounts) > 1:
+            source, target = rng.sample(accounts, 2)
+            yield (txn_id, source[0], target[0], round(rng.lognormvariate(5.5, 0.8), 2), "transfer",
+                   "Transfer between accounts", "Transfer", "completed", calendar.sample(rng, opened))
+        elif r < 0.14:
+            account = rng.choice(checking)
+            yield (txn_id, account[0], None, round(rng.lognormvariate(7.2, 0.3), 2), "payment",
+                   rng.choice(("Rent Payment", "Mortgage Payment")), "Housing", "completed",
+                   calendar.day_of_month(rng, 1, opened))
+        else:
+            category = rng.choices(_SPENDING_NAMES, weights=_SPENDING_WEIGHTS)[0]
+            _, mu, sigma, merchants = SPENDING[category]
+            account = rng.choice(credit) if credit and rng.random() < 0.35 else rng.choice(checking)
+            # A small share of recent card payments are still settling
+            status = "pending" if rng.random() < 0.01 else "completed"
+            yield (txn_id, account[0], None, round(rng.lognormvariate(mu, sigma), 2), "payment",
+                   rng.choice(merchants), category, status, calendar.sample(rng, opened))
+
+
+def generate_session(s: int, args, calendar: Calendar, ids: Dict[str, object]) -> Dict[str, List[tuple]]:
+    """One chat session with 1+ traces (human question, optional tool call/result, AI answer)."""
+    rng = _rng(args.seed, "session", s)
+    prefix = args.id_prefix
+    user_id = f"{prefix}_user_{rng.randrange(args.users) + 1}"
+    session_id = f"{prefix}_session_{s}"
+    created = calendar.sample(rng)
+    rows = {"chat_sessions": [], "chat_history": [], "tool_usage": []}
+    tool_names = list(TOOL_WEIGHTS)
+    tool_weights = [TOOL_WEIGHTS[t] for t in tool_names]
+
+    traces = 1 + min(int(rng.expovariate(0.6)), 12)
+    clock = created
+    first_question = None
+    for t in range(traces):
+        trace_id = f"{prefix}_trace_{s}_{t}"
+        tool = rng.choices(tool_names, weights=tool_weights)[0]
+        question = rng.choice(CHAT_QUESTIONS[tool or "search_support_documents"])
+        first_question = first_question or question
+        history = rows["chat_history"]
+        history.append(_chat_row(f"{prefix}_msg_{s}_{t}_h", session_id, trace_id, user_id, None, "human",
+                                 question))
+        prompt_tokens = int(rng.lognormvariate(7.4, 0.35))
+        if tool is not None:
+            call_id = f"call_{prefix}_{s}_{t}"
+            tool_id = ids["tools"].get(tool, f"tool_{tool}")
+            tool_input = json.dumps({"user_id": user_id})
+            tool_output = json.dumps({"status": "success"})
+            call_tokens = int(rng.lognormvariate(3.2, 0.3))
+            history.append(_chat_row(f"{prefix}_msg_{s}_{t}_c", session_id, trace_id, user_id, ids["agent"],
+                                     "tool_call", "", tool_call_id=call_id, tool_name=tool,
+                                     tool_input=tool_input, tool_id=tool_id, model_name=MODEL_NAME,
+                                     prompt_tokens=prompt_tokens, completion_tokens=call_tokens,
+                                     finish_reason="tool_calls"))
+            history.append(_chat_row(f"{prefix}_msg_{s}_{t}_r", session_id, trace_id, user_id, None,
+                                     "tool_result", tool_output, tool_call_id=call_id, tool_name=tool,
+                                     tool_output=tool_output, tool_id=tool_id))
+            rows["tool_usage"].append((call_id, session_id, trace_id, tool_id, tool, tool_input, tool_output,
+                                       "success" if rng.random() > 0.02 else "error", call_tokens))
+            prompt_tokens += int(rng.lognormvariate(5.5, 0.8))
+        completion_tokens = int(rng.lognormvariate(4.8, 0.5))
+        response_ms = int(rng.lognormvariate(7.8, 0.45) * (1.8 if tool else 1.0))
+        clock += timedelta(seconds=rng.randint(20, 600), milliseconds=response_ms)
+        history.append(_chat_row(f"{prefix}_msg_{s}_{t}_a", session_id, trace_id, user_id, ids["agent"], "ai",
+                                 "Here is what I found for your request.", model_name=MODEL_NAME,
+                                 prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                 finish_reason="stop", response_time_ms=response_ms,
+                                 trace_end=clock.isoformat()))
+    rows["chat_sessions"].append((session_id, user_id, first_question[:50], created, clock))
+    return rows
+
+
+def _chat_row(message_id, session_id, trace_id, user_id, agent_id, message_type, content, model_name=None,
+              prompt_tokens=None, completion_tokens=None, finish_reason=None, response_time_ms=None,
+              trace_end=None, tool_call_id=None, tool_name=None, tool_input=None, tool_output=None,
+              tool_id=None) -> tuple:
+    total = prompt_tokens + completion_tokens if prompt_tokens is not None else None
+    filters = SAFE_FILTER_RESULTS if message_type in ("ai", "tool_call") else "{}"
+    return (message_id, session_id, trace_id, user_id, agent_id, message_type, content, model_name, filters,
+            total, completion_tokens, prompt_tokens, finish_reason, response_time_ms, trace_end, tool_call_id,
+            tool_name, tool_input, tool_output, tool_id)
+
+
+# --- writers ----------------------------------------------------------------
+def odbc_conn_str(conn_str: str) -> str:
+    """pyodbc needs an explicit driver; the Fabric connection strings usually omit it."""
+    if "driver=" in conn_str.lower():
+        return conn_str
+    driver = os.getenv("DB_DRIVER", "ODBC Driver 18 for SQL Server")
+    return f"Driver={{{driver}}};{conn_str}"
+
+
+class SqlWriter:
+    """Batched pyodbc fast_executemany inserts, one commit per batch."""
+
+    def __init__(self, conn_strs: Dict[str, str]):
+        import pyodbc
+        self._conns = {name: pyodbc.connect(odbc_conn_str(cs), autocommit=False) for name, cs in conn_strs.items()}
+
+    def _conn(self, table: str):
+        return self._conns["bank" if table in BANK_TABLES else "agentic"]
+
+    def write(self, table: str, rows: List[tuple], part: str):
+        conn = self._conn(table)
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        columns = COLUMNS[table]
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        try:
+            cursor.executemany(sql, rows)
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+class FileWriter:
+    """Writes each batch as its own CSV or Parquet part file under <out_dir>/<table>/."""
+
+    def __init__(self, out_dir: str, fmt: str):
+        self.out_dir = out_dir
+        self.fmt = fmt
+
+    def write(self, table: str, rows: List[tuple], part: str):
+        import pandas as pd
+        directory = os.path.join(self.out_dir, table)
+        os.makedirs(directory, exist_ok=True)
+        frame = pd.DataFrame.from_records(rows, columns=COLUMNS[table])
+        path = os.path.join(directory, f"part-{part}.{self.fmt}")
+        if self.fmt == "parquet":
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+
+
+# Per-process state for the worker pool
+_writer = None
+_calendar = None
+_ids = None
+
+
+def _init_worker(args):
+    global _writer, _calendar, _ids
+    _calendar = Calendar(args.days, args.end)
+    if args.target == "sql":
+        conn_strs = {}
+        if args.bank_conn:
+            conn_strs["bank"] = args.bank_conn
+        if args.agentic_conn:
+            conn_strs["agentic"] = args.agentic_conn
+        _writer = SqlWriter(conn_strs)
+    else:
+        _writer = FileWriter(args.out_dir, args.target)
+    _ids = args.ids
+
+
+class _Batcher:
+    """Buffers rows per table and flushes each table every `batch_size` rows."""
+
+    def __init__(self, prefix: str, batch_size: int, tables):
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.buffers = {table: [] for table in tables}
+        self.parts = {table: 0 for table in tables}
+        self.counts = {table: 0 for table in tables}
+
+    def add(self, table: str, row: tuple):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(table)
+
+    def flush(self, table: str):
+        buffer = self.buffers[table]
+        if buffer:
+            _writer.write(table, buffer, f"{self.prefix}-{self.parts[table]:05d}")
+            self.parts[table] += 1
+            self.counts[table] += len(buffer)
+            self.buffers[table] = []
+
+    def flush_in_order(self, tables):
+        for table in tables:
+            self.flush(table)
+
+
+def write_user_chunk(args, chunk: int, start: int, stop: int) -> Dict[str, int]:
+    """Generate and write users [start, stop) with their accounts and transactions."""
+    batcher = _Batcher(f"{chunk:06d}", args.batch_size, BANK_TABLES)
+    pending_txns = []
+    for n in range(start, stop):
+        user, accounts, txns = generate_user(n, args, _calendar)
+        batcher.buffers["users"].append(user)
+        batcher.buffers["accounts"].extend(accounts)
+        pending_txns.append(txns)
+        if len(batcher.buffers["accounts"]) >= args.batch_size:
+            # Parents first so the transaction foreign keys resolve
+            batcher.flush_in_order(("users", "accounts"))
+            _drain(batcher, pending_txns)
+    batcher.flush_in_order(("users", "accounts"))
+    _drain(batcher, pending_txns)
+    batcher.flush("transactions")
+    return batcher.counts
+
+
+def _drain(batcher: _Batcher, pending_txns: List[Iterator[tuple]]):
+    for txns in pending_txns:
+        for row in txns:
+            batcher.add("transactions", row)
+    pending_txns.clear()
+
+
+def write_session_chunk(args, chunk: int, start: int, stop: int) -> Dict[str, int]:
+    """Generate and write chat sessions [start, stop) with their history and tool usage."""
+    batcher = _Batcher(f"{chunk:06d}", args.batch_size, CHAT_TABLES)
+    for s in range(start, stop):
+        rows = generate_session(s, args, _calendar, _ids)
+        batcher.buffers["chat_sessions"].extend(rows["chat_sessions"])
+        batcher.buffers["chat_history"].extend(rows["chat_history"])
+        batcher.buffers["tool_usage"].extend(rows["tool_usage"])
+        if len(batcher.buffers["chat_history"]) >= args.batch_size:
+            batcher.flush_in_order(CHAT_TABLES)
+    batcher.flush_in_order(CHAT_TABLES)
+    return batcher.counts
+
+
+def _run_worker(kind: str, args, chunk: int, start: int, stop: int) -> Dict[str, int]:
+    if _writer is None:
+        _init_worker(args)
+    if kind == "users":
+        return write_user_chunk(args, chunk, start, stop)
+    return write_session_chunk(args, chunk, start, stop)
+
+
+# --- orchestration ----------------------------------------------------------
+def lookup_definition_ids(args) -> Dict[str, object]:
+    """tool_id/agent_id values from the agentic database, falling back to name-based ids."""
+    ids = {"tools": {name: f"tool_{name}" for name in TOOL_WEIGHTS if name}, "agent": "agent_banking_agent_v1"}
+    if args.target != "sql" or not args.agentic_conn:
+        return ids
+    import pyodbc
+    conn = pyodbc.connect(odbc_conn_str(args.agentic_conn))
+    try:
+        cursor = conn.cursor()
+        for tool_id, name in cursor.execute("SELECT tool_id, name FROM tool_definitions").fetchall():
+            ids["tools"][name] = tool_id
+        agent = cursor.execute("SELECT agent_id FROM agent_definitions WHERE name = ?", "banking_agent_v1").fetchone()
+        if agent:
+            ids["agent"] = agent[0]
+    finally:
+        conn.close()
+    return ids
+
+
+class Progress:
+    def __init__(self, label: str, total: int, unit: str):
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.done = 0
+        self.rows = {}
+        self.start = time.perf_counter()
+
+    def update(self, entities: int, counts: Dict[str, int]):
+        self.done += entities
+        for table, count in counts.items():
+            self.rows[table] = self.rows.get(table, 0) + count
+        elapsed = time.perf_counter() - self.start
+        rate = sum(self.rows.values()) / elapsed if elapsed else 0
+        eta = (self.total - self.done) * elapsed / self.done if self.done else 0
+        tables = ", ".join(f"{table} {count:,}" for table, count in self.rows.items())
+        print(f"[{self.label}] {self.done:,}/{self.total:,} {self.unit} ({self.done / self.total:.1%}) | "
+              f"{tables} | {rate:,.0f} rows/s | ETA {eta / 60:.1f} min", flush=True)
+
+
+def run(kind: str, args, total: int, chunk_size: int, label: str, unit: str):
+    if total <= 0:
+        return
+    chunks = [(i, start, min(start + chunk_size, total + 1))
+              for i, start in enumerate(range(1, total + 1, chunk_size))]
+    progress = Progress(label, total, unit)
+    if args.workers <= 1:
+        for chunk, start, stop in chunks:
+            progress.update(stop - start, _run_worker(kind, args, chunk, start, stop))
+        return
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(_run_worker, kind, args, chunk, start, stop): stop - start
+                   for chunk, start, stop in chunks}
+        for future in as_completed(futures):
+            progress.update(futures[future], future.result())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, default=100000, help="approximate total transactions")
+    parser.add_argument("--chat-sessions", type=int, default=0)
+    parser.add_argument("--days", type=int, default=730, help="length of the transaction history window")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None,
+                        help="end of the history window (ISO date, default now)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--id-prefix", default="syn", help="prefix for generated ids (keeps them apart from seed data)")
+    parser.add_argument("--target", choices=("sql", "csv", "parquet"), default="sql")
+    parser.add_argument("--bank-conn", default=os.getenv("FABRIC_SQL_CONNECTION_URL_BANK_DATA"),
+                        help="connection string for users/accounts/transactions")
+    parser.add_argument("--agentic-conn", default=os.getenv("FABRIC_SQL_CONNECTION_URL"),
+                        help="connection string for the chat tables")
+    parser.add_argument("--out-dir", default="synthetic_data", help="output directory for csv/parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel writer processes")
+    parser.add_argument("--chunk-users", type=int, default=5000, help="users generated per work unit")
+    parser.add_argument("--chunk-sessions", type=int, default=5000, help="chat sessions generated per work unit")
+    parser.add_argument("--batch-size", type=int, default=10000, help="rows per insert batch / part file")
+    args = parser.parse_args(argv)
+    args.end = (args.end or datetime.utcnow()).replace(microsecond=0)
+    if args.target == "sql":
+        if args.users and not args.bank_conn:
+            parser.error("--bank-conn (or FABRIC_SQL_CONNECTION_URL_BANK_DATA) is required for --target sql")
+        if args.chat_sessions and not args.agentic_conn:
+            parser.error("--agentic-conn (or FABRIC_SQL_CONNECTION_URL) is required for chat sessions")
+    if args.chat_sessions and not args.users:
+        parser.error("--chat-sessions needs --users to pick session owners from")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.ids = lookup_definition_ids(args)
+    start = time.perf_counter()
+    run("users", args, args.users, args.chunk_users, "bank", "users")
+    run("sessions", args, args.chat_sessions, args.chunk_sessions, "chat", "sessions")
+    print(f"Done in {(time.perf_counter() - start) / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,58 @@
 import os
+import traceback
+from datetime import datetime
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
-from sqlalchemy.pool import QueuePool
 
 from chat_data_model import init_chat_db
-from shared.db_connect import fabricsql_connection_agentic_db
+from shared.db_connect import fabricsql_connection_agentic_db, fabricsql_connection_agentic_db_readonly
+from shared.db_pool import PoolMetrics, database_uri, engine_options, pool_setting, warm_pool
+from shared.analytics_transport import bind_unix_socket, serve_unix_socket, unix_socket_path
+from shared.offline_db import configure_sqlite_engine, is_offline
+from shared.sql_profiler import SqlProfiler
+from shared.tracing import KIND_SERVER, Tracer, current_trace_id, extract_context
+from shared.db_routing import LAST_WRITE_HEADER, REPLICA_BIND_KEY, RoutingSession, install_read_routing, replica_binds
 
 load_dotenv(override=True)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=[LAST_WRITE_HEADER])
 
 # Database configuration for Fabric SQL (analytics data)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_DATABASE_URI'] = "mssql+pyodbc://"
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'creator': fabricsql_connection_agentic_db,
-    'poolclass': QueuePool,
-    'pool_size': 5,
-    'max_overflow': 10,
-    'pool_pre_ping': True,
-    'pool_recycle': 3600,
-    'pool_reset_on_return': 'rollback'
-}
-
-db = SQLAlchemy(app)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri("analytics")
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options("analytics", fabricsql_connection_agentic_db)
+app.config['SQLALCHEMY_BINDS'] = replica_binds(engine_options("analytics", fabricsql_connection_agentic_db_readonly))
+
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+install_read_routing(app)
+
+pool_metrics = PoolMetrics(default_component="analytics")
+replica_pool_metrics = PoolMetrics(default_component="analytics")
+sql_profiler = SqlProfiler("analytics")
+sql_profiler.install(app)
+tracer = Tracer("analytics")
+tracer.install(app)
+with app.app_context():
+    pool_metrics.attach(db.engine)
+    sql_profiler.attach(db.engine)
+    tracer.instrument_engine(db.engine, db.engine.dialect.name)
+    if is_offline():
+        configure_sqlite_engine(db.engine)
+    if REPLICA_BIND_KEY in db.engines:
+        replica_pool_metrics.attach(db.engines[REPLICA_BIND_KEY])
+        sql_profiler.attach(db.engines[REPLICA_BIND_KEY])
+        tracer.instrument_engine(db.engines[REPLICA_BIND_KEY], "mssql")
 
 # Initialize chat history module with database
 init_chat_db(db)
 from chat_data_model import (
-    ToolDefinition, ChatHistoryManager,
+    AgentDefinition, ChatHistory, ToolDefinition, ChatHistoryManager,
     handle_chat_sessions, 
     clear_chat_history, clear_session_data, initialize_tool_definitions, 
-    initialize_agent_definitions
+    initialize_agent_definitions, session_flight
 )
 
 # Chat History API Routes
@@ -69,46 +87,134 @@ def handle_tool_definitions():
         db.session.commit()
         return jsonify(tool_def.to_dict()), 201
 
-# Endpoints for logging messages from banking service
-@app.route('/api/chat/log-trace', methods=['POST'])
-def log_trace():
-    import traceback
-
-    try:
-        data = request.json
-        chat_manager = ChatHistoryManager(
-            session_id=data.get('session_id'),
-            user_id=data.get('user_id', 'user_1')
-        )
-        # call into the chat history manager (note: method expects 'message' kw)
+def record_trace(data):
+    """Persist one agent trace sent by the banking service."""
+    chat_manager = ChatHistoryManager(
+        session_id=data.get('session_id'),
+        user_id=data.get('user_id', 'user_1')
+    )
+    # call into the chat history manager (note: method expects 'message' kw)
+    with tracer.span("analytics.persist_trace", **{"session.id": data.get('session_id')}):
+        # Store the propagated trace id so chat_history rows match the exported spans
         chat_manager.add_trace_messages(
             serialized_messages=data.get('messages'),
-            trace_duration=data.get('trace_duration')
+            trace_duration=data.get('trace_duration'),
+            trace_id=current_trace_id()
         )
+    return {"status": "success"}
+
+# Newest turns returned for a session when the caller has no cached summary
+MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "50"))
+
+def load_conversation(data):
+    """Question/answer turns of a session newer than `since` (oldest first) and the agent's token limit."""
+    query = ChatHistory.query.filter(
+        ChatHistory.session_id == data.get('session_id'),
+        ChatHistory.message_type.in_(('human', 'ai'))
+    )
+    if data.get('since'):
+        query = query.filter(ChatHistory.trace_end > datetime.fromisoformat(data['since']))
+    rows = query.order_by(ChatHistory.trace_end.desc()).limit(MEMORY_MAX_TURNS * 2).all()
+
+    turns = {}
+    for row in reversed(rows):
+        turn = turns.setdefault(row.trace_id, {"trace_id": row.trace_id, "human": None, "ai": None, "at": None})
+        turn["human" if row.message_type == 'human' else "ai"] = row.content or ""
+        turn["at"] = row.trace_end.isoformat() if isinstance(row.trace_end, datetime) else row.trace_end
+    agent = AgentDefinition.query.filter_by(name=data.get('agent_name')).first()
+    return {
+        # A turn cut in half by the row limit is dropped
+        "turns": [turn for turn in turns.values() if turn["human"] is not None and turn["ai"] is not None],
+        "token_limit": (agent.llm_config or {}).get("token_limit") if agent else None,
+    }
+
+def load_agent_config(data):
+    """llm_config of an agent (rate and token budgets), or None if the agent is unknown."""
+    agent = AgentDefinition.query.filter_by(name=data.get('agent_name')).first()
+    return {"name": data.get('agent_name'), "llm_config": agent.llm_config if agent else None}
+
+# Handlers reachable without HTTP, used by the in-process and Unix socket transports
+DISPATCH_HANDLERS = {
+    ('POST', 'chat/log-trace'): record_trace,
+    ('POST', 'chat/memory'): load_conversation,
+    ('POST', 'agents/config'): load_agent_config,
+}
+
+def dispatch(endpoint, method='POST', data=None, headers=None):
+    """Run an analytics handler directly and return its JSON-safe result (None on failure)."""
+    handler = DISPATCH_HANDLERS.get((method, endpoint))
+    if handler is None:
+        print(f"No analytics handler for {method} {endpoint}")
+        return None
+    with app.app_context(), tracer.span(f"dispatch {method} {endpoint}", parent=extract_context(headers),
+                                        kind=KIND_SERVER):
+        try:
+            return handler(data or {})
+        except Exception:
+            traceback.print_exc()
+            db.session.rollback()
+            return None
+
+def open_local_transport():
+    """Bind the Unix socket listener when ANALYTICS_TRANSPORT=unix or ANALYTICS_SOCKET_PATH is set."""
+    path = unix_socket_path()
+    return bind_unix_socket(path) if path else None
+
+def serve_local_transport(listener):
+    if listener is not None:
+        serve_unix_socket(listener, dispatch)
+        print(f"[Analytics Service] Listening on {listener.getsockname()}")
+
+@app.route('/api/chat/memory', methods=['POST'])
+def chat_memory():
+    return jsonify(load_conversation(request.json or {}))
+
+@app.route('/api/agents/config', methods=['POST'])
+def agent_config():
+    return jsonify(load_agent_config(request.json or {}))
 
-        return jsonify({"status": "success"}), 201
+# Endpoints for logging messages from banking service
+@app.route('/api/chat/log-trace', methods=['POST'])
+def log_trace():
+    try:
+        return jsonify(record_trace(request.json)), 201
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 500
 
     
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "pool": pool_metrics.snapshot(),
+        "replica_pool": replica_pool_metrics.snapshot(),
+        "sql": sql_profiler.snapshot(),
+        "singleflight": session_flight.snapshot(),
+    })
+
 # Health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy", "service": "analytics"}), 200
 
+def initialize_database():
+    """Create tables and seed tool and agent definitions. Call inside an app context."""
+    db.create_all()
+    print("[Analytics Service] Database initialized")
+    initialize_tool_definitions()
+    print("[Analytics Service] Tool definitions initialized")
+    initialize_agent_definitions()
+    print("[Analytics Service] Agent definitions initialized")
+
 if __name__ == '__main__':
     print("[Analytics Service] Connecting to database...")
     print("You may be prompted for credentials...")
     
     with app.app_context():
-        db.create_all()
-        print("[Analytics Service] Database initialized")
-        initialize_tool_definitions()
-        print("[Analytics Service] Tool definitions initialized")
-        initialize_agent_definitions()
-        print("[Analytics Service] Agent definitions initialized")
+        initialize_database()
+        warm_pool(db.engine, pool_setting("analytics", "POOL_WARM"))
+    serve_local_transport(open_local_transport())
     
     print("Starting Analytics Service on port 5002...")
     app.run(debug=False, port=5002, use_reloader=False)
\ No newline at end of file
@@ -2,30 +2,42 @@
 import uuid
 from datetime import datetime
 import json
+import threading
 import time
-from dateutil.relativedelta import relativedelta
+from contextlib import nullcontext
 # from sqlalchemy import create_engine
-from sqlalchemy.pool import QueuePool
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
-from langchain_community.vectorstores.utils import DistanceStrategy
-from langchain_sqlserver import SQLServer_VectorStore
 
-from shared.db_connect import fabricsql_connection_bank_db
-import requests  # For calling analytics service
-from langgraph.prebuilt import create_react_agent
-from shared.utils import _serialize_messages
+from shared.db_connect import fabricsql_connection_bank_db, fabricsql_connection_bank_db_readonly
+from shared.db_pool import PoolMetrics, database_uri, engine_options, pool_component, pool_setting, warm_pool
+from shared.offline_db import LocalVectorStore, configure_sqlite_engine, is_offline, seed_banking_data
+from shared.sql_profiler import SqlProfiler
+from shared.tracing import KIND_CLIENT, Tracer, inject_headers
+from shared.tool_cache import ToolResultCache
+from shared.singleflight import SingleFlight
+from shared.outbox import OutboxDispatcher
+from shared.idempotency import IdempotencyConflict, IdempotencyStore
+from shared.update_stream import UpdateStream
+from shared.tool_executor import ToolExecutor
+from shared.admission import AdmissionController, Rejected, tokens_used
+from shared.semantic_cache import SemanticResponseCache, cache_namespace
+from shared.db_routing import LAST_WRITE_HEADER, REPLICA_BIND_KEY, RoutingSession, install_read_routing, replica_binds, use_primary
+from shared.analytics_transport import HttpTransport, InProcessTransport, UnixSocketTransport, unix_socket_path
+from shared.utils import _serialize_messages, local_trace_messages
+from conversation_memory import ConversationMemory
+from intent_router import IntentRouter, is_action_request
+from transaction_search import MAX_PAGE_SIZE, TransactionSearch, parse_time
 
 # Load Environment variables and initialize app
 import os
 load_dotenv(override=True)
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=[LAST_WRITE_HEADER])
 
 # --- Azure OpenAI Configuration ---
 AZURE_OPENAI_KEY = os.getenv("AZURE_OPENAI_KEY")
@@ -35,39 +47,114 @@ AZURE_OPENAI_EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT
 
 # Analytics service URL
 ANALYTICS_SERVICE_URL = "http://127.0.0.1:5002"
-
-if not all([AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_EMBEDDING_DEPLOYMENT]):
+# How to reach analytics: "http", "inprocess" (co-deployed in this process) or "unix" (local socket)
+ANALYTICS_TRANSPORT = os.getenv("ANALYTICS_TRANSPORT", "http").lower()
+ANALYTICS_SOCKET_PATH = unix_socket_path()
+
+# LLM_BACKEND=simulator swaps Azure OpenAI for the deterministic local simulator
+LLM_SIMULATOR = os.getenv("LLM_BACKEND", "azure").lower() == "simulator"
+AI_CONFIGURED = LLM_SIMULATOR or all([AZURE_OPENAI_KEY, AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_DEPLOYMENT, AZURE_OPENAI_EMBEDDING_DEPLOYMENT])
+if not AI_CONFIGURED:
     print("⚠️  Warning: One or more Azure OpenAI environment variables are not set.")
-    ai_client = None
-    embeddings_client = None
-else:
-    ai_client = AzureChatOpenAI(
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        api_version="2024-10-21",
-        api_key=AZURE_OPENAI_KEY,
-        azure_deployment="gpt-4.1"
-    )
-    embeddings_client = AzureOpenAIEmbeddings(
-        azure_deployment=AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-        openai_api_version="2024-10-21",
-        azure_endpoint=AZURE_OPENAI_ENDPOINT,
-        api_key=AZURE_OPENAI_KEY,
-    )
+
+# The AI clients and vector store pull in langchain/langgraph, so they are built on
+# first use rather than at import; the banking REST routes never need them.
+_ai_client = None
+_embeddings_client = None
+_vector_store = None
+_ai_lock = threading.Lock()
+
+def preload_ai_dependencies():
+    """Import the heavy AI modules without constructing clients (safe before fork)."""
+    import langchain_openai  # noqa: F401
+    import langchain_sqlserver  # noqa: F401
+    import langgraph.prebuilt  # noqa: F401
+
+def use_ai_clients(ai_client, embeddings_client=None):
+    """Swap in alternative chat/embeddings clients (e.g. local stand-ins for benchmarks)."""
+    global _ai_client, _embeddings_client, _vector_store
+    with _ai_lock:
+        _ai_client = ai_client
+        _embeddings_client = embeddings_client
+        _vector_store = None
+    response_cache.clear()
+
+def _use_simulated_clients():
+    global _ai_client, _embeddings_client
+    from shared.llm_simulator import simulated_clients_from_env
+    _ai_client, _embeddings_client = simulated_clients_from_env()
+
+def get_ai_client():
+    """Return the shared AzureChatOpenAI client, or None when Azure OpenAI is not configured."""
+    global _ai_client
+    if _ai_client is None and AI_CONFIGURED:
+        with _ai_lock:
+            if _ai_client is None and LLM_SIMULATOR:
+                _use_simulated_clients()
+            elif _ai_client is None:
+                from langchain_openai import AzureChatOpenAI
+                _ai_client = AzureChatOpenAI(
+                    azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                    api_version="2024-10-21",
+                    api_key=AZURE_OPENAI_KEY,
+                    azure_deployment="gpt-4.1"
+                )
+    return _ai_client
+
+def get_embeddings_client():
+    """Return the shared AzureOpenAIEmbeddings client, or None when Azure OpenAI is not configured."""
+    global _embeddings_client
+    if _embeddings_client is None and AI_CONFIGURED:
+        with _ai_lock:
+            if _embeddings_client is None and LLM_SIMULATOR:
+                _use_simulated_clients()
+            elif _embeddings_client is None:
+                from langchain_openai import AzureOpenAIEmbeddings
+                _embeddings_client = AzureOpenAIEmbeddings(
+                    azure_deployment=AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
+                    openai_api_version="2024-10-21",
+                    azure_endpoint=AZURE_OPENAI_ENDPOINT,
+                    api_key=AZURE_OPENAI_KEY,
+                )
+    return _embeddings_client
 
 # Database configuration for Azure SQL (banking data)
-app.config['SQLALCHEMY_DATABASE_URI'] = "mssql+pyodbc://"
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'creator': fabricsql_connection_bank_db,
-    'poolclass': QueuePool,
-    'pool_size': 5,
-    'max_overflow': 10,
-    'pool_pre_ping': True,
-    'pool_recycle': 3600,
-    'pool_reset_on_return': 'rollback'
-}
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri("banking")
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options("banking", fabricsql_connection_bank_db)
+app.config['SQLALCHEMY_BINDS'] = replica_binds(engine_options("banking", fabricsql_connection_bank_db_readonly))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+install_read_routing(app)
+
+# Track which component (REST API, vector store) holds pooled connections
+pool_metrics = PoolMetrics(default_component="api")
+replica_pool_metrics = PoolMetrics(default_component="api")
+sql_profiler = SqlProfiler("banking")
+sql_profiler.install(app)
+tracer = Tracer("banking")
+tracer.install(app)
+# Read-only agent tool results, dropped for a user when a write for them commits
+tool_cache = ToolResultCache()
+tool_cache.attach(RoutingSession)
+# Identical concurrent lookups (same user's accounts, same support question) share one call
+singleflight = SingleFlight()
+
+def forget_account_lookups(user_id):
+    """Drop the user's in-flight GET /api/accounts lookups, on the replica and on the primary."""
+    for replica in (True, False):
+        singleflight.forget(("accounts", user_id, replica))
+
+with app.app_context():
+    pool_metrics.attach(db.engine)
+    sql_profiler.attach(db.engine)
+    tracer.instrument_engine(db.engine, db.engine.dialect.name)
+    if is_offline():
+        configure_sqlite_engine(db.engine)
+    if REPLICA_BIND_KEY in db.engines:
+        replica_pool_metrics.attach(db.engines[REPLICA_BIND_KEY])
+        sql_profiler.attach(db.engines[REPLICA_BIND_KEY])
+        tracer.instrument_engine(db.engines[REPLICA_BIND_KEY], "mssql")
 
 # Vector Store Initialization
 server = os.getenv('DB_SERVER')
@@ -78,15 +165,28 @@ connection_string = os.getenv('FABRIC_SQL_CONNECTION_URL_BANK_DATA')
 
 connection_url = f"mssql+pyodbc:///?odbc_connect={connection_string}"
 
-vector_store = None
-if embeddings_client:
-    vector_store = SQLServer_VectorStore(
-        connection_string=connection_url,
-        table_name="DocsChunks_Embeddings",
-        embedding_function=embeddings_client,
-        embedding_length=1536,
-        distance_strategy=DistanceStrategy.COSINE,
-    )
+def get_vector_store():
+    """Return the shared vector store, building it on first use. None when embeddings are not configured."""
+    global _vector_store
+    embeddings_client = get_embeddings_client()
+    if _vector_store is None and embeddings_client:
+        with _ai_lock:
+            if _vector_store is None and is_offline():
+                _vector_store = LocalVectorStore.from_env(embeddings_client)
+            elif _vector_store is None:
+                from langchain_community.vectorstores.utils import DistanceStrategy
+                from langchain_sqlserver import SQLServer_VectorStore
+                # Borrow connections from the Flask-SQLAlchemy engine instead of opening a second pool
+                with app.app_context(), pool_component("vector_store"):
+                    _vector_store = SQLServer_VectorStore(
+                        connection=db.engine,
+                        connection_string=connection_url,
+                        table_name="DocsChunks_Embeddings",
+                        embedding_function=embeddings_client,
+                        embedding_length=1536,
+                        distance_strategy=DistanceStrategy.COSINE,
+                    )
+    return _vector_store
 
 def to_dict_helper(instance):
     d = {}
@@ -125,6 +225,11 @@ class Account(db.Model):
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    # Newest-first pages of an account's transactions, from either side (see transaction_search.py)
+    __table_args__ = (
+        db.Index('ix_transactions_from_created', 'from_account_id', 'created_at', 'id'),
+        db.Index('ix_transactions_to_created', 'to_account_id', 'created_at', 'id'),
+    )
     id = db.Column(db.String(255), primary_key=True, default=lambda: f"txn_{uuid.uuid4()}")
     from_account_id = db.Column(db.String(255), db.ForeignKey('accounts.id'))
     to_account_id = db.Column(db.String(255), db.ForeignKey('accounts.id'))
@@ -138,21 +243,99 @@ class Transaction(db.Model):
     def to_dict(self):
         return to_dict_helper(self)
 
+class LedgerEvent(db.Model):
+    """Outbox row for a ledger change, committed in the same transaction as the change."""
+    __tablename__ = 'ledger_outbox'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.String(255), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class IdempotencyKey(db.Model):
+    """Result of a write made with an Idempotency-Key; inserted in the same transaction as the write."""
+    __tablename__ = 'idempotency_keys'
+    id = db.Column(db.String(64), primary_key=True)  # sha256 of user, operation and key
+    operation = db.Column(db.String(50), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+ledger_outbox = OutboxDispatcher(app, LedgerEvent)
+ledger_outbox.attach(RoutingSession)
+ledger_outbox.install(app)
+# Each /api/events long-poll holds a worker thread for up to `wait` seconds
+_feed_waiters = threading.BoundedSemaphore(int(os.getenv("EVENTS_MAX_WAITERS", "8")))
+
+def _invalidate_user_caches(events):
+    # Runs in every worker, so caches there drop entries the commit-time hook only clears locally
+    for user_id in {e["user_id"] for e in events}:
+        tool_cache.invalidate_user(user_id)
+        forget_account_lookups(user_id)
+
+ledger_outbox.subscribe(_invalidate_user_caches)
+
+def ledger_delta(event):
+    """The increment a dashboard applies for a ledger event: new accounts and transactions, changed balances."""
+    data = event["data"]
+    if event["type"] == "account.created":
+        return {"accounts": [data["account"]], "balances": {}, "transactions": []}
+    if event["type"] == "transaction.created":
+        return {"accounts": [], "balances": data["balances"], "transactions": [data["transaction"]]}
+    return None
+
+update_stream = UpdateStream(ledger_delta)
+ledger_outbox.subscribe(update_stream.publish)
+
+def wsgi_stream_limit():
+    """Open update streams allowed per gunicorn worker, or None to apply only STREAM_MAX_CONNECTIONS.
+
+    Every open stream holds one of the worker's WSGI_THREADS, so by default a quarter
+    of them stay free for requests. STREAM_WSGI_LIMIT sets the cap explicitly.
+    Without WSGI_THREADS (Flask dev server, uvicorn) there is no thread to protect.
+    """
+    configured = os.getenv("STREAM_WSGI_LIMIT")
+    if configured:
+        return int(configured)
+    threads = os.getenv("WSGI_THREADS")
+    if not threads:
+        return None
+    return max(int(threads) * 3 // 4, 1)
+
+WSGI_STREAM_LIMIT = wsgi_stream_limit()
+STREAM_REPLAY_LIMIT = 1000
+
+idempotency = IdempotencyStore(IdempotencyKey, lambda: db.session)
+idempotency.attach(RoutingSession)
+
 # Analytics Service Integration
+_analytics_transport = None
+
+def get_analytics_transport():
+    """Build the configured analytics transport on first use."""
+    global _analytics_transport
+    if _analytics_transport is None:
+        if ANALYTICS_TRANSPORT == "inprocess":
+            import agent_analytics
+            _analytics_transport = InProcessTransport(agent_analytics.dispatch)
+        elif ANALYTICS_TRANSPORT == "unix":
+            _analytics_transport = UnixSocketTransport(ANALYTICS_SOCKET_PATH)
+        else:
+            _analytics_transport = HttpTransport(ANALYTICS_SERVICE_URL)
+    return _analytics_transport
+
 def call_analytics_service(endpoint, method='POST', data=None):
     """Helper function to call analytics service"""
     try:
-        url = f"{ANALYTICS_SERVICE_URL}/api/{endpoint}"
-        if method == 'POST':
-            response = requests.post(url, json=data, timeout=5)
-        else:
-            response = requests.get(url, timeout=5)
-        return response.json() if response.status_code < 400 else None
+        with tracer.span(f"analytics {method} {endpoint}", kind=KIND_CLIENT):
+            return get_analytics_transport().call(endpoint, method=method, data=data, headers=inject_headers())
     except Exception as e:
         print(f"Analytics service call failed: {e}")
         return None
 
 # AI Chatbot Tool Definitions (same as before)
+@tracer.wrap("tool.get_user_accounts")
+@tool_cache.cached("get_user_accounts")
 def get_user_accounts(user_id: str = 'user_1') -> str:
     """Retrieves all accounts for a given user."""
     try:
@@ -166,8 +349,11 @@ def get_user_accounts(user_id: str = 'user_1') -> str:
     except Exception as e:
         return f"Error retrieving accounts: {str(e)}"
 
+@tracer.wrap("tool.get_transactions_summary")
+@tool_cache.cached("get_transactions_summary")
 def get_transactions_summary(user_id: str = 'user_1', time_period: str = 'this month', account_name: str = None) -> str:
     """Provides a summary of the user's spending. Can be filtered by a time period and a specific account."""
+    from dateutil.relativedelta import relativedelta
     try:
         query = db.session.query(Transaction.category, db.func.sum(Transaction.amount).label('total_spent')).filter(
             Transaction.type == 'payment'
@@ -209,12 +395,18 @@ def get_transactions_summary(user_id: str = 'user_1', time_period: str = 'this m
         print(f"ERROR in get_transactions_summary: {e}")
         return json.dumps({"status": "error", "message": f"An error occurred while generating the transaction summary."})
 
+@tracer.wrap("tool.search_support_documents")
 def search_support_documents(user_question: str) -> str:
     """Searches the knowledge base for answers to customer support questions using vector search."""
+    vector_store = get_vector_store()
     if not vector_store:
         return "The vector store is not configured."
     try:
-        results = vector_store.similarity_search_with_score(user_question, k=3)
+        def search():
+            with pool_component("vector_store"):
+                return vector_store.similarity_search_with_score(user_question, k=3)
+        # One embedding + vector query for concurrent identical questions
+        results = singleflight.do(("vector_search", user_question.strip()), search)
         relevant_docs = [doc.page_content for doc, score in results if score < 0.5]
         print("-------------> ", relevant_docs)
         if not relevant_docs:
@@ -227,6 +419,8 @@ def search_support_documents(user_question: str) -> str:
         print(f"ERROR in search_support_documents: {e}")
         return "An error occurred while searching for support documents."
 
+@tracer.wrap("tool.create_new_account")
+@idempotency.agent_tool("create_new_account")
 def create_new_account(user_id: str = 'user_1', account_type: str = 'checking', name: str = None, balance: float = 0.0) -> str:
     """Creates a new bank account for the user."""
     if not name:
@@ -234,7 +428,12 @@ def create_new_account(user_id: str = 'user_1', account_type: str = 'checking',
     try:
         new_account = Account(user_id=user_id, account_type=account_type, balance=balance, name=name)
         db.session.add(new_account)
+        db.session.flush()
+        ledger_outbox.record(db.session, "account.created", user_id, {"account": new_account.to_dict()})
+        tool_cache.invalidate_on_commit(db.session, user_id)
         db.session.commit()
+        # Readers arriving from now on must not join a lookup that started before the write
+        forget_account_lookups(user_id)
         return json.dumps({
             "status": "success", "message": f"Successfully created new {account_type} account '{name}' with balance ${balance:.2f}.",
             "account_id": new_account.id, "account_name": new_account.name
@@ -243,6 +442,8 @@ def create_new_account(user_id: str = 'user_1', account_type: str = 'checking',
         db.session.rollback()
         return f"Error creating account: {str(e)}"
 
+@tracer.wrap("tool.transfer_money")
+@idempotency.agent_tool("transfer_money")
 def transfer_money(user_id: str = 'user_1', from_account_name: str = None, to_account_name: str = None, amount: float = 0.0, to_external_details: dict = None) -> str:
     """Transfers money between user's accounts or to an external account."""
     if not from_account_name or (not to_account_name and not to_external_details) or amount <= 0:
@@ -269,23 +470,53 @@ def transfer_money(user_id: str = 'user_1', from_account_name: str = None, to_ac
         if to_account:
             to_account.balance += amount
         db.session.add(new_transaction)
+        db.session.flush()
+        balances = {from_account.id: from_account.balance}
+        if to_account:
+            balances[to_account.id] = to_account.balance
+        ledger_outbox.record(db.session, "transaction.created", user_id, {
+            "transaction": new_transaction.to_dict(), "balances": balances,
+        })
+        tool_cache.invalidate_on_commit(db.session, user_id)
         db.session.commit()
+        # Readers arriving from now on must not join a lookup that started before the write
+        forget_account_lookups(user_id)
         return json.dumps({"status": "success", "message": f"Successfully transferred ${amount:.2f}."})
     except Exception as e:
         db.session.rollback()
         return f"Error during transfer: {str(e)}"
 
 # Banking API Routes
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+def run_idempotent(user_id, operation, data, func):
+    """Run a write tool, honouring the Idempotency-Key header; returns (result, response headers).
+
+    A retry with the same key gets the first result back without running the write again.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return json.loads(func()), {}
+    result_str, replayed = idempotency.execute(user_id, operation, key, data, func)
+    return json.loads(result_str), {"Idempotent-Replayed": "true"} if replayed else {}
+
+@app.errorhandler(IdempotencyConflict)
+def idempotency_conflict(e):
+    return jsonify({"error": str(e)}), 422
+
 @app.route('/api/accounts', methods=['GET', 'POST'])
 def handle_accounts():
     user_id = 'user_1'
     if request.method == 'GET':
-        accounts = Account.query.filter_by(user_id=user_id).all()
-        return jsonify([acc.to_dict() for acc in accounts])
+        # A request pinned to the primary (e.g. right after the client wrote) must not join a replica read
+        accounts = singleflight.do(("accounts", user_id, g.get("db_read_replica", False)), lambda: [
+            acc.to_dict() for acc in Account.query.filter_by(user_id=user_id).all()])
+        return jsonify(accounts)
     if request.method == 'POST':
         data = request.json
-        account_str = create_new_account(user_id=user_id, account_type=data.get('account_type'), name=data.get('name'), balance=data.get('balance', 0))
-        return jsonify(json.loads(account_str)), 201
+        result, headers = run_idempotent(user_id, "create_new_account", data, lambda: create_new_account(
+            user_id=user_id, account_type=data.get('account_type'), name=data.get('name'), balance=data.get('balance', 0)))
+        return jsonify(result), 201, headers
 
 @app.route('/api/transactions', methods=['GET', 'POST'])
 def handle_transactions():
@@ -293,21 +524,245 @@ def handle_transactions():
     if request.method == 'GET':
         accounts = Account.query.filter_by(user_id=user_id).all()
         account_ids = [acc.id for acc in accounts]
-        transactions = Transaction.query.filter((Transaction.from_account_id.in_(account_ids)) | (Transaction.to_account_id.in_(account_ids))).order_by(Transaction.created_at.desc()).all()
+        query = Transaction.query.filter((Transaction.from_account_id.in_(account_ids)) | (Transaction.to_account_id.in_(account_ids)))
+        # ?from= bounds the list (e.g. the months the dashboard charts); full history is paged via /search
+        try:
+            since = parse_time(request.args.get('from'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if since is not None:
+            query = query.filter(Transaction.created_at >= since)
+        transactions = query.order_by(Transaction.created_at.desc()).all()
         return jsonify([t.to_dict() for t in transactions])
     if request.method == 'POST':
         data = request.json
-        result_str = transfer_money(
+        result, headers = run_idempotent(user_id, "transfer_money", data, lambda: transfer_money(
             user_id=user_id, from_account_name=data.get('from_account_name'), to_account_name=data.get('to_account_name'),
             amount=data.get('amount'), to_external_details=data.get('to_external_details')
-        )
-        result = json.loads(result_str)
+        ))
         status_code = 201 if result.get("status") == "success" else 400
-        return jsonify(result), status_code
+        return jsonify(result), status_code, headers
+
+transaction_search = TransactionSearch(Transaction)
+
+@app.route('/api/transactions/search', methods=['GET'])
+def search_transactions():
+    """Filtered, keyset-paginated transactions; the first page also has totals over all matches."""
+    user_id = 'user_1'
+    args = request.args
+    account_ids = [row.id for row in Account.query.with_entities(Account.id).filter_by(user_id=user_id)]
+    try:
+        result = transaction_search.search(
+            db.session, account_ids, q=args.get('q'), account_id=args.get('account'),
+            type=args.get('type'), category=args.get('category'),
+            date_from=parse_time(args.get('from')), date_to=parse_time(args.get('to')),
+            min_amount=args.get('min_amount', type=float), max_amount=args.get('max_amount', type=float),
+            cursor=args.get('cursor'), limit=max(1, min(args.get('limit', 50, type=int), MAX_PAGE_SIZE)),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result)
+
+@app.route('/api/transactions/filters', methods=['GET'])
+def transaction_filters():
+    """Types and categories for the transaction search filters."""
+    user_id = 'user_1'
+    account_ids = [row.id for row in Account.query.with_entities(Account.id).filter_by(user_id=user_id)]
+    return jsonify(transaction_search.filter_options(db.session, account_ids))
+
+@app.route('/api/events', methods=['GET'])
+def ledger_events():
+    """The user's ledger events after ?after=<id>, long-polling up to ?wait= seconds (max 30)."""
+    user_id = 'user_1'
+    wait = max(0.0, min(request.args.get('wait', 0, type=float), 30))
+    if wait and not _feed_waiters.acquire(blocking=False):
+        raise Rejected("Too many waiting change feed requests.", 1)
+    try:
+        # A lagging replica could be missing events below safe_id, which the cursor would then skip
+        use_primary()
+        events, cursor = ledger_outbox.read(
+            after=request.args.get('after', 0, type=int),
+            limit=min(request.args.get('limit', 100, type=int), 1000),
+            user_id=user_id,
+            wait=wait,
+        )
+    finally:
+        if wait:
+            _feed_waiters.release()
+    return jsonify({"events": events, "next": cursor})
+
+def update_backlog(user_id, after):
+    """(frames, ids) for a client opening the update stream, resuming after outbox id `after` if given."""
+    # A lagging replica could be missing events the client must not skip
+    use_primary()
+    if after is None:
+        return update_stream.backlog([], True, ledger_outbox.safe_id, resumed=False)
+    events, cursor = ledger_outbox.read(after, limit=STREAM_REPLAY_LIMIT, user_id=user_id)
+    return update_stream.backlog(events, len(events) < STREAM_REPLAY_LIMIT, cursor, resumed=True)
+
+def stream_resume_id(value):
+    """Outbox id from a Last-Event-ID header or ?after= parameter, if any."""
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+@app.route('/api/stream/updates', methods=['GET'])
+def stream_updates():
+    """Server-Sent Events: the user's balance changes and new transactions as ledger writes commit."""
+    user_id = 'user_1'
+    # EventSource sends Last-Event-ID itself when it reconnects
+    after = stream_resume_id(request.headers.get('Last-Event-ID') or request.args.get('after'))
+    subscription = update_stream.open(user_id, limit=WSGI_STREAM_LIMIT)
+    try:
+        backlog, sent = update_backlog(user_id, after)
+    except Exception:
+        update_stream.close(subscription)
+        raise
+    return Response(stream_with_context(update_stream.frames(subscription, backlog, sent)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Health check endpoint
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify({"status": "healthy", "service": "banking"}), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        "pool": pool_metrics.snapshot(),
+        "replica_pool": replica_pool_metrics.snapshot(),
+        "sql": sql_profiler.snapshot(),
+        "memory": conversation_memory.snapshot(),
+        "tool_cache": tool_cache.snapshot(),
+        "tool_executor": tool_executor.snapshot(),
+        "admission": admission.snapshot(),
+        "response_cache": response_cache.snapshot(),
+        "intent_router": intent_router.snapshot(),
+        "singleflight": singleflight.snapshot(),
+        "outbox": ledger_outbox.snapshot(),
+        "idempotency": idempotency.snapshot(),
+        "update_stream": update_stream.snapshot(),
+    })
+
+BANKING_AGENT_NAME = "banking_agent_v1"
+BANKING_AGENT_PROMPT = """
+        - You are a customer support agent.
+        - You can use the provided tools to answer user questions and perform tasks.
+        - If you were unable to find an answer, inform the user.
+        - Do not use your general knowledge to answer questions."""
+BANKING_TOOLS = [get_user_accounts, get_transactions_summary,
+                 search_support_documents, create_new_account,
+                 transfer_money]
+# Tools that write; the executor serializes these and runs the rest concurrently
+MUTATING_TOOLS = ("create_new_account", "transfer_money")
+tool_executor = ToolExecutor(app, mutating=MUTATING_TOOLS)
+
+def load_conversation_turns(session_id, since=None):
+    """Prior turns of a chat session from the analytics service (None if it is unreachable)."""
+    return call_analytics_service("chat/memory", data={
+        "session_id": session_id, "since": since, "agent_name": BANKING_AGENT_NAME})
+
+conversation_memory = ConversationMemory(load_conversation_turns, get_ai_client)
+
+def load_agent_config(agent_name):
+    """llm_config of an agent from the analytics service (None if it is unreachable)."""
+    result = call_analytics_service("agents/config", data={"agent_name": agent_name})
+    return result.get("llm_config") if result else None
+
+admission = AdmissionController(load_agent_config)
+
+# Tools whose results are the same for every user; a turn that used only these can be reused
+SHARED_TOOLS = ("search_support_documents",)
+response_cache = SemanticResponseCache(lambda text: get_embeddings_client().embed_query(text))
+
+def response_cache_namespace(ai_client, tools=BANKING_TOOLS):
+    model = getattr(ai_client, "deployment_name", None) or getattr(ai_client, "model_name", "")
+    return cache_namespace(BANKING_AGENT_NAME, BANKING_AGENT_PROMPT, model, *sorted(t.__name__ for t in tools))
+
+def lookup_cached_response(ai_client, user_message):
+    """(answer, lookup): answer is None on a miss; pass lookup on to remember_response."""
+    if not response_cache.enabled or not get_embeddings_client():
+        return None, None
+    namespace = response_cache_namespace(ai_client)
+    with tracer.span("response_cache.lookup"):
+        answer, vector = response_cache.lookup(namespace, user_message)
+    return answer, (namespace, user_message, vector)
+
+def is_standalone_question(context, user_message):
+    """Only these may be answered from (or stored in) the response cache.
+
+    A follow-up can depend on the earlier turns, and an action request must reach
+    the agent even when it reads like a cached question.
+    """
+    return not context and not is_action_request(user_message)
+
+def is_shareable_answer(messages):
+    """True when the turn ran only user-independent tools and none of them failed."""
+    for message in messages:
+        if any(call["name"] not in SHARED_TOOLS for call in getattr(message, "tool_calls", None) or ()):
+            return False
+        if getattr(message, "type", None) == "tool" and getattr(message, "status", None) == "error":
+            return False
+    return bool(messages) and bool(messages[-1].content)
+
+def remember_response(lookup, context, new_messages):
+    # lookup is None unless the turn was a standalone question (see is_standalone_question)
+    if lookup is not None and not context and is_shareable_answer(new_messages):
+        response_cache.store(*lookup, new_messages[-1].content)
+
+intent_router = IntentRouter()
+
+def route_intent(user_id, user_message):
+    """(answer, tool_calls) from the intent router's fast path, or None to run the agent."""
+    tools = {tool.__name__: tool for tool in BANKING_TOOLS}
+
+    def call_tool(name, args):
+        return tool_executor.submit(tools[name], {**args, "user_id": user_id}).result()
+
+    with tracer.span("intent_router.route"):
+        return intent_router.answer(user_message, call_tool)
+
+def agent_turn(session_id, messages):
+    """Idempotency scope for the agent's writes in this turn.
+
+    A retried request for the same turn (same session, position and message) that
+    re-issues a transfer gets the first result instead of moving money twice.
+    """
+    if not session_id:
+        return nullcontext()
+    return idempotency.turn(f"{session_id}:{len(messages)}:{messages[-1].get('content', '')}")
+
+def local_trace_data(session_id, user_id, question, answer, source, started, tool_calls=()):
+    """log-trace payload for a turn answered without running the agent."""
+    return {
+        "session_id": session_id,
+        "user_id": user_id,
+        "messages": _serialize_messages(local_trace_messages(question, answer, BANKING_AGENT_NAME, source, tool_calls)),
+        "trace_duration": int((time.time() - started) * 1000),
+    }
+
+@app.errorhandler(Rejected)
+def too_many_requests(e):
+    response = jsonify({"error": e.reason, "retry_after": e.retry_after})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 429
+
+def create_banking_agent(ai_client, tools=None):
+    """Build the ReAct banking agent around the given chat model."""
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        model = ai_client,
+        tools = tools or [tool_executor.wrap(tool) for tool in BANKING_TOOLS],
+        prompt = BANKING_AGENT_PROMPT,
+        name = BANKING_AGENT_NAME
+    )
 
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
-
+    ai_client = get_ai_client()
     if not ai_client:
         return jsonify({"error": "Azure OpenAI client is not configured."}), 503
 
@@ -318,35 +773,48 @@ def chatbot():
     
     print(messages)
 
-    # Extract user message and define tools
+    # Extract user message and initialize banking agent
     user_message = messages[-1].get("content", "")
-    tools = [get_user_accounts, get_transactions_summary,
-            search_support_documents, create_new_account,
-            transfer_money]
-
-    # Initialize banking agent
-    banking_agent = create_react_agent(
-        model = ai_client,
-        tools = tools,
-        prompt = """
-        - You are a customer support agent.
-        - You can use the provided tools to answer user questions and perform tasks.
-        - If you were unable to find an answer, inform the user.
-        - Do not use your general knowledge to answer questions.""",
-        name = "banking_agent_v1"
-    )
+    # Routed answers cost no model calls, so they skip admission control
+    started = time.time()
+    routed = route_intent(user_id, user_message)
+    if routed is not None:
+        answer, tool_calls = routed
+        call_analytics_service("chat/log-trace", data=local_trace_data(
+            session_id, user_id, user_message, answer, "intent-router", started, tool_calls))
+        return jsonify({"response": answer, "session_id": session_id, "tools_used": []})
+    banking_agent = create_banking_agent(ai_client)
     #--------------------------------------------------------
-    trace_start_time = time.time()
-    response = banking_agent.invoke( {"messages": [{"role": "user", "content": user_message}]})
-    end_time = time.time()
+    # Raises Rejected (429) when over the agent's budgets or the server is saturated
+    with admission.admit(user_id, BANKING_AGENT_NAME) as report_tokens:
+        trace_start_time = time.time()
+        # Loading the context may summarise older turns with the model, so it stays under admission
+        context = conversation_memory.context_messages(session_id, user_message)
+        cached_answer, cache_lookup = None, None
+        if is_standalone_question(context, user_message):
+            cached_answer, cache_lookup = lookup_cached_response(ai_client, user_message)
+        if cached_answer is not None:
+            report_tokens(0)
+        else:
+            with tracer.span("agent.invoke", **{"agent.name": BANKING_AGENT_NAME, "session.id": session_id}), \
+                    agent_turn(session_id, messages):
+                response = banking_agent.invoke( {"messages": context + [{"role": "user", "content": user_message}]})
+            end_time = time.time()
+            report_tokens(tokens_used(response['messages'][len(context):]))
+    if cached_answer is not None:
+        call_analytics_service("chat/log-trace", data=local_trace_data(
+            session_id, user_id, user_message, cached_answer, "semantic-cache", started))
+        return jsonify({"response": cached_answer, "session_id": session_id, "tools_used": []})
     trace_duration = int((end_time - trace_start_time) * 1000)  # Convert to milliseconds
     print("################### NEW TRACE STARTS ######################")
     final_messages = response['messages']
+    remember_response(cache_lookup, context, final_messages[len(context):])
 
     analytics_data = {
         "session_id": session_id,
         "user_id": user_id,
-        "messages": _serialize_messages(final_messages),
+        # Only this turn is new; the context came from chat_history
+        "messages": _serialize_messages(final_messages[len(context):]),
         "trace_duration": trace_duration,
     }
 
@@ -359,13 +827,20 @@ def chatbot():
         "tools_used": []
     })
 
+def initialize_database():
+    """Create tables. Call inside an app context."""
+    db.create_all()
+    print("[Banking Service] Database initialized")
+    if is_offline():
+        seed_banking_data(db)
+
 if __name__ == '__main__':
     print("[Banking Service] Connecting to database...")
     print("You may be prompted for credentials...")
     
     with app.app_context():
-        db.create_all()
-        print("[Banking Service] Database initialized")
+        initialize_database()
+        warm_pool(db.engine, pool_setting("banking", "POOL_WARM"))
 
     print("Starting Banking Service on port 5001...")
     app.run(debug=False, port=5001, use_reloader=False)
@@ -0,0 +1,249 @@
+"""ASGI entry point that serves /api/chatbot and /api/stream/updates with asyncio.
+
+A chat request spends nearly all of its time waiting on Azure OpenAI. Under the
+WSGI app that wait pins a worker thread; here it is an awaiting coroutine, so one
+process can hold hundreds of conversations open, and likewise hundreds of
+dashboards subscribed to balance updates. Everything else (accounts,
+transactions, health, metrics) is the unchanged Flask app, run through asgiref's
+WsgiToAsgi thread pool.
+
+    uvicorn banking_asgi:app --port 5001 --workers 4
+"""
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+
+import banking_app
+from shared.admission import Rejected, tokens_used
+from shared.analytics_transport import AsyncHttpTransport
+from shared.db_pool import pool_setting, warm_pool
+from shared.db_routing import LAST_WRITE_HEADER, last_write_headers, track_writes
+from shared.tracing import KIND_CLIENT, KIND_SERVER, extract_context, inject_headers
+from shared.utils import _serialize_messages
+
+wsgi_app = WsgiToAsgi(banking_app.app)
+
+_agent = None
+_async_analytics = None
+
+
+def _async_tool(func):
+    """Wrap a sync banking tool as a StructuredTool with an awaitable implementation."""
+    from langchain_core.tools import StructuredTool
+
+    async def run(**kwargs):
+        # Tool DB work runs on the executor's bounded threads (pyodbc has no asyncio driver)
+        return await asyncio.wrap_future(banking_app.tool_executor.submit(func, kwargs))
+
+    return StructuredTool.from_function(func=func, coroutine=run, name=func.__name__,
+                                        description=func.__doc__)
+
+
+def get_async_agent():
+    """Compile the banking agent with async tools once per process."""
+    global _agent
+    if _agent is None:
+        tools = [_async_tool(tool) for tool in banking_app.BANKING_TOOLS]
+        _agent = banking_app.create_banking_agent(banking_app.get_ai_client(), tools=tools)
+    return _agent
+
+
+async def acall_analytics_service(endpoint, method='POST', data=None):
+    """Async counterpart of banking_app.call_analytics_service."""
+    global _async_analytics
+    try:
+        if banking_app.ANALYTICS_TRANSPORT == "http":
+            if _async_analytics is None:
+                _async_analytics = AsyncHttpTransport(banking_app.ANALYTICS_SERVICE_URL)
+            with banking_app.tracer.span(f"analytics {method} {endpoint}", kind=KIND_CLIENT):
+                return await _async_analytics.acall(endpoint, method=method, data=data, headers=inject_headers())
+        # In-process and Unix socket transports are blocking; keep them off the event loop
+        return await asyncio.to_thread(banking_app.call_analytics_service, endpoint, method, data)
+    except Exception as e:
+        print(f"Analytics service call failed: {e}")
+        return None
+
+
+async def _read_body(receive):
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send, payload, status=200, extra_headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            # flask_cors covers the WSGI routes; mirror its default for this one
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-expose-headers", LAST_WRITE_HEADER.encode()),
+            *extra_headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _last_write_headers(writes):
+    """The read-after-write marker for a chatbot turn whose tools wrote (see shared.db_routing)."""
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in last_write_headers(writes)]
+
+
+async def chatbot(scope, receive, send):
+    if not banking_app.get_ai_client():
+        await _send_json(send, {"error": "Azure OpenAI client is not configured."}, 503)
+        return
+    try:
+        data = json.loads(await _read_body(receive) or b"{}")
+    except ValueError:
+        await _send_json(send, {"error": "Request body must be JSON."}, 400)
+        return
+
+    messages = data.get("messages", [])
+    session_id = data.get("session_id")
+    user_id = data.get("user_id", "user_1")
+    user_message = messages[-1].get("content", "")
+
+    headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+    with banking_app.tracer.span("POST /api/chatbot", parent=extract_context(headers), kind=KIND_SERVER), \
+            track_writes() as writes:
+        started = time.time()
+        routed = await asyncio.to_thread(banking_app.route_intent, user_id, user_message)
+        if routed is not None:
+            answer, tool_calls = routed
+            await acall_analytics_service("chat/log-trace", data=banking_app.local_trace_data(
+                session_id, user_id, user_message, answer, "intent-router", started, tool_calls))
+            await _send_json(send, {"response": answer, "session_id": session_id, "tools_used": []},
+                             extra_headers=_last_write_headers(writes))
+            return
+        try:
+            async with banking_app.admission.aadmit(user_id, banking_app.BANKING_AGENT_NAME) as report_tokens:
+                trace_start_time = time.time()
+                context = await asyncio.to_thread(banking_app.conversation_memory.context_messages,
+                                                  session_id, user_message)
+                cached_answer, cache_lookup = None, None
+                if banking_app.is_standalone_question(context, user_message):
+                    cached_answer, cache_lookup = await asyncio.to_thread(
+                        banking_app.lookup_cached_response, banking_app.get_ai_client(), user_message)
+                if cached_answer is not None:
+                    report_tokens(0)
+                else:
+                    with banking_app.tracer.span("agent.invoke", **{"agent.name": banking_app.BANKING_AGENT_NAME,
+                                                                     "session.id": session_id}), \
+                            banking_app.agent_turn(session_id, messages):
+                        response = await get_async_agent().ainvoke(
+                            {"messages": context + [{"role": "user", "content": user_message}]})
+                    trace_duration = int((time.time() - trace_start_time) * 1000)
+                    report_tokens(tokens_used(response['messages'][len(context):]))
+        except Rejected as e:
+            await _send_json(send, {"error": e.reason, "retry_after": e.retry_after}, 429,
+                             extra_headers=[(b"retry-after", str(e.retry_after).encode())])
+            return
+        if cached_answer is not None:
+            await acall_analytics_service("chat/log-trace", data=banking_app.local_trace_data(
+                session_id, user_id, user_message, cached_answer, "semantic-cache", started))
+            await _send_json(send, {"response": cached_answer, "session_id": session_id, "tools_used": []})
+            return
+        final_messages = response['messages']
+        banking_app.remember_response(cache_lookup, context, final_messages[len(context):])
+
+        analytics_data = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "messages": _serialize_messages(final_messages[len(context):]),
+            "trace_duration": trace_duration,
+        }
+        await acall_analytics_service("chat/log-trace", data=analytics_data)
+    await _send_json(send, {
+        "response": final_messages[-1].content,
+        "session_id": session_id,
+        "tools_used": []
+    }, extra_headers=_last_write_headers(writes))
+
+
+def _update_backlog(user_id, after):
+    with banking_app.app.app_context():
+        return banking_app.update_backlog(user_id, after)
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream_updates(scope, receive, send):
+    """/api/stream/updates as a coroutine, so open dashboards do not each hold a thread."""
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    after = banking_app.stream_resume_id(headers.get("last-event-id") or query.get("after", [None])[0])
+    user_id = 'user_1'
+    banking_app.ledger_outbox.ensure_started()
+    try:
+        subscription = banking_app.update_stream.open(user_id, loop=asyncio.get_running_loop())
+    except Rejected as e:
+        await _send_json(send, {"error": e.reason, "retry_after": e.retry_after}, 429,
+                         extra_headers=[(b"retry-after", str(e.retry_after).encode())])
+        return
+    disconnected = asyncio.create_task(_wait_for_disconnect(receive))
+    try:
+        backlog, sent = await asyncio.to_thread(_update_backlog, user_id, after)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                (b"access-control-allow-origin", b"*"),
+            ],
+        })
+        async for frame in banking_app.update_stream.aframes(subscription, backlog, sent):
+            # Idle streams yield a keepalive every STREAM_KEEPALIVE seconds, so this is checked regularly
+            if disconnected.done():
+                break
+            await send({"type": "http.response.body", "body": frame.encode("utf-8"), "more_body": True})
+    finally:
+        disconnected.cancel()
+        banking_app.update_stream.close(subscription)
+
+
+def _startup():
+    with banking_app.app.app_context():
+        banking_app.initialize_database()
+        warm_pool(banking_app.db.engine, pool_setting("banking", "POOL_WARM"))
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await asyncio.to_thread(_startup)
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(scope, receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/api/chatbot" and scope["method"] == "POST":
+        await chatbot(scope, receive, send)
+    elif scope["type"] == "http" and scope["path"] == "/api/stream/updates" and scope["method"] == "GET":
+        await stream_updates(scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
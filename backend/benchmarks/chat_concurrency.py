@@ -0,0 +1,181 @@
+"""Concurrency-at-fixed-memory load test for /api/chatbot.
+
+Ramps the number of simultaneous chat requests against a running banking
+service and samples the resident memory of the server's whole process tree.
+It reports the highest concurrency that completed within the memory budget and
+the error-rate limit. Run it once against the sync server and once against the
+async one, then compare the two JSON reports:
+
+    python launcher.py --production                 # sync gunicorn workers
+    python -m benchmarks.chat_concurrency --server-pid <gunicorn master pid> --label sync
+
+    python launcher.py --production --asgi          # uvicorn/asyncio chatbot
+    python -m benchmarks.chat_concurrency --server-pid <uvicorn pid> --label async
+
+Use the same worker count for both runs so the memory budget is comparable.
+Start the server with LLM_BACKEND=simulator to measure serving overhead
+without Azure OpenAI rate limits or cost in the picture, and with
+CHAT_RATE_LIMITS=0: the per-user and per-agent budgets would otherwise answer
+most of a step with 429 before concurrency is tested at all. Chats are spread
+over the seeded users either way.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+# Users in Data_Ingest/schema.sql
+SEEDED_USERS = 6
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Field 4 (after the parenthesised command name) is the parent pid
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def tree_rss_mb(pid):
+    """Resident memory of a process and all of its descendants (Linux /proc)."""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+        pending.extend(_children(current))
+    return total_kb / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_step(client, url, concurrency, question, server_pid):
+    latencies = []
+    errors = 0
+    peak_rss = 0.0
+    done = asyncio.Event()
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while not done.is_set():
+            peak_rss = max(peak_rss, tree_rss_mb(server_pid))
+            await asyncio.sleep(0.2)
+
+    async def one_chat(i):
+        nonlocal errors
+        payload = {"messages": [{"role": "user", "content": question}],
+                   "session_id": f"loadtest_{concurrency}_{i}", "user_id": f"user_{i % SEEDED_USERS + 1}"}
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload)
+            if response.status_code != 200:
+                errors += 1
+                return
+        except httpx.HTTPError:
+            errors += 1
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    sampler = asyncio.create_task(sample_memory())
+    start = time.perf_counter()
+    await asyncio.gather(*(one_chat(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await sampler
+
+    return {
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "errors": errors,
+        "error_rate": errors / concurrency,
+        "wall_s": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.fmean(latencies) if latencies else None,
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+async def rate_limits_enabled(client, base_url):
+    """Whether the server enforces chat rate limits (None if /api/metrics does not say)."""
+    try:
+        response = await client.get(f"{base_url}/api/metrics")
+        return response.json()["admission"]["rate_limits"]["enabled"]
+    except (httpx.HTTPError, ValueError, KeyError, TypeError):
+        return None
+
+
+async def main_async(args):
+    url = f"{args.base_url}/api/chatbot"
+    steps = []
+    max_ok = 0
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if await rate_limits_enabled(client, args.base_url) and not args.allow_rate_limits:
+            raise SystemExit("The server enforces chat rate limits, which cap the run long before memory does. "
+                             "Restart it with CHAT_RATE_LIMITS=0, or pass --allow-rate-limits.")
+        for concurrency in args.steps:
+            step = await run_step(client, url, concurrency, args.question, args.server_pid)
+            steps.append(step)
+            print(json.dumps(step))
+            if step["peak_rss_mb"] > args.memory_budget_mb or step["error_rate"] > args.max_error_rate:
+                break
+            max_ok = concurrency
+    return {
+        "label": args.label,
+        "memory_budget_mb": args.memory_budget_mb,
+        "max_concurrency_within_budget": max_ok,
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--server-pid", type=int, required=True,
+                        help="pid of the server master; its children are included in the RSS")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--steps", type=int, nargs="+", default=[10, 25, 50, 100, 200, 400, 800])
+    parser.add_argument("--memory-budget-mb", type=float, default=1024)
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--question", default="What is the overdraft fee?")
+    parser.add_argument("--allow-rate-limits", action="store_true",
+                        help="run even though the server enforces chat rate limits")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print(json.dumps({k: v for k, v in report.items() if k != "steps"}, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
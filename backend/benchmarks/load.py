@@ -0,0 +1,277 @@
+"""End-to-end load benchmark for the banking and analytics services.
+
+Runs both Flask apps in this process against SQLite (DB_BACKEND=sqlite), with
+analytics reached through the in-process transport and Azure OpenAI replaced
+by the deterministic simulator (shared/llm_simulator.py), so it needs no
+network. Each scenario fires a number of
+requests at a fixed concurrency and records throughput, p50/p95/p99 latency,
+SQL statements per request and process RSS. Results are written as JSON so
+runs can be compared between commits:
+
+    cd backend
+    python -m benchmarks.load --concurrency 16 --requests 500 --transactions 50000 --output before.json
+    python -m benchmarks.load --concurrency 16 --requests 500 --transactions 50000 --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+SCENARIOS = ("accounts", "transactions", "chatbot", "log_trace", "sessions")
+# Users in Data_Ingest/schema.sql
+SEEDED_USERS = 6
+
+
+class QueryCounter:
+    """Counts SQL statements across every engine in the process."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def install(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        event.listen(Engine, "after_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.count += 1
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 2)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def configure_environment(args, workdir):
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ["BANKING_SQLITE_PATH"] = os.path.join(workdir, "banking.db")
+    os.environ["ANALYTICS_SQLITE_PATH"] = os.path.join(workdir, "analytics.db")
+    os.environ["ANALYTICS_TRANSPORT"] = "inprocess"
+    os.environ["BANKING_DB_POOL_SIZE"] = os.environ["ANALYTICS_DB_POOL_SIZE"] = str(args.concurrency)
+
+
+def load_apps(args):
+    # Imported after configure_environment so the apps pick up the offline settings
+    import agent_analytics
+    import banking_app
+    from shared.offline_db import is_offline
+    from shared.llm_simulator import SimulatedChatModel, SimulatedEmbeddings
+
+    if not is_offline():
+        sys.exit("DB_BACKEND is overridden by backend/.env; set DB_BACKEND=sqlite there to benchmark offline.")
+    # Measure the agent loop, not the admission budgets answering 429 (the concurrency gate stays on)
+    banking_app.admission.limiter.enabled = False
+    banking_app.use_ai_clients(
+        SimulatedChatModel(latency_median_ms=args.llm_latency_ms, latency_sigma=args.llm_latency_sigma, seed=args.seed),
+        SimulatedEmbeddings(),
+    )
+    with banking_app.app.app_context():
+        banking_app.initialize_database()
+    with agent_analytics.app.app_context():
+        agent_analytics.initialize_database()
+    return banking_app, agent_analytics
+
+
+def scale_data(banking_app, agent_analytics, args):
+    """Add synthetic transactions for user_1 and chat sessions so reads run at the requested scale."""
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    categories = ["Groceries", "Food", "Shopping", "Transportation", "Utilities", "Health", "Housing"]
+    with banking_app.app.app_context():
+        Account, Transaction = banking_app.Account, banking_app.Transaction
+        account_ids = [a.id for a in Account.query.filter_by(user_id="user_1").all()]
+        rows = [{
+            "id": f"txn_bench_{i}",
+            "from_account_id": rng.choice(account_ids),
+            "to_account_id": None,
+            "amount": round(rng.lognormvariate(3.5, 1.0), 2),
+            "type": "payment",
+            "description": f"Benchmark merchant {rng.randint(1, 500)}",
+            "category": rng.choice(categories),
+            "status": "completed",
+            "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+        } for i in range(args.transactions)]
+        for start in range(0, len(rows), 5000):
+            banking_app.db.session.execute(Transaction.__table__.insert(), rows[start:start + 5000])
+        banking_app.db.session.commit()
+
+    from chat_data_model import ChatSession
+    with agent_analytics.app.app_context():
+        agent_analytics.db.session.execute(ChatSession.__table__.insert(), [
+            {"session_id": f"session_bench_{i}", "user_id": "user_1", "title": f"Session {i}",
+             "created_at": now, "updated_at": now}
+            for i in range(args.sessions)
+        ])
+        agent_analytics.db.session.commit()
+
+
+CHAT_QUESTIONS = (
+    "What is the overdraft fee?",
+    "What are my account balances?",
+    "How much did I spend this month?",
+    "Show my accounts and my spending last 6 months",
+)
+
+
+def chat_user(i):
+    """Spread chats over the seeded users (user_1..user_6, all with accounts), like real traffic."""
+    return f"user_{i % SEEDED_USERS + 1}"
+
+
+def sample_trace(i):
+    """A serialized full ReAct trace in the shape banking_app sends to /api/chat/log-trace."""
+    from shared.llm_simulator import simulated_trace
+    from shared.utils import _serialize_messages
+    return _serialize_messages(simulated_trace(CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]))
+
+
+def build_requests(banking_app, agent_analytics):
+    banking = banking_app.app
+    analytics = agent_analytics.app
+    return {
+        "accounts": lambda i: banking.test_client().get("/api/accounts"),
+        "transactions": lambda i: banking.test_client().get("/api/transactions"),
+        "chatbot": lambda i: banking.test_client().post("/api/chatbot", json={
+            "messages": [{"role": "user", "content": CHAT_QUESTIONS[i % len(CHAT_QUESTIONS)]}],
+            "session_id": f"session_chat_{i}", "user_id": chat_user(i)}),
+        "log_trace": lambda i: analytics.test_client().post("/api/chat/log-trace", json={
+            "session_id": f"session_trace_{i}", "user_id": "user_1",
+            "messages": sample_trace(i), "trace_duration": 100}),
+        "sessions": lambda i: analytics.test_client().get("/api/chat/sessions"),
+    }
+
+
+def run_scenario(name, send, args, counter):
+    latencies = []
+    errors = 0
+    # A 429 is an overload answer, not a failure; reported apart so it cannot pass for a fast success
+    rejected = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors, rejected
+        start = time.perf_counter()
+        response = send(i)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if response.status_code == 429:
+                rejected += 1
+            elif response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    for i in range(args.warmup):
+        send(-i - 1)
+    queries_before = counter.count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "rejected": rejected,
+        "throughput_rps": round(args.requests / wall, 2),
+        "completed_rps": round(len(latencies) / wall, 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "queries_per_request": round((counter.count - queries_before) / args.requests, 2),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('commit')}):")
+    print(f"{'scenario':<14}{'metric':<22}{'before':>12}{'after':>12}{'change':>10}")
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        for metric in ("throughput_rps", "completed_rps", "rejected", "p50_ms", "p95_ms", "p99_ms", "queries_per_request", "rss_mb"):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{name:<14}{metric:<22}{old:>12}{new:>12}{change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=1000, help="extra transactions for user_1")
+    parser.add_argument("--sessions", type=int, default=100, help="pre-existing chat sessions")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="median simulated model latency per call")
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.35, help="log-normal sigma of the model latency")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="directory for the SQLite files (default: a temp dir)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to diff against")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="banking-bench-")
+    configure_environment(args, workdir)
+    counter = QueryCounter()
+    counter.install()
+    banking_app, agent_analytics = load_apps(args)
+    scale_data(banking_app, agent_analytics, args)
+    requests = build_requests(banking_app, agent_analytics)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios:
+        results["scenarios"][name] = run_scenario(name, requests[name], args, counter)
+        print(name, json.dumps(results["scenarios"][name]))
+    results["meta"]["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
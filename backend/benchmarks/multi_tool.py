@@ -0,0 +1,122 @@
+"""End-to-end latency of multi-tool agent traces, serial vs concurrent tool execution.
+
+Builds the banking agent offline (SQLite + the LLM simulator with parallel tool
+calls) and answers questions that need several read-only tools in one step,
+once with a single tool worker (the old behaviour: tools run one after another)
+and once with the shared ToolExecutor pool. Remote database and embedding
+round-trips are simulated with --db-latency-ms (per SQL statement) and
+--embed-latency-ms, since SQLite in a temp dir has none. Besides whole-trace
+latency it reports the tool step alone (tool_step_*), which is what the pool
+shortens; the model calls around it take the same time in both runs. The run
+fails if any question reaches a write tool.
+
+    cd backend
+    python -m benchmarks.multi_tool --traces 50 --workers 4 --db-latency-ms 5 --embed-latency-ms 40
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from benchmarks.load import configure_environment, percentile
+
+# Each needs three read-only tools; none of them may reach transfer_money or create_new_account
+QUESTIONS = (
+    "Show my accounts and my spending this year. What is the overdraft fee?",
+    "What are my account balances and my spending this month? What is the ATM fee policy?",
+    "List my accounts and my expenses in the last 6 months. How do I order a new card?",
+)
+
+
+def install_db_latency(latency_ms):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    def _sleep(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency_ms / 1000)
+
+    event.listen(Engine, "before_cursor_execute", _sleep)
+
+
+def run(banking_app, ai_client, workers, args):
+    from langchain_core.messages import HumanMessage
+    from shared.tool_executor import ToolExecutor
+
+    executor = ToolExecutor(banking_app.app, max_workers=workers, mutating=banking_app.MUTATING_TOOLS)
+    agent = banking_app.create_banking_agent(
+        ai_client, tools=[executor.wrap(tool) for tool in banking_app.BANKING_TOOLS])
+    latencies, tool_latencies = [], []
+    for i in range(args.warmup + args.traces):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        start = last = time.perf_counter()
+        tool_ms = 0.0
+        with banking_app.app.app_context():
+            # The tools node's update arrives when every tool call of the step has returned
+            for update in agent.stream({"messages": [HumanMessage(content=question)]}, stream_mode="updates"):
+                now = time.perf_counter()
+                if "tools" in update:
+                    tool_ms += (now - last) * 1000
+                last = now
+        if i >= args.warmup:
+            latencies.append((time.perf_counter() - start) * 1000)
+            tool_latencies.append(tool_ms)
+    snapshot = executor.snapshot()
+    if snapshot["calls"]["write"]:
+        raise SystemExit(f"{snapshot['calls']['write']} write tool calls: the questions must be read-only")
+    return {
+        "workers": workers,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        # Time spent in the tool step alone, without the model calls around it
+        "tool_step_p50_ms": percentile(tool_latencies, 50),
+        "tool_step_p95_ms": percentile(tool_latencies, 95),
+        "executor": snapshot,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--traces", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="read-tool workers for the concurrent run")
+    parser.add_argument("--llm-latency-ms", type=float, default=50, help="median simulated model latency per call")
+    parser.add_argument("--db-latency-ms", type=float, default=5, help="simulated round-trip per SQL statement")
+    parser.add_argument("--embed-latency-ms", type=float, default=40, help="simulated embedding call latency")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+    args.concurrency = args.workers + 2
+
+    configure_environment(args, tempfile.mkdtemp(prefix="banking-multitool-"))
+    import banking_app
+    from shared.llm_simulator import SimulatedChatModel, SimulatedEmbeddings
+
+    # Fixed model latency so both runs see the same model time
+    ai_client = SimulatedChatModel(latency_median_ms=args.llm_latency_ms, latency_sigma=0, seed=args.seed)
+    banking_app.use_ai_clients(ai_client, SimulatedEmbeddings(latency_ms=args.embed_latency_ms))
+    with banking_app.app.app_context():
+        banking_app.initialize_database()
+    if args.db_latency_ms:
+        install_db_latency(args.db_latency_ms)
+    # The tool cache would hide the tool latency after the first trace
+    banking_app.tool_cache.ttl = 0
+
+    serial = run(banking_app, ai_client, 1, args)
+    concurrent = run(banking_app, ai_client, args.workers, args)
+    results = {
+        "args": vars(args),
+        "serial": serial,
+        "concurrent": concurrent,
+        "p50_reduction": round(1 - concurrent["p50_ms"] / serial["p50_ms"], 3),
+        "p95_reduction": round(1 - concurrent["p95_ms"] / serial["p95_ms"], 3),
+        "tool_step_p50_reduction": round(1 - concurrent["tool_step_p50_ms"] / serial["tool_step_p50_ms"], 3),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
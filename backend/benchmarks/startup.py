@@ -0,0 +1,98 @@
+"""Startup-time budget for the banking service.
+
+Measures `import banking_app` with `-X importtime`, checks that the heavy AI
+modules stay unloaded, and times import + first request to /api/health in a
+fresh interpreter. Exits non-zero when a budget is exceeded, so it can gate CI.
+
+    cd backend
+    python -m benchmarks.startup --import-budget-ms 1500 --first-request-budget-ms 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the REST routes must not pull in at import time
+HEAVY_MODULES = ("langchain_openai", "langchain_sqlserver", "langgraph.prebuilt", "dateutil")
+
+FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import banking_app
+imported = time.perf_counter()
+response = banking_app.app.test_client().get("/api/health")
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (done - start) * 1000,
+    "status_code": response.status_code,
+    "heavy_modules_loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_python(args):
+    result = subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"python {' '.join(args)} failed with code {result.returncode}")
+    return result
+
+
+def parse_importtime(stderr):
+    """Return {module: cumulative_us} from `-X importtime` output."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        cumulative[name] = int(cumulative_us)
+    return cumulative
+
+
+def measure(top):
+    importtime = parse_importtime(run_python(["-X", "importtime", "-c", "import banking_app"]).stderr)
+    first_request = json.loads(run_python(["-c", FIRST_REQUEST_SCRIPT]).stdout.strip().splitlines()[-1])
+    top_level = {name: us for name, us in importtime.items() if "." not in name and name != "banking_app"}
+    return {
+        "import_cumulative_ms": importtime.get("banking_app", 0) / 1000,
+        "slowest_imports_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        **first_request,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--import-budget-ms", type=float, default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 1500)))
+    parser.add_argument("--first-request-budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", 2000)))
+    parser.add_argument("--top", type=int, default=10, help="number of slowest top-level imports to report")
+    args = parser.parse_args()
+
+    report = measure(args.top)
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report["import_cumulative_ms"] > args.import_budget_ms:
+        failures.append(f"import took {report['import_cumulative_ms']:.0f} ms (budget {args.import_budget_ms:.0f} ms)")
+    if report["first_request_ms"] > args.first_request_budget_ms:
+        failures.append(f"time to first request was {report['first_request_ms']:.0f} ms "
+                        f"(budget {args.first_request_budget_ms:.0f} ms)")
+    if report["heavy_modules_loaded"]:
+        failures.append(f"heavy modules imported eagerly: {', '.join(report['heavy_modules_loaded'])}")
+    if report["status_code"] != 200:
+        failures.append(f"/api/health returned {report['status_code']}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,11 @@ from datetime import datetime
 import json
 from flask import jsonify
 from shared.utils import _to_json_primitive
+from shared.singleflight import SingleFlight
 # Global variables that will be set by the main app
 db = None
+# Concurrent traces for one chat session share its existence check (and creation)
+session_flight = SingleFlight()
 ChatHistory = None
 ChatSession = None
 ToolUsage = None
@@ -106,7 +109,8 @@ def init_chat_db(database):
     
         finish_reason = db.Column(db.String(255))
         response_time_ms = db.Column(db.Integer)
-        trace_end = db.Column(db.DateTime, default=datetime.now())
+        # Callable default: stamped per row, so turns in a session can be ordered
+        trace_end = db.Column(db.DateTime, default=datetime.now)
 
         def to_dict(self):
             return to_dict_helper(self)
@@ -120,6 +124,9 @@ def init_chat_db(database):
 
         def _ensure_session_exists(self):
             """Ensure the chat session exists in the database"""
+            session_flight.do(("chat_session", self.session_id), self._create_session_if_missing)
+
+        def _create_session_if_missing(self):
             session = ChatSession.query.filter_by(session_id=self.session_id).first()
             if not session:
                 session = ChatSession(
@@ -131,11 +138,14 @@ def init_chat_db(database):
                 db.session.add(session)
                 db.session.commit()
         def add_trace_messages(self, serialized_messages: str, 
-                               trace_duration: int):
+                               trace_duration: int, trace_id: str = None):
             """Add all messages in a trace to the chat history"""
-            trace_id = str(uuid.uuid4())
+            if trace_id is None:
+                trace_id = str(uuid.uuid4())
+                print("New trace_id generated. Adding all messages for trace_id:", trace_id)
             message_list= _to_json_primitive(serialized_messages)
-            print("New trace_id generated. Adding all messages for trace_id:", trace_id)
+            # tool_call_id -> call details, so results match their call when a step has several
+            tool_calls = {}
             for msg in message_list:
                 if msg['type'] == 'human':
                     print("Adding human message to chat history")
@@ -145,10 +155,11 @@ def init_chat_db(database):
                     if msg["response_metadata"].get("finish_reason") != "tool_calls":
                         _ = self.add_ai_message(msg, trace_id, trace_duration)
                     elif msg["response_metadata"].get("finish_reason") == "tool_calls":
-                        tool_call_dict = self.add_tool_call_message(msg, trace_id)
+                        tool_calls.update(self.add_tool_call_message(msg, trace_id))
                 if msg['type'] == "tool":
                     print("Adding tool message to chat history")
                     tool_result_dict = self.add_tool_result_message(msg, trace_id)
+                    tool_call_dict = tool_calls.get(msg["tool_call_id"], {})
                     tool_call_dict.update(tool_result_dict)
                     _ = self.log_tool_usage(tool_call_dict, trace_id)
             res = "All trace messages added..."
@@ -193,36 +204,41 @@ def init_chat_db(database):
             return entry_message
 
         def add_tool_call_message(self, message: dict, trace_id: str):
-            """Log a tool call"""
+            """Log the tool calls of one AI message (one row per call)"""
             agent_id = db.session.query(AgentDefinition.agent_id).filter_by(name=message["name"]).scalar()
-            tool_name = message["additional_kwargs"].get('tool_calls')[0].get('function')["name"]
-            tool_id = db.session.query(ToolDefinition.tool_id).filter_by(name=tool_name).scalar()
-
-            entry_message = ChatHistory(
-                session_id=self.session_id,
-                user_id=self.user_id,
-                agent_id=agent_id,
-                trace_id=trace_id,
-                message_id = message["id"],
-                message_type='tool_call',
-                tool_id = tool_id,
-                tool_call_id=message["additional_kwargs"].get('tool_calls')[0].get('id'),
-                tool_name=tool_name,
-                total_tokens=message["response_metadata"].get("token_usage")['total_tokens'],
-                completion_tokens=message["response_metadata"].get("token_usage")['completion_tokens'],
-                prompt_tokens=message["response_metadata"].get("token_usage")['prompt_tokens'],
-                tool_input=message["additional_kwargs"].get('tool_calls')[0].get('function')["arguments"],
-                model_name=message["response_metadata"].get('model_name'),
-                content_filter_results=message["response_metadata"].get("prompt_filter_results")[0].get("content_filter_results"),
-                finish_reason=message["response_metadata"].get("finish_reason"),
-            )
-            db.session.add(entry_message)
+            token_usage = message["response_metadata"].get("token_usage")
+            calls = {}
+            for index, tool_call in enumerate(message["additional_kwargs"].get('tool_calls')):
+                tool_name = tool_call.get('function')["name"]
+                tool_id = db.session.query(ToolDefinition.tool_id).filter_by(name=tool_name).scalar()
+                # Token usage belongs to the model response, so it is recorded once, on the first call
+                first = index == 0
+                entry_message = ChatHistory(
+                    session_id=self.session_id,
+                    user_id=self.user_id,
+                    agent_id=agent_id,
+                    trace_id=trace_id,
+                    message_id = message["id"] if first else f"{message['id']}_{index}",
+                    message_type='tool_call',
+                    tool_id = tool_id,
+                    tool_call_id=tool_call.get('id'),
+                    tool_name=tool_name,
+                    total_tokens=token_usage['total_tokens'] if first else None,
+                    completion_tokens=token_usage['completion_tokens'] if first else None,
+                    prompt_tokens=token_usage['prompt_tokens'] if first else None,
+                    tool_input=tool_call.get('function')["arguments"],
+                    model_name=message["response_metadata"].get('model_name'),
+                    content_filter_results=message["response_metadata"].get("prompt_filter_results")[0].get("content_filter_results"),
+                    finish_reason=message["response_metadata"].get("finish_reason"),
+                )
+                db.session.add(entry_message)
+                calls[tool_call.get('id')] = {"tool_call_id": tool_call.get('id'),
+                                              "tool_id": tool_id, "tool_name": tool_name,
+                                              "tool_input": tool_call.get('function')["arguments"],
+                                              "total_tokens": token_usage['total_tokens'] if first else None}
             db.session.commit()
             print("Tool call message added to chat history:", message["id"])
-            return {"tool_call_id": message["additional_kwargs"].get('tool_calls')[0].get('id'),
-                    "tool_id": tool_id, "tool_name": tool_name,
-                    "tool_input": message["additional_kwargs"].get('tool_calls')[0].get('function')["arguments"],
-                    "total_tokens": message["response_metadata"].get("token_usage")['total_tokens']}
+            return calls
 
         def add_tool_result_message(self, message: dict, trace_id: str):
             """Log a tool result"""
@@ -419,7 +435,11 @@ def initialize_agent_definitions():
             "llm_config": {
                 "model": "gpt-4.1",
                 "rate_limit": 50,
-                "token_limit": 1000
+                "token_limit": 1000,
+                "request_token_estimate": 2000,
+                "tokens_per_minute": 50000,
+                "agent_rate_limit": 600,
+                "agent_tokens_per_minute": 240000
             },
             "prompt_template": "You are a banking assistant. Answer the user's questions about their bank accounts."
         }
@@ -431,5 +451,10 @@ def initialize_agent_definitions():
         if not existing_agent:
             agent_def = AgentDefinition(**agent)
             db.session.add(agent_def)
+        else:
+            # Add budget keys introduced since the row was created, keeping edited values
+            llm_config = {**agent["llm_config"], **(existing_agent.llm_config or {})}
+            if llm_config != existing_agent.llm_config:
+                existing_agent.llm_config = llm_config
 
     db.session.commit()
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Server-side conversation memory for the banking agent.
+
+Prior turns (question and final answer) for a session are loaded from the
+analytics service and fitted to the agent's `token_limit` (llm_config in
+agent_definitions). When the unsummarised turns no longer fit, the oldest are
+folded into a rolling summary by the chat model. The summary is cached per
+session and only ever extended with the turns that just rolled out of the
+window, so each compaction sends a bounded prompt no matter how long the
+session is.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_TOKEN_LIMIT = 1000
+# After a compaction the kept turns use at most this share of the history budget,
+# so the summary is extended every few turns rather than on every request
+COMPACT_TARGET = float(os.getenv("MEMORY_COMPACT_TARGET", "0.5"))
+# The summary may use at most this share of the token limit
+SUMMARY_SHARE = 0.25
+CACHE_SESSIONS = int(os.getenv("MEMORY_CACHE_SESSIONS", "1000"))
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a bank customer and a support agent.
+Update the summary with the new turns below. Keep facts that later questions may depend on
+(accounts, amounts, dates, decisions, open requests) and drop pleasantries.
+Reply with the updated summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}"""
+
+
+def count_tokens(text):
+    """Approximate token count (~4 characters per token); cheap enough to run on every request."""
+    return len(text or "") // 4 + 1
+
+
+class SummaryState:
+    def __init__(self, summary="", through=None):
+        self.summary = summary
+        # trace_end of the newest turn folded into the summary
+        self.through = through
+        self.tokens = count_tokens(summary) if summary else 0
+
+
+class ConversationMemory:
+    """Builds the context messages for a chat turn: rolling summary plus the newest turns that fit."""
+
+    def __init__(self, load_turns, get_chat_model, max_sessions=CACHE_SESSIONS):
+        # load_turns(session_id, since) -> {"turns": [...], "token_limit": int} or None
+        self.load_turns = load_turns
+        self.get_chat_model = get_chat_model
+        self.max_sessions = max_sessions
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.summaries = 0
+
+    def _state(self, session_id):
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is not None:
+                self._states.move_to_end(session_id)
+            return state or SummaryState()
+
+    def _store(self, session_id, state):
+        with self._lock:
+            self._states[session_id] = state
+            self._states.move_to_end(session_id)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+
+    def forget(self, session_id):
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def context_messages(self, session_id, user_message):
+        """Messages to put before the new user message (empty when there is no usable history)."""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        if not session_id:
+            return []
+        state = self._state(session_id)
+        loaded = self.load_turns(session_id, state.through)
+        if not loaded:
+            return []
+        turns = loaded.get("turns") or []
+        token_limit = loaded.get("token_limit") or DEFAULT_TOKEN_LIMIT
+
+        budget = token_limit - count_tokens(user_message) - state.tokens
+        sizes = [count_tokens(turn["human"]) + count_tokens(turn["ai"]) for turn in turns]
+        if sum(sizes) > budget:
+            keep = _newest_fitting(sizes, max(budget, 0) * COMPACT_TARGET)
+            evicted, turns = turns[:len(turns) - keep], turns[len(turns) - keep:]
+            state = self._extend_summary(state, evicted, token_limit)
+            self._store(session_id, state)
+
+        messages = []
+        if state.summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation: {state.summary}"))
+        for turn in turns:
+            messages.append(HumanMessage(content=turn["human"]))
+            messages.append(AIMessage(content=turn["ai"]))
+        return messages
+
+    def _extend_summary(self, state, evicted, token_limit):
+        if not evicted:
+            return state
+        max_tokens = int(token_limit * SUMMARY_SHARE)
+        transcript = "\n".join(f"Customer: {turn['human']}\nAgent: {turn['ai']}" for turn in evicted)
+        prompt = SUMMARY_PROMPT.format(max_words=max(max_tokens * 3 // 4, 20),
+                                       summary=state.summary or "(none)", turns=transcript)
+        try:
+            summary = self.get_chat_model().invoke(prompt).content.strip()
+        except Exception as e:
+            # Keep serving: the evicted turns are dropped rather than summarised
+            print(f"Conversation summary failed: {e}")
+            summary = state.summary
+        # Hard cap in case the model ignores the word limit
+        summary = summary[:max_tokens * 4]
+        self.summaries += 1
+        return SummaryState(summary, through=evicted[-1]["at"])
+
+    def snapshot(self):
+        with self._lock:
+            return {"cached_sessions": len(self._states), "summaries": self.summaries}
+
+
+def _newest_fitting(sizes, budget):
+    """How many of the newest turns fit in the budget."""
+    used = 0
+    for count, size in enumerate(reversed(sizes)):
+        used += size
+        if used > budget:
+            return count
+    return len(sizes)
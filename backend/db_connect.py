@@ -1,16 +1,13 @@
-import struct
 import pyodbc
 import os
-from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
+from shared.db_connect import azure_token_provider, SQL_COPT_SS_ACCESS_TOKEN
 load_dotenv(override=True)
 
 def create_azuresql_connection():
     """Create connection for banking database."""
-    credential = DefaultAzureCredential()
-    token = credential.get_token("https://database.windows.net/.default")
-    token_bytes = token.token.encode("utf-16-le")
-    token_struct = struct.pack(f"<I{len(token_bytes)}s", len(token_bytes), token_bytes)
+    # Share the process-wide cached credential/token with shared.db_connect
+    token_struct = azure_token_provider.token_struct()
     
     driver = os.getenv('DB_DRIVER', 'ODBC Driver 18 for SQL Server')
     server = os.getenv('DB_SERVER')
@@ -23,7 +20,7 @@ def create_azuresql_connection():
         "Encrypt=yes;"
         "TrustServerCertificate=no;"
     )
-    return pyodbc.connect(conn_str, attrs_before={1256: token_struct})
+    return pyodbc.connect(conn_str, attrs_before={SQL_COPT_SS_ACCESS_TOKEN: token_struct})
 
 def create_fabricsql_connection():
     """Create connection for fabric database."""
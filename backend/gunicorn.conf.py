@@ -0,0 +1,46 @@
+# Gunicorn settings used by `python launcher.py --production`.
+# The launcher passes bind/workers/threads on the command line and names the
+# service module in WSGI_MODULE so the hooks below can reach its app and db.
+import importlib
+import os
+
+from shared.db_pool import pool_setting, warm_pool
+
+# Import the app (and its heavy dependencies) once in the master before forking
+preload_app = True
+worker_class = "gthread"
+# Chat requests wait on Azure OpenAI, so allow long requests before a worker is killed
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+
+# Local transport listener bound in the master and shared by every worker
+_local_listener = None
+
+
+def _service():
+    return importlib.import_module(os.environ["WSGI_MODULE"])
+
+
+def when_ready(server):
+    """Create tables and import lazily-loaded dependencies once in the master before workers fork."""
+    service = _service()
+    if hasattr(service, "preload_ai_dependencies"):
+        service.preload_ai_dependencies()
+    with service.app.app_context():
+        service.initialize_database()
+    if hasattr(service, "open_local_transport"):
+        global _local_listener
+        _local_listener = service.open_local_transport()
+
+
+def post_fork(server, worker):
+    """Drop pooled connections inherited from the master and warm this worker's own pool."""
+    service = _service()
+    with service.app.app_context():
+        for engine in service.db.engines.values():
+            engine.dispose(close=False)
+        warm_pool(service.db.engine, pool_setting(os.environ["WSGI_SERVICE"], "POOL_WARM"))
+    if hasattr(service, "serve_local_transport"):
+        service.serve_local_transport(_local_listener)
@@ -0,0 +1,165 @@
+"""Deterministic fast path for chat questions that map straight onto one read-only tool.
+
+"What's my balance?" or "How much did I spend this month?" need no model: the
+router recognises them with keyword patterns, calls the tool directly and
+renders a templated answer. Confidence is the share of the question's content
+words that the intent's vocabulary explains, so anything with extra detail
+("... on my credit card since Tuesday", "... and what is the overdraft fee")
+falls below ROUTER_CONFIDENCE and goes to the agent instead, as does a question
+that matches more than one intent.
+"""
+import json
+import os
+import re
+import threading
+import time
+
+STOPWORDS = frozenset("""
+a all am an any are at can check could current currently did do does for from get give got have hello hey hi how
+i in is it know let like list me much my now of on please right s see show so tell that the there to up view
+want what whats which would you
+""".split())
+
+# Periods get_transactions_summary understands; anything else is left to the agent
+_PERIODS = (
+    (re.compile(r"\b(last|past) (6|six) months\b"), "last 6 months"),
+    (re.compile(r"\b(this year|year to date|ytd)\b"), "this year"),
+)
+_UNSUPPORTED_PERIOD = re.compile(
+    r"\b(last|past|previous) (month|week|year|\d+ (days|weeks|years))\b|\b(today|yesterday|week)\b|\b(19|20)\d\d\b")
+
+# Requests to move money or open accounts; these must reach the agent, never a reused answer
+_ACTION_REQUEST = re.compile(
+    r"\b(transfer|send|move|pay|deposit|withdraw)\b.*(\$\s?\d|\b\d+(\.\d+)?\b)"
+    r"|(\$\s?\d|\b\d+(\.\d+)?\b).*\b(transfer|send|move|pay|deposit|withdraw)\b"
+    r"|\b(open|create|start|add)\b.*\baccounts?\b")
+
+
+def is_action_request(question):
+    """True when the message asks for a write (a transfer with an amount, a new account)."""
+    return bool(_ACTION_REQUEST.search(question.lower()))
+
+
+def _money(amount):
+    return f"${amount:,.2f}"
+
+
+def _render_accounts(output):
+    if output.startswith("Error"):
+        return None
+    try:
+        accounts = json.loads(output)
+    except ValueError:
+        # "No accounts found for this user."
+        return output
+    lines = [f"- {acc['name']} ({acc['account_type']}): {_money(acc['balance'])}" for acc in accounts]
+    total = sum(acc["balance"] for acc in accounts)
+    return "Here are your accounts:\n" + "\n".join(lines) + f"\n\nTotal balance: {_money(total)}."
+
+
+def _render_spending(output):
+    result = json.loads(output)
+    if result.get("status") != "success":
+        return None
+    summary = result["summary"]
+    if isinstance(summary, str):
+        return summary
+    answer = f"You spent {_money(summary['total_spending'])} {summary['period']} across {summary['account_filter'].lower()}."
+    if summary["top_categories"]:
+        categories = ", ".join(f"{c['category']} ({_money(c['amount'])})" for c in summary["top_categories"])
+        answer += f" Top categories: {categories}."
+    return answer
+
+
+def _spending_args(question):
+    if _UNSUPPORTED_PERIOD.search(question):
+        return None
+    period = next((name for pattern, name in _PERIODS if pattern.search(question)), "this month")
+    return {"time_period": period}
+
+
+class Intent:
+    def __init__(self, name, tool, trigger, vocabulary, render, args=lambda question: {}):
+        self.name = name
+        self.tool = tool
+        self.trigger = re.compile(trigger)
+        self.vocabulary = frozenset(vocabulary.split())
+        self.render = render
+        # args(question) -> tool arguments, or None when the question needs something the tool cannot do
+        self.args = args
+
+
+INTENTS = (
+    Intent("account_balances", "get_user_accounts",
+           r"\b(balances?|accounts?)\b|\bhow much (money )?do i have\b",
+           "balance balances account accounts money funds total checking savings credit",
+           _render_accounts),
+    Intent("spending_summary", "get_transactions_summary",
+           r"\b(spen[dt]|spending|expenses?|summar(y|ise|ize))\b",
+           "spend spent spending expense expenses summary summarise summarize transactions total categories "
+           "category this month year last past 6 six months date ytd",
+           _render_spending, _spending_args),
+)
+
+
+class Route:
+    def __init__(self, intent, args, confidence):
+        self.intent = intent
+        self.args = args
+        self.confidence = confidence
+
+
+class IntentRouter:
+    """Classifies questions into INTENTS and answers confident matches by calling the tool directly."""
+
+    def __init__(self, intents=INTENTS, threshold=None):
+        self.intents = intents
+        self.threshold = threshold if threshold is not None else float(os.getenv("ROUTER_CONFIDENCE", "0.8"))
+        self._lock = threading.Lock()
+        self.routed = {intent.name: 0 for intent in intents}
+        self.fallbacks = 0
+        self.route_ms = 0.0
+
+    def classify(self, question):
+        """Best Route for the question, or None when it should go to the agent."""
+        text = question.lower().replace("'", "")
+        words = [word for word in re.findall(r"[a-z0-9]+", text) if word not in STOPWORDS]
+        matches = [intent for intent in self.intents if intent.trigger.search(text)]
+        if len(matches) != 1 or not words:
+            return None
+        intent = matches[0]
+        args = intent.args(text)
+        if args is None:
+            return None
+        confidence = sum(word in intent.vocabulary for word in words) / len(words)
+        return Route(intent, args, confidence) if confidence >= self.threshold else None
+
+    def answer(self, question, call_tool):
+        """(answer, [(tool, args, output)]) for a confident match, else None.
+
+        call_tool(tool_name, args) runs the tool and returns its output string.
+        """
+        started = time.perf_counter()
+        route = self.classify(question)
+        answer = None
+        if route is not None:
+            output = call_tool(route.intent.tool, route.args)
+            # A tool error is left to the agent, which can explain it
+            answer = route.intent.render(output)
+        with self._lock:
+            if answer is None:
+                self.fallbacks += 1
+                return None
+            self.routed[route.intent.name] += 1
+            self.route_ms += (time.perf_counter() - started) * 1000
+        return answer, [(route.intent.tool, route.args, output)]
+
+    def snapshot(self):
+        with self._lock:
+            routed = sum(self.routed.values())
+            return {
+                "threshold": self.threshold,
+                "routed": dict(self.routed),
+                "fallbacks": self.fallbacks,
+                "avg_route_ms": round(self.route_ms / routed, 2) if routed else 0.0,
+            }
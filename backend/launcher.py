@@ -1,6 +1,19 @@
+import argparse
+import os
+import signal
 import subprocess
 import time
 import sys
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# name, WSGI module, port, ASGI module (used with --asgi)
+SERVICES = (
+    ("analytics", "agent_analytics", 5002, None),
+    ("banking", "banking_app", 5001, "banking_asgi"),
+)
+# Each open dashboard update stream holds a banking worker thread
+DEFAULT_THREADS = {"banking": 16}
 
 def run_services():
     """Launch both services"""
@@ -29,5 +42,222 @@ def run_services():
         analytics_process.terminate()
         banking_process.terminate()
 
+
+# Health probes run here so a slow /api/health never stalls the supervision loop
+_probes = ThreadPoolExecutor(len(SERVICES), thread_name_prefix="health-probe")
+
+
+def is_healthy(port, timeout=2):
+    """Probe the service's /api/health endpoint."""
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+class SupervisedService:
+    """A gunicorn master for one service, restarted with backoff when it dies or stops answering.
+
+    check() never blocks: a restart terminates the process and records when to
+    kill it if it lingers and when to start it again, and health probes run on a
+    background thread. One slow or crashing service therefore does not hold up
+    supervision of the other.
+    """
+
+    def __init__(self, name, module, port, host, workers, threads, asgi_module=None,
+                 probe_timeout=10, probe_failures=3, startup_grace=60):
+        self.name = name
+        self.asgi_module = asgi_module
+        self.module = module
+        self.port = port
+        self.host = host
+        self.workers = workers
+        self.threads = threads
+        self.process = None
+        self.backoff = 1
+        self.started_at = 0
+        self.failed_probes = 0
+        # A busy worker can take a while to answer; only a service that keeps failing is restarted
+        self.probe_timeout = probe_timeout
+        self.probe_failures = probe_failures
+        self.startup_grace = startup_grace
+        self._probe = None
+        # Set while restarting: start again at restart_at, kill the old process if still alive at kill_at
+        self.restart_at = None
+        self.kill_at = None
+
+    def command(self):
+        if self.asgi_module:
+            # Async serving: one event loop per worker instead of a thread per request
+            return [
+                sys.executable, "-m", "uvicorn", f"{self.asgi_module}:app",
+                "--host", self.host,
+                "--port", str(self.port),
+                "--workers", str(self.workers),
+            ]
+        return [
+            sys.executable, "-m", "gunicorn",
+            "--config", "gunicorn.conf.py",
+            "--bind", f"{self.host}:{self.port}",
+            "--workers", str(self.workers),
+            "--threads", str(self.threads),
+            "--name", self.name,
+            f"{self.module}:app",
+        ]
+
+    def start(self):
+        # WSGI_WORKERS lets per-process limits (shared/admission.py) split their budgets;
+        # WSGI_THREADS caps the update streams that each hold a thread under gunicorn
+        env = dict(os.environ, WSGI_MODULE=self.module, WSGI_SERVICE=self.name, WSGI_WORKERS=str(self.workers),
+                   WSGI_THREADS=str(self.threads))
+        self.process = subprocess.Popen(self.command(), env=env)
+        self.started_at = time.monotonic()
+        self.failed_probes = 0
+        self._probe = None
+        self.restart_at = None
+        server = "uvicorn" if self.asgi_module else "gunicorn"
+        print(f"[{self.name}] {server} started (pid {self.process.pid}, {self.workers} workers x {self.threads} threads)")
+
+    def wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return False
+            if is_healthy(self.port):
+                print(f"[{self.name}] ready on http://{self.host}:{self.port}/")
+                return True
+            time.sleep(0.5)
+        return False
+
+    def restart(self, reason):
+        now = time.monotonic()
+        print(f"[{self.name}] {reason}; restarting in {self.backoff}s")
+        if self.process.poll() is None:
+            self.process.terminate()
+        self.restart_at = now + self.backoff
+        self.kill_at = now + 30
+        # Reset the backoff once a run has stayed up for a minute
+        self.backoff = 1 if now - self.started_at > 60 else min(self.backoff * 2, 30)
+
+    def _continue_restart(self, now):
+        if self.process.poll() is None:
+            if now >= self.kill_at:
+                print(f"[{self.name}] did not stop within 30s; killing it")
+                self.process.kill()
+            return
+        if now >= self.restart_at:
+            self.start()
+
+    def _probe_result(self, probe):
+        """None until a background probe finishes; a new probe is started when `probe` is set."""
+        if self._probe is not None and self._probe.done():
+            healthy, self._probe = self._probe.result(), None
+            return healthy
+        if probe and self._probe is None:
+            self._probe = _probes.submit(is_healthy, self.port, self.probe_timeout)
+        return None
+
+    def check(self, probe):
+        now = time.monotonic()
+        if self.restart_at is not None:
+            self._continue_restart(now)
+            return
+        if self.process.poll() is not None:
+            self.restart(f"exited with code {self.process.returncode}")
+            return
+        healthy = self._probe_result(probe)
+        if healthy:
+            self.failed_probes = 0
+        elif healthy is False and now - self.started_at > self.startup_grace:
+            self.failed_probes += 1
+            if self.failed_probes >= self.probe_failures:
+                self.restart(f"failed {self.failed_probes} health checks ({self.probe_timeout:g}s timeout)")
+
+    def signal(self, signum):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signum)
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_production(args):
+    """Run each service under gunicorn and supervise it until Ctrl+C."""
+    if os.name == "nt":
+        sys.exit("Production mode needs gunicorn, which does not run on Windows.")
+    cpus = os.cpu_count() or 1
+    services = [
+        SupervisedService(
+            name, module, port, args.host,
+            workers=args.workers or int(os.getenv(f"{name.upper()}_WORKERS", cpus)),
+            threads=args.threads or int(os.getenv(f"{name.upper()}_THREADS", DEFAULT_THREADS.get(name, 4))),
+            asgi_module=asgi_module if args.asgi else None,
+            probe_timeout=args.probe_timeout,
+            probe_failures=args.probe_failures,
+            startup_grace=args.ready_timeout,
+        )
+        for name, module, port, asgi_module in SERVICES
+    ]
+
+    # SIGHUP asks each gunicorn master to gracefully replace its workers
+    signal.signal(signal.SIGHUP, lambda signum, frame: [s.signal(signal.SIGHUP) for s in services])
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    try:
+        for service in services:
+            service.start()
+            # Banking calls analytics, so bring them up in order
+            if not service.wait_ready(args.ready_timeout):
+                print(f"[{service.name}] not ready after {args.ready_timeout}s, continuing")
+
+        print("\nBoth services are running! Send SIGHUP to reload workers, Ctrl+C to stop.")
+        last_probe = time.monotonic()
+        while True:
+            time.sleep(1)
+            probe = time.monotonic() - last_probe >= args.probe_interval
+            if probe:
+                last_probe = time.monotonic()
+            for service in services:
+                service.check(probe)
+
+    except KeyboardInterrupt:
+        print("\nShutting down services...")
+        for service in reversed(services):
+            service.stop()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Launch the banking and analytics services")
+    parser.add_argument("--production", action="store_true",
+                        help="serve each service with multi-worker gunicorn instead of the Flask dev server")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--workers", type=int, default=None,
+                        help="workers per service (default: <SERVICE>_WORKERS or the CPU count)")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="threads per worker (default: <SERVICE>_THREADS, else 16 for banking and 4 for analytics)")
+    parser.add_argument("--asgi", action="store_true",
+                        help="with --production, serve the banking chatbot with uvicorn/asyncio")
+    parser.add_argument("--ready-timeout", type=float, default=60)
+    parser.add_argument("--probe-interval", type=float, default=10)
+    parser.add_argument("--probe-timeout", type=float, default=10,
+                        help="seconds a health check may take before it counts as failed")
+    parser.add_argument("--probe-failures", type=int, default=3,
+                        help="consecutive failed health checks before a service is restarted")
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    run_services()
\ No newline at end of file
+    args = parse_args()
+    if args.production:
+        run_production(args)
+    else:
+        run_services()
@@ -0,0 +1,338 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+# Used when an agent's llm_config has no value (or the analytics service is unreachable)
+DEFAULT_LIMITS = {
+    "rate_limit": 50,                  # requests per minute per user
+    "token_limit": 1000,               # conversation memory window per request (conversation_memory.py)
+    # Charged up front for one ReAct turn, which makes several model calls over that window
+    "request_token_estimate": 2000,
+    "tokens_per_minute": 50000,        # per user
+    "agent_rate_limit": 600,           # requests per minute across all users
+    "agent_tokens_per_minute": 240000, # across all users
+}
+
+
+class Rejected(Exception):
+    """A request was refused admission; the caller should answer 429 with Retry-After."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst_seconds, minimum=1.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute * burst_seconds / 60.0, minimum)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` is available (0 when it is available now)."""
+        self._refill(now)
+        # A request larger than the bucket is let through whenever the bucket is full
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount):
+        # May go negative when actual usage exceeds the estimate; later requests then wait
+        self.level -= amount
+
+
+class RateLimiter:
+    """Token buckets (requests and LLM tokens) per user and per agent.
+
+    Budgets are per minute and come from the agent's llm_config. Buckets are per
+    process, so the budgets are split across the WSGI_WORKERS processes the
+    launcher starts. The user buckets are kept in an LRU map; a user that falls
+    out of it starts again with a full bucket.
+    """
+
+    def __init__(self, burst_seconds=None, max_users=None, processes=None, enabled=None):
+        # CHAT_RATE_LIMITS=0 admits everything (e.g. for load tests); the concurrency gate still applies
+        self.enabled = enabled if enabled is not None else os.getenv("CHAT_RATE_LIMITS", "1").lower() not in ("0", "false", "no")
+        self.burst_seconds = burst_seconds or float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10"))
+        self.max_users = max_users or int(os.getenv("RATE_LIMIT_MAX_USERS", "10000"))
+        self.processes = max(processes or int(os.getenv("WSGI_WORKERS", "1")), 1)
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+        self._agents = {}
+        self.rejected = {"user_requests": 0, "user_tokens": 0, "agent_requests": 0, "agent_tokens": 0}
+
+    def _buckets(self, table, key, requests_per_minute, tokens_per_minute, request_tokens):
+        buckets = table.get(key)
+        limits = (requests_per_minute, tokens_per_minute)
+        if buckets is None or buckets[0] != limits:
+            # New key, or the agent's llm_config changed
+            buckets = table[key] = (limits,
+                                    TokenBucket(requests_per_minute / self.processes, self.burst_seconds),
+                                    TokenBucket(tokens_per_minute / self.processes, self.burst_seconds,
+                                                minimum=request_tokens))
+        return buckets
+
+    def admit(self, user, agent, limits, estimated_tokens):
+        """Charge one request and its estimated tokens, or raise Rejected."""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            user_buckets = self._buckets(self._users, (agent, user), limits["rate_limit"],
+                                         limits["tokens_per_minute"], limits["request_token_estimate"])
+            self._users.move_to_end((agent, user))
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            agent_buckets = self._buckets(self._agents, agent, limits["agent_rate_limit"],
+                                          limits["agent_tokens_per_minute"], limits["request_token_estimate"])
+            checks = (
+                ("user_requests", user_buckets[1], 1),
+                ("user_tokens", user_buckets[2], estimated_tokens),
+                ("agent_requests", agent_buckets[1], 1),
+                ("agent_tokens", agent_buckets[2], estimated_tokens),
+            )
+            for reason, bucket, amount in checks:
+                wait = bucket.wait_time(amount, now)
+                if wait > 0:
+                    self.rejected[reason] += 1
+                    raise Rejected(f"{reason.replace('_', ' ')} rate limit exceeded", wait)
+            for _, bucket, amount in checks:
+                bucket.take(amount)
+
+    def settle(self, user, agent, tokens):
+        """Charge (or refund, if negative) the difference between actual and estimated tokens."""
+        with self._lock:
+            for buckets in (self._users.get((agent, user)), self._agents.get(agent)):
+                if buckets is not None:
+                    buckets[2].take(tokens)
+
+    def refund(self, user, agent, tokens):
+        """Give back a request that was admitted here but turned away later (e.g. by the gate)."""
+        with self._lock:
+            for buckets in (self._users.get((agent, user)), self._agents.get(agent)):
+                if buckets is not None:
+                    buckets[1].take(-1)
+                    buckets[2].take(-tokens)
+
+    def snapshot(self):
+        with self._lock:
+            return {"enabled": self.enabled, "users": len(self._users), "processes": self.processes,
+                    "rejected": dict(self.rejected)}
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(self, event=None, loop=None, future=None):
+        self.granted = False
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyGate:
+    """At most `limit` requests in flight; up to `max_queue` more wait (FIFO) for `timeout` seconds.
+
+    Works for threads (acquire) and coroutines (aacquire) alike: a released slot is
+    handed straight to the oldest waiter. Anything beyond the queue is rejected
+    immediately, so a spike turns into fast 429s instead of requests timing out.
+    """
+
+    def __init__(self, limit=None, max_queue=None, timeout=None):
+        self.limit = limit or int(os.getenv("CHAT_MAX_CONCURRENT", "32"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("CHAT_MAX_QUEUE", "64"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._active = 0
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._hold_s = 1.0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    def _try_enter(self, waiter):
+        """Take a free slot (True), join the queue (None) or reject (raises)."""
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                self.admitted += 1
+                return True
+            if len(self._waiters) >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise Rejected("server busy", self._retry_after())
+            self._waiters.append(waiter)
+            self.queued += 1
+            return None
+
+    def _leave_queue(self, waiter):
+        """After a wait: True if the slot was handed over, otherwise leave the queue."""
+        with self._lock:
+            if waiter.granted:
+                self.admitted += 1
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def _retry_after(self):
+        # Time for the requests ahead (in flight and queued) to drain
+        return self._hold_s * (len(self._waiters) + 1) / self.limit
+
+    def _timed_out(self):
+        with self._lock:
+            self.rejected["queue_timeout"] += 1
+            return Rejected("server busy", self._retry_after())
+
+    def acquire(self):
+        waiter = _Waiter(event=threading.Event())
+        if self._try_enter(waiter):
+            return
+        waiter.event.wait(self.timeout)
+        if not self._leave_queue(waiter):
+            raise self._timed_out()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop=loop, future=loop.create_future())
+        if self._try_enter(waiter):
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Client went away: give back a slot that was already handed to us
+            if self._leave_queue(waiter):
+                self.release()
+            raise
+        if not self._leave_queue(waiter):
+            raise self._timed_out()
+
+    def release(self, held_s=None):
+        with self._lock:
+            if held_s is not None:
+                self._hold_s = 0.9 * self._hold_s + 0.1 * held_s
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+            else:
+                self._active -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "waiting": len(self._waiters),
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected": dict(self.rejected),
+                "avg_hold_s": round(self._hold_s, 3),
+            }
+
+
+class AdmissionController:
+    """Rate limits and the concurrency gate in front of the chat agent.
+
+    `load_config(agent_name)` returns the agent's llm_config (or None); it is cached
+    for AGENT_CONFIG_TTL seconds, and the last known config (else DEFAULT_LIMITS)
+    is used while it cannot be loaded.
+    """
+
+    def __init__(self, load_config, limiter=None, gate=None, config_ttl=None):
+        self.load_config = load_config
+        self.limiter = limiter or RateLimiter()
+        self.gate = gate or ConcurrencyGate()
+        self.config_ttl = config_ttl if config_ttl is not None else float(os.getenv("AGENT_CONFIG_TTL", "60"))
+        self._configs = {}
+        self._config_lock = threading.Lock()
+
+    def limits(self, agent):
+        now = time.monotonic()
+        cached = self._configs.get(agent)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        with self._config_lock:
+            cached = self._configs.get(agent)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+            config = self.load_config(agent)
+            if config is None:
+                limits = cached[1] if cached is not None else dict(DEFAULT_LIMITS)
+            else:
+                limits = {key: config.get(key) or default for key, default in DEFAULT_LIMITS.items()}
+            self._configs[agent] = (now + self.config_ttl, limits)
+            return limits
+
+    def _check(self, user, agent):
+        limits = self.limits(agent)
+        # Charge the turn's estimate up front; settle() corrects it from the trace
+        estimated = limits["request_token_estimate"]
+        self.limiter.admit(user, agent, limits, estimated)
+        return estimated
+
+    @contextmanager
+    def admit(self, user, agent):
+        """Hold an admission for one chat request; yields a function to report the tokens it used."""
+        estimated = self._check(user, agent)
+        try:
+            self.gate.acquire()
+        except Rejected:
+            self.limiter.refund(user, agent, estimated)
+            raise
+        started = time.monotonic()
+        try:
+            yield lambda used: self.limiter.settle(user, agent, used - estimated)
+        finally:
+            self.gate.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aadmit(self, user, agent):
+        """Async counterpart of admit() for the ASGI chatbot."""
+        estimated = await asyncio.to_thread(self._check, user, agent)
+        try:
+            await self.gate.aacquire()
+        except BaseException:
+            # Turned away (or cancelled) while queued
+            self.limiter.refund(user, agent, estimated)
+            raise
+        started = time.monotonic()
+        try:
+            yield lambda used: self.limiter.settle(user, agent, used - estimated)
+        finally:
+            self.gate.release(time.monotonic() - started)
+
+    def snapshot(self):
+        return {"rate_limits": self.limiter.snapshot(), "concurrency": self.gate.snapshot()}
+
+
+def tokens_used(messages):
+    """Total LLM tokens of a trace, from the AI messages' token_usage metadata."""
+    total = 0
+    for message in messages:
+        usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+        total += usage.get("total_tokens") or 0
+    return total
@@ -0,0 +1,223 @@
+"""Transports the banking service uses to reach the analytics service.
+
+- HttpTransport: JSON over HTTP to the analytics Flask app (the default).
+  AsyncHttpTransport is the same for the asyncio chatbot path.
+- InProcessTransport: calls the analytics handlers directly when both services
+  share one process, skipping serialization and the network stack.
+- UnixSocketTransport: length-prefixed JSON over a local Unix domain socket,
+  served by the analytics process(es) on the same host.
+"""
+import json
+import os
+import select
+import socket
+import struct
+import threading
+import requests
+
+_HEADER = struct.Struct(">I")
+# Used by both services when ANALYTICS_TRANSPORT=unix and ANALYTICS_SOCKET_PATH is unset
+DEFAULT_SOCKET_PATH = "/tmp/banking-analytics.sock"
+
+
+def _send_frame(sock, payload):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("socket closed mid-frame")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_frame(sock):
+    header = sock.recv(_HEADER.size, socket.MSG_WAITALL)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        header += _recv_exact(sock, _HEADER.size - len(header))
+    (size,) = _HEADER.unpack(header)
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+def _closed_by_peer(sock):
+    """True when an idle pooled socket was closed by the other end (e.g. analytics restarted)."""
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        # An idle connection has nothing to read unless it hit EOF (or stray data, which is just as unusable)
+        return bool(readable)
+    except (OSError, ValueError):
+        return True
+
+
+class HttpTransport:
+    """POST/GET JSON to the analytics service over HTTP."""
+
+    def __init__(self, base_url, timeout=5):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def call(self, endpoint, method='POST', data=None, headers=None):
+        url = f"{self.base_url}/api/{endpoint}"
+        if method == 'POST':
+            response = requests.post(url, json=data, timeout=self.timeout, headers=headers)
+        else:
+            response = requests.get(url, timeout=self.timeout, headers=headers)
+        return response.json() if response.status_code < 400 else None
+
+
+class AsyncHttpTransport:
+    """HttpTransport for asyncio callers, sharing one httpx.AsyncClient connection pool."""
+
+    def __init__(self, base_url, timeout=5):
+        import httpx
+        self._client = httpx.AsyncClient(base_url=f"{base_url}/api/", timeout=timeout)
+
+    async def acall(self, endpoint, method='POST', data=None, headers=None):
+        if method == 'POST':
+            response = await self._client.post(endpoint, json=data, headers=headers)
+        else:
+            response = await self._client.get(endpoint, headers=headers)
+        return response.json() if response.status_code < 400 else None
+
+
+class InProcessTransport:
+    """Invoke the analytics dispatch function directly in this process."""
+
+    def __init__(self, dispatch):
+        self.dispatch = dispatch
+
+    def call(self, endpoint, method='POST', data=None, headers=None):
+        return self.dispatch(endpoint, method, data, headers or {})
+
+
+class UnixSocketTransport:
+    """Send requests over a Unix domain socket, keeping one connection per thread."""
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        """(sock, reused): this thread's connection, opening a new one if there is none or it went stale."""
+        sock = getattr(self._local, "sock", None)
+        if sock is not None and _closed_by_peer(sock):
+            self._reset()
+            sock = None
+        if sock is not None:
+            return sock, True
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.sock = sock
+        return sock, False
+
+    def _reset(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _send(self, request):
+        """Send one request frame and return the socket it went out on.
+
+        Only a reused connection that fails while sending is retried, once, on a
+        fresh one: the server never acts on an incomplete frame.
+        """
+        sock, reused = self._connection()
+        try:
+            _send_frame(sock, request)
+            return sock
+        except OSError:
+            self._reset()
+            if not reused:
+                raise
+        sock, _ = self._connection()
+        try:
+            _send_frame(sock, request)
+        except OSError:
+            self._reset()
+            raise
+        return sock
+
+    def call(self, endpoint, method='POST', data=None, headers=None):
+        request = {"endpoint": endpoint, "method": method, "data": data, "headers": headers or {}}
+        sock = self._send(request)
+        try:
+            reply = _recv_frame(sock)
+        except (OSError, ConnectionError, ValueError):
+            # The request may already have been handled (e.g. a slow chat/log-trace), so it is
+            # never sent again; the connection is dropped so a late reply cannot be misread
+            self._reset()
+            raise
+        if reply is None:
+            self._reset()
+            raise ConnectionError("analytics socket closed the connection")
+        return reply.get("result")
+
+
+def unix_socket_path():
+    """The socket path banking connects to and analytics binds, or None when no socket is configured."""
+    path = os.getenv("ANALYTICS_SOCKET_PATH")
+    if os.getenv("ANALYTICS_TRANSPORT", "http").lower() != "unix":
+        return path or None
+    if path is None:
+        return DEFAULT_SOCKET_PATH
+    if not path.strip():
+        raise RuntimeError("ANALYTICS_TRANSPORT=unix but ANALYTICS_SOCKET_PATH is empty; "
+                           f"set it, or remove it to use {DEFAULT_SOCKET_PATH}")
+    return path
+
+
+def bind_unix_socket(path):
+    """Create the listening socket (before forking workers, so they can all accept on it)."""
+    if os.path.exists(path):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(128)
+    return listener
+
+
+def serve_unix_socket(listener, dispatch):
+    """Accept connections on a daemon thread and answer each request with dispatch()."""
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    request = _recv_frame(conn)
+                except (OSError, ConnectionError, ValueError):
+                    return
+                if request is None:
+                    return
+                result = dispatch(request["endpoint"], request.get("method", 'POST'),
+                                  request.get("data"), request.get("headers") or {})
+                try:
+                    _send_frame(conn, {"result": result})
+                except OSError:
+                    # The client gave up waiting (timeout) and closed its end
+                    return
+
+    def accept_loop():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    thread = threading.Thread(target=accept_loop, name="analytics-socket", daemon=True)
+    thread.start()
+    return thread
@@ -1,17 +1,103 @@
 import struct
-import pyodbc
+import threading
+import time
 import os
-from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
+SQL_TOKEN_SCOPE = "https://database.windows.net/.default"
+SQL_COPT_SS_ACCESS_TOKEN = 1256
+
+
+def _connect(conn_str, **kwargs):
+    # Imported on first connect so the offline SQLite backend works without an ODBC driver
+    import pyodbc
+    return pyodbc.connect(conn_str, **kwargs)
+
+
+class AzureTokenProvider:
+    """Keeps one DefaultAzureCredential and caches its packed access token.
+
+    The token is refreshed on a background timer `refresh_margin` seconds before
+    it expires (halfway through its lifetime if it is issued for less than that,
+    but never sooner than `min_refresh_delay`), so pool refills and pre-ping
+    reconnects normally just read the cached struct. A failed refresh is retried
+    with exponential backoff. Callers only block on Azure AD when the cached token is within
+    `min_validity` seconds of expiry (e.g. the background refresh failed).
+    """
+
+    def __init__(self, scope=SQL_TOKEN_SCOPE, refresh_margin=300, min_validity=60,
+                 min_refresh_delay=30, max_retry_delay=300):
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.min_validity = min_validity
+        self.min_refresh_delay = min_refresh_delay
+        self.max_retry_delay = max_retry_delay
+        self._retry_delay = min_refresh_delay
+        self._credential = None
+        # (token_struct, expires_on) swapped as one tuple so readers never see a torn pair
+        self._cached = (None, 0)
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def _fetch(self):
+        """Request a new token and repack it. Must be called with the lock held."""
+        if self._credential is None:
+            from azure.identity import DefaultAzureCredential
+            self._credential = DefaultAzureCredential()
+        token = self._credential.get_token(self.scope)
+        token_bytes = token.token.encode("utf-16-le")
+        token_struct = struct.pack(f"<I{len(token_bytes)}s", len(token_bytes), token_bytes)
+        self._cached = (token_struct, token.expires_on)
+        self._retry_delay = self.min_refresh_delay
+        lifetime = token.expires_on - time.time()
+        delay = lifetime - self.refresh_margin
+        if delay < self.min_refresh_delay:
+            # A token shorter-lived than refresh_margin must not be re-requested immediately, over and over
+            delay = max(lifetime / 2, self.min_refresh_delay)
+        self._schedule_refresh(delay)
+        return token_struct
+
+    def _schedule_refresh(self, delay):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._fetch()
+        except Exception as e:
+            with self._lock:
+                delay = self._retry_delay
+                self._retry_delay = min(delay * 2, self.max_retry_delay)
+                if self._cached[1] - time.time() - delay > self.min_validity:
+                    print(f"Azure AD token refresh failed, retrying in {delay}s: {e}")
+                    self._schedule_refresh(delay)
+                else:
+                    print(f"Azure AD token refresh failed, the next connection will fetch a new token: {e}")
+
+    def token_struct(self):
+        """Return the packed token for SQL_COPT_SS_ACCESS_TOKEN, refreshing only if needed."""
+        token_struct, expires_on = self._cached
+        if token_struct is not None and expires_on - time.time() > self.min_validity:
+            return token_struct
+        with self._lock:
+            token_struct, expires_on = self._cached
+            if token_struct is not None and expires_on - time.time() > self.min_validity:
+                return token_struct
+            return self._fetch()
+
+
+azure_token_provider = AzureTokenProvider()
+
+
 def create_azuresql_connection():
     """Create connection for banking database."""
-    credential = DefaultAzureCredential()
-    token = credential.get_token("https://database.windows.net/.default")
-    token_bytes = token.token.encode("utf-16-le")
-    token_struct = struct.pack(f"<I{len(token_bytes)}s", len(token_bytes), token_bytes)
-    
+    token_struct = azure_token_provider.token_struct()
+
     driver = os.getenv('DB_DRIVER', 'ODBC Driver 18 for SQL Server')
     server = os.getenv('DB_SERVER')
     database = os.getenv('DB_DATABASE')
@@ -23,14 +109,29 @@ def create_azuresql_connection():
         "Encrypt=yes;"
         "TrustServerCertificate=no;"
     )
-    return pyodbc.connect(conn_str, attrs_before={1256: token_struct})
+    return _connect(conn_str, attrs_before={SQL_COPT_SS_ACCESS_TOKEN: token_struct})
 
 def fabricsql_connection_bank_db():
     """Create connection for fabric database."""
     fabric_conn_str = os.getenv("FABRIC_SQL_CONNECTION_URL_BANK_DATA")
-    return pyodbc.connect(fabric_conn_str)
+    return _connect(fabric_conn_str)
 
 def fabricsql_connection_agentic_db():
     """Create connection for fabric database."""
     fabric_conn_str = os.getenv("FABRIC_SQL_CONNECTION_URL")
-    return pyodbc.connect(fabric_conn_str)
\ No newline at end of file
+    return _connect(fabric_conn_str)
+
+def _read_only_conn_str(primary_env, replica_env):
+    """Use the dedicated replica URL if set, otherwise ask the primary's listener for a readable secondary."""
+    replica_conn_str = os.getenv(replica_env)
+    if replica_conn_str:
+        return replica_conn_str
+    return f"{os.getenv(primary_env, '').rstrip(';')};ApplicationIntent=ReadOnly"
+
+def fabricsql_connection_bank_db_readonly():
+    """Create read-only connection for fabric database."""
+    return _connect(_read_only_conn_str("FABRIC_SQL_CONNECTION_URL_BANK_DATA", "FABRIC_SQL_CONNECTION_URL_BANK_DATA_READONLY"))
+
+def fabricsql_connection_agentic_db_readonly():
+    """Create read-only connection for fabric database."""
+    return _connect(_read_only_conn_str("FABRIC_SQL_CONNECTION_URL", "FABRIC_SQL_CONNECTION_URL_READONLY"))
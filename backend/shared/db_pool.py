@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from shared.offline_db import is_offline, sqlite_engine_options, sqlite_uri
+
+# Upper bounds (ms) of the checkout latency histogram buckets; the last bucket is open-ended
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+POOL_DEFAULTS = {
+    "POOL_SIZE": 5,
+    "MAX_OVERFLOW": 10,
+    "POOL_RECYCLE": 3600,
+    "POOL_TIMEOUT": 30,
+    "POOL_WARM": 0,
+}
+
+# Name of the component currently borrowing from the pool (e.g. "vector_store")
+_current_component = ContextVar("pool_component", default=None)
+
+
+@contextmanager
+def pool_component(name):
+    """Attribute pool checkouts made inside this block to the given component."""
+    token = _current_component.set(name)
+    try:
+        yield
+    finally:
+        _current_component.reset(token)
+
+
+def pool_setting(service, name):
+    """Read a pool setting from <SERVICE>_DB_<NAME>, then DB_<NAME>, then the default."""
+    value = os.getenv(f"{service.upper()}_DB_{name}") or os.getenv(f"DB_{name}")
+    return int(value) if value else POOL_DEFAULTS[name]
+
+
+def database_uri(service):
+    """SQLALCHEMY_DATABASE_URI for the service's configured backend (DB_BACKEND)."""
+    return sqlite_uri(service) if is_offline() else "mssql+pyodbc://"
+
+
+def engine_options(service, creator):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for a service with env-driven pool sizing."""
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_setting(service, "POOL_SIZE"),
+        'max_overflow': pool_setting(service, "MAX_OVERFLOW"),
+        'pool_timeout': pool_setting(service, "POOL_TIMEOUT"),
+        'pool_pre_ping': True,
+        'pool_recycle': pool_setting(service, "POOL_RECYCLE"),
+        'pool_reset_on_return': 'rollback'
+    }
+    if is_offline():
+        return sqlite_engine_options(service, options)
+    return {'creator': creator, **options}
+
+
+def warm_pool(engine, count):
+    """Open `count` physical connections up front so first requests skip the connect cost."""
+    if not isinstance(engine.pool, QueuePool):
+        return 0
+    # Overflow connections are closed on checkin, so only the core pool can be warmed
+    count = min(count, engine.pool.size())
+    if count <= 0:
+        return 0
+    connections = []
+    start = time.perf_counter()
+    try:
+        with pool_component("warmup"):
+            for _ in range(count):
+                connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    print(f"Warmed {len(connections)} pooled connections in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return len(connections)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times checkouts (including waits for a free slot) and counts timeouts."""
+
+    metrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics is not None:
+            self.metrics.record_checkout_latency((time.perf_counter() - start) * 1000)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class PoolMetrics:
+    """Checkout latency, gauges and per-component counters for one engine's connection pool."""
+
+    def __init__(self, default_component):
+        self.default_component = default_component
+        self.engine = None
+        self._lock = threading.Lock()
+        self._components = {}
+        self._latency_buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+        self._latency_count = 0
+        self._latency_total_ms = 0.0
+        self._latency_max_ms = 0.0
+        self._timeouts = 0
+        self._connects = 0
+        self._invalidations = 0
+
+    def attach(self, engine):
+        """Register pool event listeners on the engine."""
+        self.engine = engine
+        engine.pool.metrics = self
+        event.listen(engine.pool, "connect", self._on_connect)
+        event.listen(engine.pool, "invalidate", self._on_invalidate)
+        event.listen(engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.pool, "checkin", self._on_checkin)
+
+    def record_checkout_latency(self, elapsed_ms):
+        with self._lock:
+            self._latency_buckets[bisect_left(CHECKOUT_BUCKETS_MS, elapsed_ms)] += 1
+            self._latency_count += 1
+            self._latency_total_ms += elapsed_ms
+            self._latency_max_ms = max(self._latency_max_ms, elapsed_ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self._timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self._connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self._invalidations += 1
+
+    def _stats(self, component):
+        stats = self._components.get(component)
+        if stats is None:
+            stats = {"held": 0, "checkouts": 0}
+            self._components[component] = stats
+        return stats
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        component = _current_component.get() or self.default_component
+        connection_record.info["component"] = component
+        with self._lock:
+            stats = self._stats(component)
+            stats["held"] += 1
+            stats["checkouts"] += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        component = connection_record.info.pop("component", None)
+        if component is None:
+            return
+        with self._lock:
+            self._stats(component)["held"] -= 1
+
+    def snapshot(self):
+        """Return a JSON-safe view of the pool and who currently holds connections."""
+        with self._lock:
+            components = {name: dict(stats) for name, stats in self._components.items()}
+            buckets = list(self._latency_buckets)
+            latency = {
+                "count": self._latency_count,
+                "avg_ms": round(self._latency_total_ms / self._latency_count, 2) if self._latency_count else 0.0,
+                "max_ms": round(self._latency_max_ms, 2),
+            }
+            counters = {
+                "timeouts": self._timeouts,
+                "connects": self._connects,
+                "invalidations": self._invalidations,
+            }
+        labels = [f"le_{bound}ms" for bound in CHECKOUT_BUCKETS_MS] + ["inf"]
+        latency["histogram"] = dict(zip(labels, buckets))
+
+        gauges = None
+        if self.engine is not None and isinstance(self.engine.pool, QueuePool):
+            pool = self.engine.pool
+            gauges = {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        return {
+            "status": self.engine.pool.status() if self.engine is not None else None,
+            "gauges": gauges,
+            "checkout_latency": latency,
+            "counters": counters,
+            "components": components,
+        }
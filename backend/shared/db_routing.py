@@ -0,0 +1,148 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from shared.offline_db import is_offline
+
+REPLICA_BIND_KEY = "replica"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+# Header clients send to force a read-after-write request onto the primary
+CONSISTENCY_HEADER = "X-Read-Consistency"
+# The last-write marker (epoch seconds) travels with the client, so whichever worker serves
+# its next read sees it: browsers on the same site return the cookie, other clients echo the header
+LAST_WRITE_COOKIE = "db_last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def read_replica_enabled():
+    if is_offline():
+        return False
+    return os.getenv("DB_READ_REPLICA", "0").lower() in ("1", "true", "yes")
+
+
+def replica_binds(engine_options):
+    """SQLALCHEMY_BINDS entry for the read replica, or {} when routing is disabled."""
+    if not read_replica_enabled():
+        return {}
+    return {REPLICA_BIND_KEY: {"url": "mssql+pyodbc://", **engine_options}}
+
+
+class WriteTracker:
+    """Time of the last write made on behalf of one request, from any thread it fans out to."""
+
+    def __init__(self):
+        self.last_write = None
+
+    def mark(self):
+        self.last_write = time.time()
+
+
+# Set per request; contextvars.copy_context() carries it into tool executor threads
+_write_tracker = contextvars.ContextVar("db_write_tracker", default=None)
+
+
+@contextmanager
+def track_writes():
+    """Record the writes committed while the block runs (e.g. for a request served outside Flask)."""
+    tracker = WriteTracker()
+    token = _write_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _write_tracker.reset(token)
+
+
+def max_staleness():
+    return float(os.getenv("DB_REPLICA_MAX_STALENESS", "5"))
+
+
+def last_write_headers(tracker):
+    """Response headers handing the client its last-write marker, or [] if the request wrote nothing."""
+    if tracker is None or tracker.last_write is None or not read_replica_enabled():
+        return []
+    marker = f"{tracker.last_write:.3f}"
+    cookie = f"{LAST_WRITE_COOKIE}={marker}; Max-Age={int(max_staleness()) + 1}; Path=/; HttpOnly; SameSite=Lax"
+    return [(LAST_WRITE_HEADER, marker), ("Set-Cookie", cookie)]
+
+
+def recently_wrote(marker):
+    """True when a client's last-write marker is within DB_REPLICA_MAX_STALENESS seconds."""
+    try:
+        return time.time() - float(marker) < max_staleness()
+    except (TypeError, ValueError):
+        return False
+
+
+class RoutingSession(Session):
+    """Session that sends reads made on read-only requests to the replica bind.
+
+    Anything flushed through the session (and every query after it in the same
+    session) stays on the primary, as does every request that is not a GET/HEAD.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica():
+            replica = self._db.engines.get(REPLICA_BIND_KEY)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        if self._flushing or self.info.get("wrote"):
+            return False
+        return has_request_context() and g.get("db_read_replica", False)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session):
+    if not session.info.pop("wrote", False):
+        return
+    # The caller's next reads must see the write, even when a tool thread made it
+    tracker = _write_tracker.get()
+    if tracker is not None:
+        tracker.mark()
+    # And so must the rest of this request
+    if has_request_context():
+        g.db_read_replica = False
+
+
+def use_primary():
+    """Keep the rest of this request's reads on the primary (e.g. for data that must not lag)."""
+    if has_request_context():
+        g.db_read_replica = False
+
+
+def install_read_routing(app):
+    """Route GET/HEAD requests to the replica unless this client recently wrote or asked for consistency."""
+    if not read_replica_enabled():
+        return
+
+    @app.before_request
+    def _choose_read_target():
+        g.db_write_tracker = WriteTracker()
+        _write_tracker.set(g.db_write_tracker)
+        marker = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+        g.db_read_replica = (
+            request.method in READ_METHODS
+            and request.headers.get(CONSISTENCY_HEADER, "").lower() != "strong"
+            and not recently_wrote(marker)
+        )
+
+    @app.after_request
+    def _send_last_write(response):
+        for name, value in last_write_headers(g.get("db_write_tracker")):
+            response.headers.add(name, value)
+        return response
+
+    @app.teardown_request
+    def _stop_tracking(exc):
+        # Worker threads are reused for other requests
+        _write_tracker.set(None)
@@ -0,0 +1,214 @@
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from shared.singleflight import SingleFlight
+
+_CLAIM_KEY = "idempotency_claim"
+_COMMITTED_KEY = "idempotency_committed"
+_FLUSHED_KEY = "idempotency_flushed"
+# Stored when the process died between the ledger commit and saving the response
+ALREADY_PROCESSED = json.dumps({"status": "success", "message": "This request was already processed."})
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyStore:
+    """Idempotency-Key support for operations that write the ledger.
+
+    The key record is inserted by a before_commit hook, so it lands in the same
+    transaction as the write it guards: either both commit or neither does, and a
+    concurrent duplicate in another process fails on the primary key instead of
+    posting twice. The operation's response is saved right after. Completed
+    responses are also kept in an in-memory LRU index, and in-process duplicates
+    that arrive while the first call runs share its result. Keys expire after
+    IDEMPOTENCY_TTL_HOURS. Operations that commit nothing (validation errors) leave
+    no record, so they can be retried with the same key.
+    """
+
+    def __init__(self, model, get_session, ttl_hours=None, max_memory=None):
+        self.model = model
+        self.get_session = get_session
+        self.ttl = timedelta(hours=ttl_hours or float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+        self.max_memory = max_memory or int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()
+        self._flight = SingleFlight()
+        self._turn = contextvars.ContextVar("idempotency_turn", default=None)
+        self._last_prune = 0.0
+        self.stats = {"executed": 0, "replayed": 0, "conflicts": 0}
+
+    def attach(self, session_class):
+        event.listen(session_class, "after_flush", self._after_flush)
+        event.listen(session_class, "before_commit", self._before_commit)
+        event.listen(session_class, "after_commit", self._after_commit)
+        event.listen(session_class, "after_rollback", self._after_rollback)
+
+    def _after_flush(self, session, flush_context):
+        if session.info.get(_CLAIM_KEY) is not None:
+            session.info[_FLUSHED_KEY] = True
+
+    def _before_commit(self, session):
+        claim = session.info.get(_CLAIM_KEY)
+        wrote = session.info.pop(_FLUSHED_KEY, False) or session.new or session.dirty or session.deleted
+        if claim is not None and wrote:
+            record_id, operation, request_hash = claim
+            session.add(self.model(id=record_id, operation=operation, request_hash=request_hash))
+            session.info[_CLAIM_KEY] = None
+            session.info[_COMMITTED_KEY] = record_id
+
+    def _after_commit(self, session):
+        if session.info.get(_COMMITTED_KEY):
+            session.info[_COMMITTED_KEY] = True
+
+    def _after_rollback(self, session):
+        session.info.pop(_FLUSHED_KEY, None)
+
+    def execute(self, user_id, operation, key, request_data, func):
+        """Run func() once per (user, operation, key); returns (result, replayed).
+
+        Raises IdempotencyConflict if the key was used with different request data.
+        """
+        record_id = _digest(user_id, operation, key)
+        request_hash = _digest(json.dumps(request_data, sort_keys=True, default=str))
+        return self._flight.do(("idempotency", record_id),
+                               lambda: self._execute(record_id, operation, request_hash, func))
+
+    def _execute(self, record_id, operation, request_hash, func):
+        stored = self._stored(record_id)
+        if stored is not None:
+            return self._replay(stored, request_hash), True
+        session = self.get_session()
+        session.info[_CLAIM_KEY] = (record_id, operation, request_hash)
+        session.info[_COMMITTED_KEY] = None
+        try:
+            result = func()
+        finally:
+            session.info.pop(_CLAIM_KEY, None)
+            session.info.pop(_FLUSHED_KEY, None)
+            committed = session.info.pop(_COMMITTED_KEY, None)
+        if committed is True:
+            self.stats["executed"] += 1
+            self._save_response(session, record_id, request_hash, result)
+            return result, False
+        if committed:
+            # Our commit failed: another process may have won the race for this key
+            stored = self._wait_for_response(record_id)
+            if stored is not None:
+                return self._replay(stored, request_hash), True
+        return result, False
+
+    def _replay(self, stored, request_hash):
+        if stored[0] != request_hash:
+            self.stats["conflicts"] += 1
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request.")
+        self.stats["replayed"] += 1
+        return stored[1] or ALREADY_PROCESSED
+
+    def _save_response(self, session, record_id, request_hash, result):
+        try:
+            session.query(self.model).filter_by(id=record_id).update({"response": result})
+            session.commit()
+        except Exception as e:
+            # The write itself committed; a replay then answers ALREADY_PROCESSED
+            session.rollback()
+            print(f"Saving idempotent response failed: {e}")
+        self._remember(record_id, request_hash, result)
+        self._prune(session)
+
+    def _stored(self, record_id):
+        """(request_hash, response) of a live record, from memory or the table."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._recent.get(record_id)
+            if entry is not None and entry[0] > now:
+                self._recent.move_to_end(record_id)
+                return entry[1], entry[2]
+        record = self.get_session().get(self.model, record_id)
+        if record is None or record.created_at < datetime.utcnow() - self.ttl:
+            return None
+        if record.response is not None:
+            age = (datetime.utcnow() - record.created_at).total_seconds()
+            self._remember(record_id, record.request_hash, record.response, self.ttl.total_seconds() - age)
+        return record.request_hash, record.response
+
+    def _wait_for_response(self, record_id, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            self.get_session().rollback()
+            stored = self._stored(record_id)
+            if stored is None or stored[1] is not None or time.monotonic() > deadline:
+                return stored
+            time.sleep(0.1)
+
+    def _remember(self, record_id, request_hash, response, ttl_s=None):
+        expires = time.monotonic() + (ttl_s if ttl_s is not None else self.ttl.total_seconds())
+        with self._lock:
+            self._recent[record_id] = (expires, request_hash, response)
+            self._recent.move_to_end(record_id)
+            while len(self._recent) > self.max_memory:
+                self._recent.popitem(last=False)
+
+    def _prune(self, session):
+        if time.monotonic() - self._last_prune < 3600:
+            return
+        self._last_prune = time.monotonic()
+        try:
+            session.query(self.model).filter(self.model.created_at < datetime.utcnow() - self.ttl).delete(
+                synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"Pruning idempotency keys failed: {e}")
+
+    @contextmanager
+    def turn(self, scope):
+        """Give agent tool calls made inside this block keys derived from `scope` (e.g. session + turn)."""
+        token = self._turn.set(scope)
+        try:
+            yield
+        finally:
+            self._turn.reset(token)
+
+    def agent_tool(self, operation):
+        """Decorator: inside turn(), repeated identical calls of a mutating tool run once."""
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                scope = self._turn.get()
+                if scope is None:
+                    return func(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                key = _digest(scope, json.dumps(arguments, sort_keys=True, default=str))
+                try:
+                    result, _ = self.execute(arguments.get("user_id"), operation, key, arguments,
+                                             lambda: func(*args, **kwargs))
+                except IdempotencyConflict as e:
+                    return json.dumps({"status": "error", "message": str(e)})
+                return result
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        with self._lock:
+            return {"recent_keys": len(self._recent), **self.stats}
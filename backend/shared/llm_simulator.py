@@ -0,0 +1,247 @@
+"""Deterministic stand-ins for AzureChatOpenAI and AzureOpenAIEmbeddings.
+
+SimulatedChatModel plays scripted ReAct turns for the five banking tools: for a
+user question it emits the tool call(s) the real agent would make, and once
+tool results are in it emits a final answer. Every AIMessage carries
+OpenAI-shaped response_metadata (token_usage, prompt_filter_results,
+finish_reason, model_name) and tool calls in additional_kwargs, so the
+analytics ingestion path sees realistic payloads. Response latency is drawn
+from a seeded log-normal distribution.
+
+SimulatedEmbeddings produces feature-hashed, L2-normalised vectors: the same
+text always maps to the same vector, and texts sharing words are close.
+
+Enable with LLM_BACKEND=simulator (see simulated_clients_from_env).
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+SIMULATED_MODEL_NAME = "gpt-4.1-2025-04-14"
+
+SAFE_FILTER_RESULTS = {
+    "hate": {"filtered": False, "severity": "safe"},
+    "jailbreak": {"filtered": False, "detected": False},
+    "self_harm": {"filtered": False, "severity": "safe"},
+    "sexual": {"filtered": False, "severity": "safe"},
+    "violence": {"filtered": False, "severity": "safe"},
+}
+
+SCRIPTED_TOOLS = ("get_user_accounts", "get_transactions_summary", "search_support_documents",
+                  "create_new_account", "transfer_money")
+
+_AMOUNT = re.compile(r"\$?\s*(\d+(?:,\d{3})*(?:\.\d{1,2})?)")
+_MONEY = r"(?:\$\s*|\b)\d+(?:,\d{3})*(?:\.\d{1,2})?\b"
+_TRANSFER_REQUEST = re.compile(
+    rf"\b(?:transfer|send|move)\b.*?(?P<amount>{_MONEY})|(?P<amount_first>{_MONEY}).*\b(?:transfer|send|move)\b")
+_TIME_PERIODS = ("last 6 months", "this year", "this month")
+
+
+def _stable_hash(*parts):
+    return int.from_bytes(hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).digest()[:8], "big")
+
+
+def estimate_tokens(text):
+    """Rough OpenAI token count (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def _text_of(message):
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def script_tool_calls(question):
+    """Map a user question to the (tool_name, args) calls the banking agent would make, in order."""
+    q = question.lower()
+    calls = []
+    # Only a transfer with an amount is a request to move money ("the wire transfer policy" is not)
+    transfer = _TRANSFER_REQUEST.search(q)
+    if transfer:
+        amount = _AMOUNT.search(transfer.group("amount") or transfer.group("amount_first"))
+        calls.append(("transfer_money", {
+            "from_account_name": "Primary Checking",
+            "to_account_name": "High-Yield Savings",
+            "amount": float(amount.group(1).replace(",", "")),
+        }))
+    if re.search(r"\b(open|create)\b.*\baccount\b", q):
+        account_type = next((t for t in ("savings", "credit", "checking") if t in q), "checking")
+        calls.append(("create_new_account", {"account_type": account_type, "name": f"New {account_type.title()}"}))
+    if re.search(r"\b(spen[dt]|spending|summary|expenses?)\b", q):
+        period = next((p for p in _TIME_PERIODS if p in q), "this month")
+        calls.append(("get_transactions_summary", {"time_period": period}))
+    # "account" also appears in transfer/open requests; only list accounts for plain lookups
+    mutating = any(name in ("transfer_money", "create_new_account") for name, _ in calls)
+    if not mutating and re.search(r"\b(balances?|accounts?)\b", q):
+        calls.append(("get_user_accounts", {}))
+    if not calls or re.search(r"\b(fee|policy|how do i|what is|faq|support)\b", q):
+        if not any(name == "search_support_documents" for name, _ in calls):
+            calls.append(("search_support_documents", {"user_question": question}))
+    return calls
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Scripted ReAct chat model with OpenAI-shaped metadata and log-normal latency."""
+
+    latency_median_ms: float = 800.0
+    latency_sigma: float = 0.35
+    seed: int = 0
+    model_name: str = SIMULATED_MODEL_NAME
+    # Set by bind_tools; without bound tools the model only answers in text (e.g. summarisation calls)
+    tool_names: Optional[List[str]] = None
+    # Emit every scripted tool call in one step (True) or one call per step (False)
+    parallel_tool_calls: bool = True
+
+    @property
+    def _llm_type(self):
+        return "simulated-azure-openai"
+
+    def bind_tools(self, tools, **kwargs):
+        names = [getattr(tool, "name", None) or getattr(tool, "__name__", str(tool)) for tool in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _latency_s(self, prompt):
+        rng = random.Random(_stable_hash(self.seed, prompt))
+        return self.latency_median_ms * math.exp(self.latency_sigma * rng.gauss(0, 1)) / 1000
+
+    def _metadata(self, prompt_text, completion_text, finish_reason):
+        prompt_tokens = estimate_tokens(prompt_text)
+        completion_tokens = estimate_tokens(completion_text)
+        return {
+            "token_usage": {
+                "completion_tokens": completion_tokens,
+                "prompt_tokens": prompt_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            "model_name": self.model_name,
+            "system_fingerprint": "fp_simulated",
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "prompt_filter_results": [{"prompt_index": 0, "content_filter_results": SAFE_FILTER_RESULTS}],
+            "finish_reason": finish_reason,
+            "logprobs": None,
+            "content_filter_results": SAFE_FILTER_RESULTS,
+        }
+
+    def _next_message(self, messages):
+        prompt_text = "\n".join(_text_of(m) for m in messages)
+        question = next((_text_of(m) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        # Tool calls already made since the question, and their results
+        since_question = []
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            since_question.append(message)
+        since_question.reverse()
+        made = {call["name"] for m in since_question if isinstance(m, AIMessage) for call in m.tool_calls}
+
+        pending = [(name, args) for name, args in script_tool_calls(question)
+                   if name not in made and name in (self.tool_names or ())]
+        if pending:
+            if not self.parallel_tool_calls:
+                pending = pending[:1]
+            tool_calls = [{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+                          for name, args in pending]
+            completion = json.dumps([[name, args] for name, args in pending])
+            return prompt_text, AIMessage(
+                content="",
+                tool_calls=tool_calls,
+                additional_kwargs={"tool_calls": [
+                    {"id": call["id"], "type": "function",
+                     "function": {"name": call["name"], "arguments": json.dumps(call["args"])}}
+                    for call in tool_calls
+                ]},
+                response_metadata=self._metadata(prompt_text, completion, "tool_calls"),
+                id=f"run-{uuid.uuid4()}",
+            )
+
+        results = [_text_of(m) for m in since_question if isinstance(m, ToolMessage)]
+        if results:
+            answer = "Here is what I found: " + " ".join(results)
+        elif self.tool_names is None:
+            # Plain completion (no tools bound): a bounded condensation of the request
+            answer = " ".join(question.split()[:60])
+        else:
+            answer = "I'm sorry, I couldn't find an answer to that question."
+        return prompt_text, AIMessage(
+            content=answer,
+            response_metadata=self._metadata(prompt_text, answer, "stop"),
+            id=f"run-{uuid.uuid4()}",
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt_text, message = self._next_message(messages)
+        time.sleep(self._latency_s(prompt_text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt_text, message = self._next_message(messages)
+        await asyncio.sleep(self._latency_s(prompt_text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class SimulatedEmbeddings(Embeddings):
+    """Deterministic feature-hashed embeddings (ada-002 sized by default)."""
+
+    def __init__(self, dimensions=1536, latency_ms=0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            h = _stable_hash("embed", token)
+            vector[h % self.dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def embed_documents(self, texts):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def simulated_clients_from_env():
+    """Build (chat_model, embeddings) from the LLM_SIM_* environment variables."""
+    chat = SimulatedChatModel(
+        latency_median_ms=float(os.getenv("LLM_SIM_LATENCY_MEDIAN_MS", "800")),
+        latency_sigma=float(os.getenv("LLM_SIM_LATENCY_SIGMA", "0.35")),
+        seed=int(os.getenv("LLM_SIM_SEED", "0")),
+    )
+    embeddings = SimulatedEmbeddings(latency_ms=float(os.getenv("LLM_SIM_EMBEDDING_LATENCY_MS", "0")))
+    return chat, embeddings
+
+
+def simulated_trace(question, agent_name="banking_agent_v1", tool_output="{\"status\": \"success\"}"):
+    """Messages for one full ReAct turn (human, tool call, tool result, answer) without running an agent.
+
+    One tool call per step, matching what the analytics ingestion path expects.
+    """
+    model = SimulatedChatModel(latency_median_ms=0, latency_sigma=0, parallel_tool_calls=False,
+                               tool_names=list(SCRIPTED_TOOLS))
+    messages = [HumanMessage(content=question, id=str(uuid.uuid4()))]
+    while True:
+        _, reply = model._next_message(messages)
+        reply.name = agent_name
+        messages.append(reply)
+        if not reply.tool_calls:
+            return messages
+        for call in reply.tool_calls:
+            messages.append(ToolMessage(content=tool_output, tool_call_id=call["id"], name=call["name"],
+                                        id=str(uuid.uuid4()), status="success"))
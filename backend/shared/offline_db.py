@@ -0,0 +1,156 @@
+"""SQLite stand-in for the Fabric/Azure SQL databases.
+
+Set DB_BACKEND=sqlite to run both services without ODBC, Azure AD or network
+access. Each service gets its own database: <SERVICE>_SQLITE_PATH, a file path
+or ":memory:" (the default). Tables come from the SQLAlchemy models via
+create_all; the banking database is seeded from Data_Ingest/schema.sql.
+"""
+import math
+import os
+import re
+from datetime import datetime, timezone
+from sqlalchemy import event, text
+from sqlalchemy.dialects.mssql import DATETIMEOFFSET, NTEXT, UNIQUEIDENTIFIER
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+
+SEED_SQL_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "Data_Ingest", "schema.sql")
+# Tables whose created_at values are DATETIMEOFFSET literals in the seed script
+SEEDED_TIMESTAMPS = (("users", "created_at"), ("accounts", "created_at"), ("transactions", "created_at"))
+
+
+def db_backend():
+    return os.getenv("DB_BACKEND", "fabric").lower()
+
+
+def is_offline():
+    return db_backend() == "sqlite"
+
+
+def sqlite_path(service):
+    return os.getenv(f"{service.upper()}_SQLITE_PATH", ":memory:")
+
+
+def sqlite_uri(service):
+    path = sqlite_path(service)
+    if path == ":memory:":
+        return "sqlite://"
+    # Flask-SQLAlchemy resolves relative sqlite paths against the instance folder; pin them to the cwd instead
+    return f"sqlite:///{os.path.abspath(path)}"
+
+
+def sqlite_engine_options(service, pool_options):
+    """Engine options for SQLite: one shared connection in memory, a WAL-mode pool for files."""
+    connect_args = {"check_same_thread": False, "timeout": 30}
+    if sqlite_path(service) == ":memory:":
+        # Every connection to :memory: is a new empty database, so share a single one
+        return {"poolclass": StaticPool, "connect_args": connect_args}
+    return {**pool_options, "connect_args": connect_args}
+
+
+# SQL Server types that may appear in reflected or hand-written table definitions
+@compiles(DATETIMEOFFSET, "sqlite")
+def _compile_datetimeoffset(element, compiler, **kw):
+    return "DATETIME"
+
+
+@compiles(NTEXT, "sqlite")
+@compiles(UNIQUEIDENTIFIER, "sqlite")
+def _compile_as_text(element, compiler, **kw):
+    return "TEXT"
+
+
+def from_datetimeoffset(value):
+    """Convert a DATETIMEOFFSET literal ('2025-06-24T02:44:13.180Z', '...+02:00') to naive UTC
+    in the format SQLAlchemy's SQLite DateTime type reads back."""
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    dbapi_connection.create_function("from_datetimeoffset", 1, from_datetimeoffset, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def configure_sqlite_engine(engine):
+    """Register SQLite pragmas and helper functions on every new connection."""
+    event.listen(engine, "connect", _on_sqlite_connect)
+
+
+def seed_statements(path=SEED_SQL_PATH):
+    """Yield the INSERT statements from a T-SQL seed script (DDL is left to create_all)."""
+    with open(path, encoding="utf-8") as f:
+        script = re.sub(r"--[^\n]*", "", f.read())
+    for statement in script.split(";"):
+        statement = statement.strip()
+        if statement.upper().startswith("INSERT INTO"):
+            yield statement
+
+
+def seed_banking_data(db, path=SEED_SQL_PATH):
+    """Load the sample users/accounts/transactions into an empty offline banking database."""
+    with db.engine.begin() as conn:
+        if conn.execute(text("SELECT COUNT(*) FROM users")).scalar():
+            return False
+        for statement in seed_statements(path):
+            conn.execute(text(statement))
+        for table, column in SEEDED_TIMESTAMPS:
+            conn.execute(text(f"UPDATE {table} SET {column} = from_datetimeoffset({column})"))
+    print("[Offline DB] Seeded sample banking data")
+    return True
+
+
+class LocalVectorStore:
+    """In-memory cosine-similarity store standing in for SQLServer_VectorStore.
+
+    Documents are read from LOCAL_VECTOR_DOCS (a text file with chunks separated
+    by blank lines) and embedded once with the configured embeddings client.
+    """
+
+    def __init__(self, embedding_function, texts=()):
+        self.embedding_function = embedding_function
+        self._texts = []
+        self._vectors = []
+        self.add_texts(texts)
+
+    @classmethod
+    def from_env(cls, embedding_function):
+        texts = []
+        path = os.getenv("LOCAL_VECTOR_DOCS")
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                texts = [chunk.strip() for chunk in f.read().split("\n\n") if chunk.strip()]
+        return cls(embedding_function, texts)
+
+    def add_texts(self, texts):
+        texts = list(texts)
+        if texts:
+            self._vectors.extend(self.embedding_function.embed_documents(texts))
+            self._texts.extend(texts)
+
+    def similarity_search_with_score(self, query, k=4):
+        """Return [(Document, cosine_distance)] sorted nearest first, like SQLServer_VectorStore."""
+        from langchain_core.documents import Document
+
+        query_vector = self.embedding_function.embed_query(query)
+        scored = sorted(
+            ((self._cosine_distance(query_vector, vector), text) for vector, text in zip(self._vectors, self._texts)),
+            key=lambda item: item[0],
+        )
+        return [(Document(page_content=text), distance) for distance, text in scored[:k]]
+
+    @staticmethod
+    def _cosine_distance(a, b):
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return 1.0 - dot / norm if norm else 1.0
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+_PENDING_KEY = "outbox_pending"
+
+
+class OutboxDispatcher:
+    """Transactional outbox: change events are rows written in the same transaction as the change.
+
+    record() adds an event row to the caller's session, so it commits or rolls back
+    with the ledger change itself. A background thread per process tails the table
+    in batches (woken right after a local commit, otherwise every
+    OUTBOX_POLL_INTERVAL seconds, which picks up other workers' writes) and hands
+    each batch to the subscribers. Ids are assigned at insert but transactions can
+    commit out of order, so an id skipped by a batch is remembered as a gap and
+    re-checked until it shows up or OUTBOX_GAP_TIMEOUT passes (rolled back).
+    `safe_id` is the highest id below every open gap; readers of the change feed
+    never go past it, so they cannot skip a late commit either.
+    """
+
+    def __init__(self, app, model, batch_size=None, poll_interval=None, gap_timeout=None, retention_hours=None):
+        self.app = app
+        self.model = model
+        self.batch_size = batch_size or int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+        self.poll_interval = poll_interval or float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+        self.gap_timeout = gap_timeout or float(os.getenv("OUTBOX_GAP_TIMEOUT", "10"))
+        self.retention = timedelta(hours=retention_hours or float(os.getenv("OUTBOX_RETENTION_HOURS", "24")))
+        self._subscribers = []
+        self._wake = threading.Event()
+        # Guards the cursor and gaps; notified after every dispatch for long-polling readers
+        self._cond = threading.Condition(threading.RLock())
+        self._lock = threading.Lock()
+        self._pid = None
+        self._cursor = None
+        self._gaps = {}
+        self._last_prune = 0.0
+        self.stats = {"dispatched": 0, "batches": 0, "late_commits": 0, "expired_gaps": 0, "errors": 0}
+
+    def record(self, session, event_type, user_id, payload):
+        """Add an event to the session's current transaction."""
+        session.add(self.model(event_type=event_type, user_id=user_id, payload=json.dumps(payload, default=str)))
+        session.info[_PENDING_KEY] = True
+
+    def subscribe(self, callback):
+        """callback(events) is called from the dispatcher thread with each batch of event dicts."""
+        self._subscribers.append(callback)
+
+    def attach(self, session_class):
+        event.listen(session_class, "after_commit", self._after_commit)
+        event.listen(session_class, "after_rollback", self._after_rollback)
+
+    def _after_commit(self, session):
+        if session.info.pop(_PENDING_KEY, False):
+            self._wake.set()
+
+    def _after_rollback(self, session):
+        session.info.pop(_PENDING_KEY, None)
+
+    def install(self, app):
+        """Start the dispatcher in each process that serves requests."""
+        app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        # Started lazily, and again after a fork (threads do not survive into workers)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._cursor = None
+                self._gaps = {}
+                threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    while self.dispatch_once() == self.batch_size:
+                        pass
+                    self._prune()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Outbox dispatch failed: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def dispatch_once(self):
+        """Publish the next batch; returns how many new rows were read."""
+        model = self.model
+        if self._cursor is None:
+            # Only changes from now on are pushed; the change feed can replay older ones
+            self._cursor = model.query.with_entities(model.id).order_by(model.id.desc()).limit(1).scalar() or 0
+        rows = model.query.filter(model.id > self._cursor).order_by(model.id).limit(self.batch_size).all()
+        late = []
+        if self._gaps:
+            late = model.query.filter(model.id.in_(list(self._gaps))).all()
+        now = time.monotonic()
+        with self._cond:
+            for row in late:
+                self._gaps.pop(row.id, None)
+            self.stats["late_commits"] += len(late)
+            expired = [gap for gap, seen in self._gaps.items() if now - seen > self.gap_timeout]
+            for gap in expired:
+                del self._gaps[gap]
+            self.stats["expired_gaps"] += len(expired)
+            expected = self._cursor + 1
+            for row in rows:
+                for gap in range(expected, row.id):
+                    self._gaps[gap] = now
+                expected = row.id + 1
+            if rows:
+                self._cursor = rows[-1].id
+            self._cond.notify_all()
+        events = [self._to_event(row) for row in sorted(late + rows, key=lambda row: row.id)]
+        if events:
+            self._publish(events)
+        return len(rows)
+
+    @staticmethod
+    def _to_event(row):
+        return {"id": row.id, "type": row.event_type, "user_id": row.user_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "data": json.loads(row.payload)}
+
+    def _publish(self, events):
+        self.stats["dispatched"] += len(events)
+        self.stats["batches"] += 1
+        for callback in self._subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"Outbox subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+
+    def _prune(self):
+        if time.monotonic() - self._last_prune < 3600:
+            return
+        self._last_prune = time.monotonic()
+        cutoff = datetime.utcnow() - self.retention
+        self.model.query.filter(self.model.created_at < cutoff).delete(synchronize_session=False)
+        self.app.extensions["sqlalchemy"].session.commit()
+
+    @property
+    def safe_id(self):
+        with self._cond:
+            if self._cursor is None:
+                return None
+            return min(min(self._gaps) - 1, self._cursor) if self._gaps else self._cursor
+
+    def read(self, after, limit=100, user_id=None, wait=0.0):
+        """(events, cursor): committed events with id > after, oldest first, and the `after` to pass next.
+
+        Waits up to `wait` seconds when there is nothing new. Call inside an app context.
+        """
+        self.ensure_started()
+        deadline = time.monotonic() + wait
+        with self._cond:
+            while (self.safe_id is None or self.safe_id <= after) and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            safe_id = self.safe_id
+        if safe_id is None or safe_id <= after:
+            return [], after
+        query = self.model.query.filter(self.model.id > after, self.model.id <= safe_id)
+        if user_id:
+            query = query.filter(self.model.user_id == user_id)
+        rows = query.order_by(self.model.id).limit(limit).all()
+        # Other users' events up to safe_id are skipped over, not returned
+        cursor = rows[-1].id if len(rows) == limit else safe_id
+        return [self._to_event(row) for row in rows], cursor
+
+    def snapshot(self):
+        with self._cond:
+            return {"cursor": self._cursor, "safe_id": self.safe_id, "open_gaps": len(self._gaps),
+                    "subscribers": len(self._subscribers), **self.stats}
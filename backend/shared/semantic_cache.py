@@ -0,0 +1,136 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_namespace(*parts):
+    """Key for everything an answer depends on besides the question (prompt, model, tool set)."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize(question):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", question.lower())).strip()
+
+
+class SemanticResponseCache:
+    """Chat answers reused for questions whose embeddings are close to an earlier one.
+
+    Entries live in a namespace (see cache_namespace) so a prompt, model or tool
+    change never serves answers produced under the old setup. A lookup first tries
+    the normalized question text, which needs no embedding call, then cosine
+    similarity against the namespace's entries (SEMANTIC_CACHE_THRESHOLD). Entries
+    expire after SEMANTIC_CACHE_TTL seconds and the least recently hit are evicted
+    beyond SEMANTIC_CACHE_SIZE. Callers decide what is safe to store: answers that
+    depend on the user must never be.
+    """
+
+    def __init__(self, embed, threshold=None, ttl=None, max_entries=None):
+        # embed(text) -> list of floats; called lazily so misses on exact text stay cheap
+        self.embed = embed
+        self.threshold = threshold if threshold is not None else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("SEMANTIC_CACHE_SIZE", "500"))
+        self._lock = threading.Lock()
+        # (namespace, normalized question) -> [expires, answer, unit vector]
+        self._entries = OrderedDict()
+        # namespace -> (keys, matrix) of unit vectors, rebuilt after the namespace changes
+        self._matrices = {}
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def lookup(self, namespace, question):
+        """Return (answer or None, vector). Pass the vector back to store() after a miss."""
+        key = (namespace, _normalize(question))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return entry[1], entry[2]
+        try:
+            vector = self._unit(self.embed(question))
+        except Exception as e:
+            print(f"Semantic cache embedding failed: {e}")
+            with self._lock:
+                self.misses += 1
+            return None, None
+        with self._lock:
+            match = self._nearest(namespace, vector, now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.hits["semantic"] += 1
+                return self._entries[match][1], vector
+            self.misses += 1
+        return None, vector
+
+    def store(self, namespace, question, vector, answer):
+        if vector is None or not answer:
+            return
+        key = (namespace, _normalize(question))
+        with self._lock:
+            self._entries[key] = [time.monotonic() + self.ttl, answer, vector]
+            self._entries.move_to_end(key)
+            self._matrices.pop(namespace, None)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._matrices.pop(oldest[0], None)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    @staticmethod
+    def _unit(vector):
+        import numpy as np
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, namespace, vector, now):
+        import numpy as np
+
+        cached = self._matrices.get(namespace)
+        if cached is None:
+            keys = [key for key in self._entries if key[0] == namespace]
+            if not keys:
+                return None
+            cached = self._matrices[namespace] = (keys, np.vstack([self._entries[key][2] for key in keys]))
+        keys, matrix = cached
+        scores = matrix @ vector
+        for index in np.argsort(scores)[::-1]:
+            if scores[index] < self.threshold:
+                return None
+            key = keys[index]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return key
+        return None
+
+    def snapshot(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "ttl_s": self.ttl,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
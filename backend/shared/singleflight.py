@@ -0,0 +1,64 @@
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution and its result.
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for it and get the same result (or exception). Nothing is kept
+    afterwards, so this is not a cache: a call that starts after the previous one
+    finished runs again. Keys are tuples whose first element names the group the
+    metrics are reported under. Shared results must be treated as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    def do(self, key, func):
+        with self._lock:
+            stats = self._stats.setdefault(key[0], {"calls": 0, "coalesced": 0})
+            stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                stats["coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self.forget(key, call)
+            call.done.set()
+
+    def forget(self, key, call=None):
+        """Stop sharing the in-flight call for key (e.g. after a write), so later callers run afresh."""
+        with self._lock:
+            if call is None or self._calls.get(key) is call:
+                self._calls.pop(key, None)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                group: {**stats, "coalescing_ratio": round(stats["coalesced"] / stats["calls"], 3) if stats["calls"] else 0.0}
+                for group, stats in self._stats.items()
+            }
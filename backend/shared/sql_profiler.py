@@ -0,0 +1,198 @@
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+
+# Header that asks for a cProfile dump of this request (honoured only when SQL_PROFILE_DIR is set)
+PROFILE_HEADER = "X-Debug-Profile"
+# Cap on distinct statement shapes kept in the process-wide aggregate
+MAX_SHAPES = 500
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Stats for the request being served on this thread/task, or None outside a request
+_current_request = ContextVar("sql_profiler_request", default=None)
+
+
+def statement_shape(statement):
+    """Normalise a SQL statement so repeated lookups with different values compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERALS.sub("?", shape)
+    return _IN_LIST.sub("IN (?)", shape)
+
+
+def _timing_desc(shape, limit=80):
+    """Make a statement safe for a Server-Timing quoted-string description."""
+    text = shape.replace("\\", "").replace('"', "'")
+    text = text.encode("ascii", "replace").decode("ascii")
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+class RequestSqlStats:
+    """Queries issued while serving one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.count = 0
+        self.db_ms = 0.0
+        self.shapes = {}
+        self.slowest = []
+        self._lock = threading.Lock()
+
+    def record(self, shape, elapsed_ms, keep_slowest):
+        with self._lock:
+            self.count += 1
+            self.db_ms += elapsed_ms
+            self.shapes[shape] = self.shapes.get(shape, 0) + 1
+            self.slowest.append((elapsed_ms, shape))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[keep_slowest:]
+
+
+class SqlProfiler:
+    """Per-request SQL counts, DB time, slowest statements and N+1 detection for a Flask app."""
+
+    def __init__(self, service):
+        self.service = service
+        self.slow_statements = int(os.getenv("SQL_PROFILER_SLOW_STATEMENTS", "3"))
+        self.n_plus_one_threshold = int(os.getenv("SQL_PROFILER_N_PLUS_ONE", "5"))
+        # Statement text in Server-Timing is readable by any origin (CORS allows *), so it is a debug opt-in
+        self.timing_statements = os.getenv("SQL_PROFILER_TIMING_STATEMENTS", "0").lower() in ("1", "true", "yes")
+        self.profile_dir = os.getenv("SQL_PROFILE_DIR") or None
+        self.profile_sample_rate = float(os.getenv("SQL_PROFILE_SAMPLE_RATE", "1.0"))
+        self._lock = threading.Lock()
+        # Only one cProfile session can run at a time in a process
+        self._profiling = threading.Lock()
+        self._requests = 0
+        self._queries = 0
+        self._db_ms = 0.0
+        self._shapes = {}
+        self._n_plus_one = {}
+
+    def attach(self, engine):
+        """Time every cursor execution on the engine."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def install(self, app):
+        app.extensions["sql_profiler"] = self
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_profiler_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("sql_profiler_start")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        shape = statement_shape(statement)
+        with self._lock:
+            self._queries += 1
+            self._db_ms += elapsed_ms
+            stats = self._shapes.get(shape)
+            if stats is None and len(self._shapes) < MAX_SHAPES:
+                stats = self._shapes[shape] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            if stats is not None:
+                stats["count"] += 1
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        current = _current_request.get()
+        if current is not None:
+            current.record(shape, elapsed_ms, self.slow_statements)
+
+    def _start_request(self):
+        g.sql_profiler_token = _current_request.set(RequestSqlStats())
+        if (self.profile_dir and PROFILE_HEADER in request.headers
+                and random.random() < self.profile_sample_rate
+                and self._profiling.acquire(blocking=False)):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already active in this interpreter
+                self._profiling.release()
+                return
+            g.sql_profiler_profile = profile
+
+    def _finish_request(self, response):
+        stats = _current_request.get()
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.start) * 1000
+        repeated = {shape: n for shape, n in stats.shapes.items() if n >= self.n_plus_one_threshold}
+        with self._lock:
+            self._requests += 1
+            for shape, n in repeated.items():
+                key = (request.endpoint, shape)
+                entry = self._n_plus_one.setdefault(key, {"requests": 0, "max_repeats": 0})
+                entry["requests"] += 1
+                entry["max_repeats"] = max(entry["max_repeats"], n)
+        for shape, n in repeated.items():
+            print(f"⚠️  Possible N+1 in {request.endpoint}: {n}x {shape[:200]}")
+
+        timings = [
+            f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries"',
+            f"app;dur={max(total_ms - stats.db_ms, 0):.1f}",
+        ]
+        for i, (elapsed, shape) in enumerate(stats.slowest, 1):
+            desc = f';desc="{_timing_desc(shape)}"' if self.timing_statements else ""
+            timings.append(f"sql{i};dur={elapsed:.1f}{desc}")
+        response.headers.add("Server-Timing", ", ".join(timings))
+
+        profile = g.pop("sql_profiler_profile", None)
+        if profile is not None:
+            profile.disable()
+            self._profiling.release()
+            path = self._dump_profile(profile)
+            response.headers["X-Debug-Profile-Path"] = path
+        return response
+
+    def _teardown_request(self, exc):
+        profile = g.pop("sql_profiler_profile", None)
+        if profile is not None:
+            # The response never reached after_request (unhandled error)
+            profile.disable()
+            self._profiling.release()
+        token = g.pop("sql_profiler_token", None)
+        if token is not None:
+            _current_request.reset(token)
+
+    def _dump_profile(self, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        endpoint = (request.endpoint or "unknown").replace(".", "_")
+        path = os.path.join(self.profile_dir, f"{self.service}-{endpoint}-{int(time.time())}-{uuid.uuid4().hex[:8]}.prof")
+        profile.dump_stats(path)
+        print(f"Wrote cProfile dump for {request.method} {request.path} to {path}")
+        return path
+
+    def snapshot(self, top=10):
+        """Return a JSON-safe view of SQL activity since startup."""
+        with self._lock:
+            slowest = sorted(self._shapes.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+            n_plus_one = [
+                {"endpoint": endpoint, "statement": shape, **entry}
+                for (endpoint, shape), entry in self._n_plus_one.items()
+            ]
+            return {
+                "requests": self._requests,
+                "queries": self._queries,
+                "db_ms": round(self._db_ms, 2),
+                "queries_per_request": round(self._queries / self._requests, 2) if self._requests else 0.0,
+                "top_statements": [
+                    {"statement": shape, "count": s["count"], "total_ms": round(s["total_ms"], 2),
+                     "max_ms": round(s["max_ms"], 2)}
+                    for shape, s in slowest
+                ],
+                "n_plus_one_candidates": n_plus_one,
+            }
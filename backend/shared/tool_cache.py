@@ -0,0 +1,146 @@
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+
+_PENDING_KEY = "tool_cache_users"
+
+
+def _normalize(arguments):
+    """Stable key for tool arguments: defaults applied, strings trimmed, keys sorted."""
+    cleaned = {k: v.strip() if isinstance(v, str) else v for k, v in arguments.items()}
+    return json.dumps(cleaned, sort_keys=True, default=str)
+
+
+def _cacheable(result):
+    # Error strings/payloads are not cached, so a transient failure is retried on the next call
+    if not isinstance(result, str) or result.startswith("Error"):
+        return False
+    return '"status": "error"' not in result
+
+
+class ToolResultCache:
+    """LRU + TTL cache for read-only agent tool results, keyed on (tool, user, normalized args).
+
+    Entries for a user are dropped when a session that wrote for that user commits
+    (see invalidate_on_commit). A per-user generation counter stops a read that
+    raced with the write from storing its stale result afterwards. The cache is per
+    process; other workers rely on the TTL.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("TOOL_CACHE_SIZE", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("TOOL_CACHE_TTL", "30"))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = {}
+        self._stats = {}
+        self._invalidations = 0
+        self._evictions = 0
+
+    def cached(self, tool_name, user_arg="user_id"):
+        """Decorator for a read-only tool; keeps the signature so agents still see the same schema."""
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.ttl <= 0:
+                    return func(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                user = arguments.pop(user_arg, None)
+                key = (tool_name, user, _normalize(arguments))
+                hit, value, generation = self._lookup(key, user)
+                if hit:
+                    return value
+                value = func(*args, **kwargs)
+                if _cacheable(value):
+                    self._store(key, user, value, generation)
+                return value
+            return wrapper
+        return decorator
+
+    def _tool_stats(self, tool_name):
+        stats = self._stats.get(tool_name)
+        if stats is None:
+            stats = self._stats[tool_name] = {"hits": 0, "misses": 0}
+        return stats
+
+    def _lookup(self, key, user):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            stats = self._tool_stats(key[0])
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return True, entry[1], None
+            if entry is not None:
+                self._remove(key)
+            stats["misses"] += 1
+            return False, None, self._generations.get(user, 0)
+
+    def _store(self, key, user, value, generation):
+        with self._lock:
+            if self._generations.get(user, 0) != generation:
+                # The user's data changed while this result was being computed
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[1]]
+
+    def invalidate_user(self, user):
+        with self._lock:
+            self._generations[user] = self._generations.get(user, 0) + 1
+            for key in list(self._keys_by_user.pop(user, ())):
+                self._entries.pop(key, None)
+            self._invalidations += 1
+
+    def invalidate_on_commit(self, session, user):
+        """Invalidate the user's entries when the session's current transaction commits."""
+        session.info.setdefault(_PENDING_KEY, set()).add(user)
+
+    def attach(self, session_class):
+        """Listen for commits/rollbacks on the app's session class."""
+        event.listen(session_class, "after_commit", self._after_commit)
+        event.listen(session_class, "after_rollback", self._after_rollback)
+
+    def _after_commit(self, session):
+        for user in session.info.pop(_PENDING_KEY, ()):
+            self.invalidate_user(user)
+
+    def _after_rollback(self, session):
+        session.info.pop(_PENDING_KEY, None)
+
+    def snapshot(self):
+        with self._lock:
+            tools = {}
+            for tool_name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                tools[tool_name] = {**stats, "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0}
+            return {
+                "entries": len(self._entries),
+                "ttl_s": self.ttl,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+                "tools": tools,
+            }
@@ -0,0 +1,67 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ToolExecutor:
+    """Runs agent tools off the request thread, each in its own app context (and so its own DB session).
+
+    Read-only tools share a bounded thread pool, so the several tools a model asks
+    for in one step run concurrently. Mutating tools go through a single worker
+    thread, so the agent's writes in this process run one at a time; REST writes
+    (POST /api/transactions, /api/accounts) do not go through the executor.
+    """
+
+    def __init__(self, app, max_workers=None, mutating=()):
+        self.app = app
+        self.max_workers = max_workers or int(os.getenv("TOOL_EXECUTOR_WORKERS", "4"))
+        self.mutating = frozenset(mutating)
+        self._reads = ThreadPoolExecutor(self.max_workers, thread_name_prefix="tool-read")
+        self._writes = ThreadPoolExecutor(1, thread_name_prefix="tool-write")
+        self._lock = threading.Lock()
+        self._running = 0
+        self._peak = 0
+        self._calls = {"read": 0, "write": 0}
+        self._queue_ms = 0.0
+
+    def submit(self, func, kwargs):
+        """Schedule func(**kwargs) and return a concurrent.futures.Future."""
+        kind = "write" if func.__name__ in self.mutating else "read"
+        pool = self._writes if kind == "write" else self._reads
+        # Carry the caller's contextvars (e.g. the active trace span) into the worker
+        context = contextvars.copy_context()
+        return pool.submit(context.run, self._run, kind, func, kwargs, time.perf_counter())
+
+    def _run(self, kind, func, kwargs, queued_at):
+        with self._lock:
+            self._queue_ms += (time.perf_counter() - queued_at) * 1000
+            self._calls[kind] += 1
+            self._running += 1
+            self._peak = max(self._peak, self._running)
+        try:
+            with self.app.app_context():
+                return func(**kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def wrap(self, func):
+        """Blocking wrapper with func's signature, for agents that call tools synchronously."""
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            return self.submit(func, kwargs).result()
+        return wrapper
+
+    def snapshot(self):
+        with self._lock:
+            calls = sum(self._calls.values())
+            return {
+                "read_workers": self.max_workers,
+                "calls": dict(self._calls),
+                "running": self._running,
+                "peak_concurrency": self._peak,
+                "avg_queue_ms": round(self._queue_ms / calls, 2) if calls else 0.0,
+            }
@@ -0,0 +1,316 @@
+"""Lightweight spans with W3C trace-context propagation between the two services.
+
+Spans are always created, so trace ids propagate (and land in chat_history),
+but they are only exported when TRACE_EXPORTER is set:
+
+- file: appends OTLP/JSON export requests, one per line, to TRACE_FILE
+- otlp: POSTs OTLP/JSON to a collector at TRACE_OTLP_ENDPOINT
+
+The banking service injects a `traceparent` header into every analytics call
+(HTTP, in-process or Unix socket), and the analytics side continues the trace.
+"""
+import functools
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+
+TRACEPARENT_HEADER = "traceparent"
+TRACE_ID_RESPONSE_HEADER = "X-Trace-Id"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# OTLP span kinds
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+_current_span = ContextVar("current_span", default=None)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class SpanContext:
+    """The ids a child span needs from its parent (possibly in another process)."""
+
+    def __init__(self, trace_id, span_id):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+
+class Span:
+    def __init__(self, tracer, name, parent=None, kind=KIND_INTERNAL, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = STATUS_OK
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, exc):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.exporter.export(self)
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class SpanExporter:
+    """Batches finished spans and writes them from a background thread."""
+
+    def __init__(self, kind=None, path=None, endpoint=None, interval=None, max_queue=10000):
+        self.kind = (kind if kind is not None else os.getenv("TRACE_EXPORTER", "none")).lower()
+        self.path = path or os.getenv("TRACE_FILE", "traces.jsonl")
+        self.endpoint = endpoint or os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+        self.interval = interval if interval is not None else float(os.getenv("TRACE_EXPORT_INTERVAL", "2"))
+        self.enabled = self.kind in ("file", "otlp")
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._dropped = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def export(self, span):
+        if not self.enabled:
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Never block a request on tracing
+            self._dropped += 1
+
+    def _ensure_worker(self):
+        # Started lazily, and again after a fork (threads do not survive into workers)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        spans = []
+        while True:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not spans:
+            return
+        try:
+            self._write(self._payload(spans))
+        except Exception as e:
+            print(f"Span export failed ({len(spans)} spans dropped): {e}")
+
+    def _payload(self, spans):
+        by_service = {}
+        for span in spans:
+            by_service.setdefault(span.tracer.service, []).append(span.to_otlp())
+        return {"resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", service)]},
+                "scopeSpans": [{"scope": {"name": "banking-app.tracing"}, "spans": service_spans}],
+            }
+            for service, service_spans in by_service.items()
+        ]}
+
+    def _write(self, payload):
+        if self.kind == "file":
+            with open(self.path, "a") as f:
+                f.write(json.dumps(payload) + "\n")
+        else:
+            import requests
+            requests.post(self.endpoint, json=payload, timeout=5)
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """The process-wide exporter, configured from the environment on first use."""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = SpanExporter()
+    return _exporter
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def inject_headers(headers=None):
+    """Return headers carrying the current trace context (unchanged when there is no active span)."""
+    headers = dict(headers or {})
+    span = _current_span.get()
+    if span is not None:
+        headers[TRACEPARENT_HEADER] = span.traceparent()
+    return headers
+
+
+def extract_context(headers):
+    """Parse a traceparent header into a SpanContext, or None if absent/invalid."""
+    value = (headers or {}).get(TRACEPARENT_HEADER)
+    match = _TRACEPARENT.match(value.strip().lower()) if value else None
+    if match is None or match.group(1) == "0" * 32:
+        return None
+    return SpanContext(match.group(1), match.group(2))
+
+
+class Tracer:
+    """Creates spans for one service."""
+
+    def __init__(self, service, exporter=None):
+        self.service = service
+        self._exporter = exporter
+
+    @property
+    def exporter(self):
+        return self._exporter or get_exporter()
+
+    def start(self, name, parent=None, kind=KIND_INTERNAL, **attributes):
+        """Start a span without making it current; call span.end() when done."""
+        return Span(self, name, parent=parent if parent is not None else _current_span.get(),
+                    kind=kind, attributes=attributes)
+
+    @contextmanager
+    def span(self, name, parent=None, kind=KIND_INTERNAL, **attributes):
+        """Run the block inside a new span that is current for nested spans."""
+        span = self.start(name, parent=parent, kind=kind, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def wrap(self, name=None, **attributes):
+        """Decorator that runs the function inside a span (signature and docstring are kept)."""
+        def decorator(func):
+            span_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, **attributes):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def install(self, app):
+        """Open a server span per request, continuing any incoming traceparent."""
+
+        @app.before_request
+        def _start_request_span():
+            span = self.start(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+                              parent=extract_context(request.headers), kind=KIND_SERVER,
+                              **{"http.method": request.method, "http.target": request.path})
+            g.trace_span = span
+            g.trace_token = _current_span.set(span)
+
+        @app.after_request
+        def _tag_response(response):
+            span = g.get("trace_span")
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.status = STATUS_ERROR
+                response.headers[TRACE_ID_RESPONSE_HEADER] = span.trace_id
+            return response
+
+        @app.teardown_request
+        def _end_request_span(exc):
+            span = g.pop("trace_span", None)
+            token = g.pop("trace_token", None)
+            if token is not None:
+                _current_span.reset(token)
+            if span is not None:
+                if exc is not None:
+                    span.record_error(exc)
+                span.end()
+
+    def instrument_engine(self, engine, db_system):
+        """Record a span per SQL statement issued inside an active trace (only when exporting)."""
+        if not self.exporter.enabled:
+            return
+        from shared.sql_profiler import statement_shape
+
+        def before(conn, cursor, statement, parameters, context, executemany):
+            if _current_span.get() is None:
+                return
+            span = self.start("db.query", kind=KIND_CLIENT, **{
+                "db.system": db_system, "db.statement": statement_shape(statement)[:1000]})
+            conn.info.setdefault("trace_spans", []).append(span)
+
+        def after(conn, cursor, statement, parameters, context, executemany):
+            spans = conn.info.get("trace_spans")
+            if spans:
+                spans.pop().end()
+
+        def on_error(exception_context):
+            spans = exception_context.connection.info.get("trace_spans") if exception_context.connection else None
+            if spans:
+                span = spans.pop()
+                span.record_error(exception_context.original_exception)
+                span.end()
+
+        event.listen(engine, "before_cursor_execute", before)
+        event.listen(engine, "after_cursor_execute", after)
+        event.listen(engine, "handle_error", on_error)
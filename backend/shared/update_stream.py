@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+
+from shared.admission import Rejected
+
+KEEPALIVE_FRAME = ": keepalive\n\n"
+
+
+def sse_frame(event, data, event_id=None):
+    """One Server-Sent Events message."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    """Frames waiting to be sent on one open stream, filled from the outbox dispatcher thread."""
+
+    def __init__(self, user_id, max_queue, loop=None):
+        self.user_id = user_id
+        self.max_queue = max_queue
+        # Set for streams served by an event loop (ASGI); wakeups then go through the loop
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._frames = deque()
+        self._overflowed = False
+        self._ready = asyncio.Event() if loop is not None else threading.Event()
+
+    def put(self, event_id, frame):
+        """Queue a frame; returns False when the client fell too far behind and must reload."""
+        with self._lock:
+            if self._overflowed or len(self._frames) >= self.max_queue:
+                self._overflowed = True
+                self._frames.clear()
+            else:
+                self._frames.append((event_id, frame))
+            kept = not self._overflowed
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._ready.set)
+        else:
+            self._ready.set()
+        return kept
+
+    def drain(self):
+        """([(event_id, frame)], overflowed) queued since the last drain."""
+        with self._lock:
+            frames, overflowed = list(self._frames), self._overflowed
+            self._frames.clear()
+            self._overflowed = False
+            self._ready.clear()
+        return frames, overflowed
+
+    def wait(self, timeout):
+        self._ready.wait(timeout)
+        return self.drain()
+
+    async def await_frames(self, timeout):
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.drain()
+
+
+class UpdateStream:
+    """Per-user Server-Sent Events fan-out of ledger changes.
+
+    publish() is subscribed to the ledger outbox, whose dispatcher in every worker
+    sees every commit, so a stream gets the changes made through any worker (REST
+    or the chatbot). to_delta(event) turns an outbox event into the increment the
+    client applies, or None to skip it. A client that falls STREAM_MAX_QUEUE
+    frames behind gets a `reset` event and reloads instead of stalling the
+    dispatcher. Idle streams get a comment every STREAM_KEEPALIVE seconds, which
+    also notices disconnected clients. Each frame carries the outbox id, so a
+    reconnecting EventSource resumes from Last-Event-ID.
+    """
+
+    def __init__(self, to_delta, max_connections=None, max_queue=None, keepalive=None):
+        self.to_delta = to_delta
+        self.max_connections = max_connections or int(os.getenv("STREAM_MAX_CONNECTIONS", "100"))
+        self.max_queue = max_queue or int(os.getenv("STREAM_MAX_QUEUE", "256"))
+        self.keepalive = keepalive or float(os.getenv("STREAM_KEEPALIVE", "15"))
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._open = 0
+        self.stats = {"published": 0, "delivered": 0, "overflows": 0, "rejected": 0}
+
+    def open(self, user_id, loop=None, limit=None):
+        """Subscribe to a user's updates; raises Rejected beyond `limit` (default max_connections) open streams."""
+        with self._lock:
+            if self._open >= (limit or self.max_connections):
+                self.stats["rejected"] += 1
+                raise Rejected("Too many open update streams.", int(self.keepalive))
+            subscription = Subscription(user_id, self.max_queue, loop)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            self._open += 1
+        return subscription
+
+    def close(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+            self._open -= 1
+
+    def frame(self, event):
+        delta = self.to_delta(event)
+        return None if delta is None else sse_frame("update", delta, event["id"])
+
+    def publish(self, events):
+        for event in events:
+            with self._lock:
+                subscribers = list(self._subscribers.get(event["user_id"], ()))
+            if not subscribers:
+                continue
+            frame = self.frame(event)
+            if frame is None:
+                continue
+            self.stats["published"] += 1
+            for subscription in subscribers:
+                if subscription.put(event["id"], frame):
+                    self.stats["delivered"] += 1
+                else:
+                    self.stats["overflows"] += 1
+
+    def backlog(self, events, complete, cursor, resumed):
+        """(frames, ids) a (re)connecting client gets before live updates.
+
+        events are the user's missed outbox events (complete=False if there were
+        more than could be read); cursor is the outbox position they run up to.
+        """
+        if not complete:
+            frames, ids = [sse_frame("reset", {})], set()
+        else:
+            frames = [frame for frame in map(self.frame, events) if frame is not None]
+            ids = {event["id"] for event in events}
+        frames.append(sse_frame("ready", {"resumed": resumed}, cursor))
+        return frames, ids
+
+    def _live(self, frames, overflowed, sent):
+        if overflowed:
+            yield sse_frame("reset", {})
+        for event_id, frame in frames:
+            # Already sent as part of the backlog
+            if event_id not in sent:
+                yield frame
+
+    def frames(self, subscription, backlog=(), sent=()):
+        """Frames for a WSGI streaming response: the backlog, then live updates until the client goes away."""
+        try:
+            yield from backlog
+            while True:
+                frames, overflowed = subscription.wait(self.keepalive)
+                if not frames and not overflowed:
+                    yield KEEPALIVE_FRAME
+                yield from self._live(frames, overflowed, sent)
+        finally:
+            self.close(subscription)
+
+    async def aframes(self, subscription, backlog=(), sent=()):
+        """Async counterpart of frames() for subscriptions opened with a loop. The caller closes the subscription."""
+        for frame in backlog:
+            yield frame
+        while True:
+            frames, overflowed = await subscription.await_frames(self.keepalive)
+            if not frames and not overflowed:
+                yield KEEPALIVE_FRAME
+            for frame in self._live(frames, overflowed, sent):
+                yield frame
+
+    def snapshot(self):
+        with self._lock:
+            return {"open_streams": self._open, "users": len(self._subscribers), **self.stats}
@@ -97,3 +97,34 @@ def _to_obj(val):
         return [_to_obj(x) for x in val]
     return val
 
+
+def local_trace_messages(question, answer, agent_name, source, tool_calls=()):
+    """Trace messages, in the shape analytics ingests, for a turn answered without the LLM agent.
+
+    tool_calls is a list of (name, args, output) tools that ran locally; `source`
+    (e.g. "semantic-cache") is recorded as the model name and no tokens are counted.
+    """
+    import uuid
+
+    def ai_message(content, finish_reason, **extra):
+        return {
+            "type": "ai", "id": f"run-{uuid.uuid4()}", "name": agent_name, "content": content,
+            "response_metadata": {
+                "token_usage": {"completion_tokens": 0, "prompt_tokens": 0, "total_tokens": 0},
+                "model_name": source,
+                "prompt_filter_results": [{"prompt_index": 0, "content_filter_results": {}}],
+                "finish_reason": finish_reason,
+            },
+            **extra,
+        }
+
+    messages = [{"type": "human", "id": str(uuid.uuid4()), "content": question}]
+    if tool_calls:
+        calls = [{"id": f"call_{uuid.uuid4().hex[:24]}", "type": "function",
+                  "function": {"name": name, "arguments": json.dumps(args)}} for name, args, _ in tool_calls]
+        messages.append(ai_message("", "tool_calls", additional_kwargs={"tool_calls": calls}))
+        for call, (name, _, output) in zip(calls, tool_calls):
+            messages.append({"type": "tool", "id": str(uuid.uuid4()), "tool_call_id": call["id"], "name": name,
+                             "content": output, "status": "success"})
+    messages.append(ai_message(answer, "stop"))
+    return messages
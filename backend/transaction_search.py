@@ -0,0 +1,148 @@
+"""Server-side transaction search for GET /api/transactions/search.
+
+Filters (account, type, category, date and amount ranges) and free text over
+description and category run in SQL, and results come back newest first in
+keyset-paginated pages: the cursor is the (created_at, id) of the last row, so
+page N costs the same as page 1 on the (account, created_at, id) indexes. The
+first page also carries deposit/payment/transfer totals over every match,
+computed with window functions in the same query. filter_options() lists the
+types and categories a user's transactions have, for the filter dropdowns.
+
+Text search uses the SQL Server full-text index on transactions (description,
+category) when there is one: every word must match as a word prefix. Without
+it (SQLite, or a database where full-text search is unavailable) each word
+must appear as a substring, via LIKE. TRANSACTION_SEARCH_MODE forces either.
+"""
+import base64
+import json
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, or_, text
+
+TOTAL_TYPES = ("deposit", "payment", "transfer")
+MAX_PAGE_SIZE = 200
+MAX_TERMS = 8
+_TERM = re.compile(r"\w+")
+
+
+def encode_cursor(transaction):
+    raw = json.dumps([transaction.created_at.isoformat(), transaction.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, transaction_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), transaction_id
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def parse_time(value):
+    """ISO date or datetime from a query parameter, or None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {value}") from e
+
+
+class TransactionSearch:
+    def __init__(self, model, mode=None):
+        self.model = model
+        # auto, fulltext or like
+        self.mode = (mode or os.getenv("TRANSACTION_SEARCH_MODE", "auto")).lower()
+        self._fulltext = None
+
+    def uses_fulltext(self, session):
+        if self._fulltext is None:
+            if self.mode != "auto":
+                self._fulltext = self.mode == "fulltext"
+            elif session.get_bind().dialect.name != "mssql":
+                self._fulltext = False
+            else:
+                table = self.model.__tablename__
+                self._fulltext = bool(session.execute(text(
+                    "SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID(:table)"), {"table": table}).scalar())
+            print(f"[Transaction search] Text search uses {'the full-text index' if self._fulltext else 'LIKE'}")
+        return self._fulltext
+
+    def _text_condition(self, session, terms):
+        model = self.model
+        if self.uses_fulltext(session):
+            table = model.__tablename__
+            return text(f"CONTAINS(({table}.description, {table}.category), :search_terms)").bindparams(
+                search_terms=" AND ".join(f'"{term}*"' for term in terms))
+        # _ is a LIKE wildcard and also a word character
+        patterns = ["%" + term.replace("_", "\\_") + "%" for term in terms]
+        return and_(*(or_(model.description.like(pattern, escape="\\"), model.category.like(pattern, escape="\\"))
+                      for pattern in patterns))
+
+    def _owned(self, account_ids):
+        model = self.model
+        return or_(model.from_account_id.in_(account_ids), model.to_account_id.in_(account_ids))
+
+    def filter_options(self, session, account_ids):
+        """{"types", "categories"}: the distinct values a user's transactions can be filtered by."""
+        model = self.model
+        return {
+            field: sorted(value for (value,) in session.query(column).filter(self._owned(account_ids)).distinct()
+                          if value)
+            for field, column in (("types", model.type), ("categories", model.category))
+        }
+
+    def search(self, session, account_ids, q=None, account_id=None, type=None, category=None,
+               date_from=None, date_to=None, min_amount=None, max_amount=None, cursor=None, limit=50):
+        """{"transactions", "next_cursor", "totals"} for the user's accounts; totals only on the first page.
+
+        date_from is inclusive, date_to exclusive. Raises ValueError for a malformed cursor.
+        """
+        model = self.model
+        if account_id is not None:
+            account_ids = [acc for acc in account_ids if acc == account_id]
+        conditions = [self._owned(account_ids)]
+        if type:
+            conditions.append(model.type == type)
+        if category:
+            conditions.append(model.category == category)
+        if date_from is not None:
+            conditions.append(model.created_at >= date_from)
+        if date_to is not None:
+            conditions.append(model.created_at < date_to)
+        if min_amount is not None:
+            conditions.append(model.amount >= min_amount)
+        if max_amount is not None:
+            conditions.append(model.amount <= max_amount)
+        terms = _TERM.findall(q or "")[:MAX_TERMS]
+        if terms:
+            conditions.append(self._text_condition(session, terms))
+
+        totals = []
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            conditions.append(or_(model.created_at < created_at,
+                                  and_(model.created_at == created_at, model.id < last_id)))
+        else:
+            # Window aggregates see every matching row, before the page limit applies
+            totals = [func.count().over().label("match_count")] + [
+                func.sum(case((model.type == kind, model.amount), else_=0)).over().label(kind)
+                for kind in TOTAL_TYPES]
+
+        query = session.query(model, *totals).filter(*conditions)
+        rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        transactions = [row[0] for row in rows] if totals else rows
+        result = {
+            "transactions": [t.to_dict() for t in transactions[:limit]],
+            "next_cursor": encode_cursor(transactions[limit - 1]) if len(transactions) > limit else None,
+            "totals": None,
+        }
+        if not cursor:
+            first = rows[0] if rows else None
+            result["totals"] = {
+                "count": first.match_count if first else 0,
+                **{kind: float(getattr(first, kind) or 0) if first else 0.0 for kind in TOTAL_TYPES},
+            }
+        return result
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import Layout from './components/Layout';
 import Dashboard from './components/Dashboard';
 import Transactions from './components/Transactions';
@@ -10,9 +10,23 @@ import { MessageCircle, X } from 'lucide-react';
 import ChatSessions from './components/ChatSessions';
 import ToolAnalytics from './components/ToolAnalytics';
 
-import type { Account, Transaction } from './types/banking';
+import type { Account, BankingUpdate, Transaction } from './types/banking';
+import { readHeaders, rememberWrite } from './services/readAfterWrite';
 
 const API_URL = 'http://127.0.0.1:5001/api';
+// The stream's Retry-After on a 429 is its keepalive interval (STREAM_KEEPALIVE, 15 s)
+const STREAM_RETRY_MS = 15000;
+const STREAM_MAX_RETRY_MS = 120000;
+// Dashboard and Analytics chart the last six months; the Transactions tab pages through the rest on the server
+const HISTORY_MONTHS = 6;
+
+// First day of the oldest charted month, as YYYY-MM-DD
+const historyStart = () => {
+  const start = new Date();
+  start.setDate(1);
+  start.setMonth(start.getMonth() - (HISTORY_MONTHS - 1));
+  return `${start.getFullYear()}-${String(start.getMonth() + 1).padStart(2, '0')}-01`;
+};
 
 function App() {
   const [activeTab, setActiveTab] = useState('dashboard');
@@ -21,18 +35,68 @@ function App() {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const streamOpen = useRef(false);
+  const loaded = useRef(false);
 
   useEffect(() => {
-    loadBankingData();
+    let source: EventSource | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let retryDelay = STREAM_RETRY_MS;
+
+    // Balance changes and new transactions (including the chatbot's) arrive as deltas
+    const connect = () => {
+      const stream = new EventSource(`${API_URL}/stream/updates`);
+      source = stream;
+      stream.addEventListener('update', (event) => applyUpdate(JSON.parse((event as MessageEvent).data)));
+      stream.addEventListener('ready', (event) => {
+        streamOpen.current = true;
+        retryDelay = STREAM_RETRY_MS;
+        // Load once subscribed, so no change falls between the load and the stream; a resumed stream replays what it missed
+        if (!JSON.parse((event as MessageEvent).data).resumed) loadBankingData(false);
+      });
+      // The server could not replay everything we missed
+      stream.addEventListener('reset', () => loadBankingData(false));
+      stream.onerror = () => {
+        streamOpen.current = false;
+        if (stream.readyState !== EventSource.CLOSED) {
+          // The browser reconnects by itself; still show the data meanwhile
+          if (!loaded.current) loadBankingData(false);
+          return;
+        }
+        // Refused (e.g. 429 when the server is at its stream limit): EventSource gives up, so poll
+        // the data once and try the stream again later, backing off while it stays refused
+        loadBankingData(false);
+        retryTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, STREAM_MAX_RETRY_MS);
+      };
+    };
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      source?.close();
+    };
   }, []);
 
-  const loadBankingData = async () => {
-    setLoading(true);
+  const applyUpdate = (update: BankingUpdate) => {
+    setAccounts(prev => {
+      const updated = prev.map(acc => acc.id in update.balances ? { ...acc, balance: update.balances[acc.id] } : acc);
+      const known = new Set(updated.map(acc => acc.id));
+      return [...updated, ...update.accounts.filter(acc => !known.has(acc.id))];
+    });
+    setTransactions(prev => {
+      const known = new Set(prev.map(t => t.id));
+      // Newest first, like GET /transactions
+      return [...update.transactions.filter(t => !known.has(t.id)).reverse(), ...prev];
+    });
+  };
+
+  const loadBankingData = async (showLoading = true) => {
+    if (showLoading) setLoading(true);
     setError(null);
     try {
       const [accountsResponse, transactionsResponse] = await Promise.all([
-        fetch(`${API_URL}/accounts`),
-        fetch(`${API_URL}/transactions`),
+        fetch(`${API_URL}/accounts`, { headers: readHeaders() }),
+        fetch(`${API_URL}/transactions?from=${historyStart()}`, { headers: readHeaders() }),
       ]);
       if (!accountsResponse.ok || !transactionsResponse.ok) {
         throw new Error('Failed to fetch data from the server.');
@@ -41,6 +105,7 @@ function App() {
       const transactionsData = await transactionsResponse.json();
       setAccounts(accountsData);
       setTransactions(transactionsData);
+      loaded.current = true;
     } catch (error) {
       console.error('Error loading banking data:', error);
       setError('Could not connect to the banking service. Please ensure the backend is running and refresh.');
@@ -69,9 +134,10 @@ function App() {
         const errorResult = await response.json();
         throw new Error(errorResult.message || 'Failed to complete transaction.');
       }
+      rememberWrite(response);
       
-      // Transaction successful, now reload all data
-      await loadBankingData();
+      // The update stream delivers the new balances and transaction; reload only without it
+      if (!streamOpen.current) await loadBankingData();
 
     } catch (error: any) {
       console.error('Error completing transaction:', error);
@@ -90,9 +156,10 @@ function App() {
         body: JSON.stringify(accountData),
       });
       if (!response.ok) throw new Error('Account creation failed.');
+      rememberWrite(response);
       const newAccount = await response.json();
-      // Refresh all data to get the new account list
-      await loadBankingData();
+      // The new account arrives on the update stream; reload only without it
+      if (!streamOpen.current) await loadBankingData();
       return newAccount; // Return new account details if needed
     } catch (err) {
       console.error("Error creating account:", err);
@@ -108,14 +175,14 @@ function App() {
 
     switch (activeTab) {
       case 'dashboard':
-        return <Dashboard accounts={accounts} recentTransactions={transactions} />;
+        return <Dashboard accounts={accounts} recentTransactions={transactions} historyMonths={HISTORY_MONTHS} />;
       case 'transactions':
         return <Transactions transactions={transactions} accounts={accounts} />;
       case 'transfer':
         // Pass both handlers to the Transfer component
         return <Transfer accounts={accounts} onTransactionComplete={handleTransactionComplete} onAccountCreate={handleAccountCreate} />;
       case 'analytics':
-        return <Analytics transactions={transactions} accounts={accounts} />;
+        return <Analytics transactions={transactions} accounts={accounts} historyMonths={HISTORY_MONTHS} />;
       
       case 'chat-sessions':
         return <ChatSessions />;
@@ -123,7 +190,7 @@ function App() {
         return <ToolAnalytics />;
         
       default:
-        return <Dashboard accounts={accounts} recentTransactions={transactions} />;
+        return <Dashboard accounts={accounts} recentTransactions={transactions} historyMonths={HISTORY_MONTHS} />;
     }
   };
 
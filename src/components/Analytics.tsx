@@ -6,10 +6,12 @@ import type { Account, Transaction } from '../types/banking';
 interface AnalyticsProps {
   transactions: Transaction[];
   accounts: Account[];
+  // App only loads this many months of history
+  historyMonths: number;
 }
 
-const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts }) => {
-  // Calculate spending by category
+const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts, historyMonths }) => {
+  // Calculate spending by category over the loaded months
   const spendingByCategory = transactions
     .filter(t => t.type === 'payment')
     .reduce((acc, t) => {
@@ -21,8 +23,8 @@ const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts }) => {
     .map(([category, amount]) => ({ category, amount }))
     .sort((a, b) => b.amount - a.amount);
 
-  // Calculate monthly trends (last 6 months)
-  const monthlyData = Array.from({ length: 6 }, (_, i) => {
+  // Calculate monthly trends
+  const monthlyData = Array.from({ length: historyMonths }, (_, i) => {
     const date = new Date();
     date.setMonth(date.getMonth() - i);
     const month = date.toLocaleString('default', { month: 'short' });
@@ -108,7 +110,10 @@ const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts }) => {
         {/* Spending by Category */}
         <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-6">
           <div className="flex items-center justify-between mb-6">
-            <h3 className="text-lg font-semibold text-gray-900">Spending by Category</h3>
+            <div>
+              <h3 className="text-lg font-semibold text-gray-900">Spending by Category</h3>
+              <p className="text-sm text-gray-500">Last {historyMonths} months</p>
+            </div>
             <PieChartIcon className="h-5 w-5 text-gray-400" />
           </div>
           <div className="h-80">
@@ -147,7 +152,10 @@ const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts }) => {
         {/* Category Breakdown */}
         <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-6">
           <div className="flex items-center justify-between mb-6">
-            <h3 className="text-lg font-semibold text-gray-900">Category Breakdown</h3>
+            <div>
+              <h3 className="text-lg font-semibold text-gray-900">Category Breakdown</h3>
+              <p className="text-sm text-gray-500">Last {historyMonths} months</p>
+            </div>
             <BarChart3 className="h-5 w-5 text-gray-400" />
           </div>
           <div className="h-80">
@@ -172,7 +180,10 @@ const Analytics: React.FC<AnalyticsProps> = ({ transactions, accounts }) => {
         {/* Monthly Trends */}
         <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-6 lg:col-span-2">
           <div className="flex items-center justify-between mb-6">
-            <h3 className="text-lg font-semibold text-gray-900">Income vs Expenses Trend</h3>
+            <div>
+              <h3 className="text-lg font-semibold text-gray-900">Income vs Expenses Trend</h3>
+              <p className="text-sm text-gray-500">Last {historyMonths} months</p>
+            </div>
             <TrendingUp className="h-5 w-5 text-gray-400" />
           </div>
           <div className="h-80">
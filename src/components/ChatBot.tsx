@@ -1,5 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, Bot, User } from 'lucide-react';
+import { rememberWrite } from '../services/readAfterWrite';
 
 // Simplified ChatMessage interface for the frontend
 interface ChatMessage {
@@ -91,6 +92,8 @@ const ChatBot: React.FC<ChatBotProps> = () => {
       if (!response.ok) {
         throw new Error('Failed to get response from the assistant.');
       }
+      // The assistant may have moved money or opened an account
+      rememberWrite(response);
 
       const data = await response.json();
       
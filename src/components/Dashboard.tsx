@@ -5,9 +5,11 @@ import type { Account, Transaction } from '../types/banking';
 interface DashboardProps {
   accounts: Account[];
   recentTransactions: Transaction[];
+  // App only loads this many months of history
+  historyMonths: number;
 }
 
-const Dashboard: React.FC<DashboardProps> = ({ accounts, recentTransactions }) => {
+const Dashboard: React.FC<DashboardProps> = ({ accounts, recentTransactions, historyMonths }) => {
   const totalBalance = accounts.reduce((sum, account) => sum + account.balance, 0);
   const monthlySpending = recentTransactions
     .filter(t => t.type === 'payment' && new Date(t.created_at).getMonth() === new Date().getMonth())
@@ -77,6 +79,7 @@ const Dashboard: React.FC<DashboardProps> = ({ accounts, recentTransactions }) =
       <div className="bg-white rounded-xl shadow-sm border border-gray-200">
         <div className="p-6 border-b border-gray-200">
           <h3 className="text-lg font-semibold text-gray-900">Recent Transactions</h3>
+          <p className="text-sm text-gray-500">From the last {historyMonths} months; see Transactions for older ones</p>
         </div>
         <div className="divide-y divide-gray-200">
           {recentTransactions.slice(0, 5).map((transaction) => (
@@ -1,35 +1,138 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Search, Filter, Calendar, TrendingUp, TrendingDown, ArrowUpRight, Eye } from 'lucide-react';
-import type { Account, Transaction } from '../types/banking';
+import type { Account, Transaction, TransactionFilters, TransactionSearchResult, TransactionTotals } from '../types/banking';
+import { readHeaders } from '../services/readAfterWrite';
 
 interface TransactionsProps {
   transactions: Transaction[];
   accounts: Account[];
 }
 
+const API_URL = 'http://127.0.0.1:5001/api';
+
 const Transactions: React.FC<TransactionsProps> = ({ transactions, accounts }) => {
   const [searchTerm, setSearchTerm] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
   const [selectedType, setSelectedType] = useState<string>('all');
   const [selectedCategory, setSelectedCategory] = useState<string>('all');
   const [selectedAccount, setSelectedAccount] = useState<string>('all');
+  const [filteredTransactions, setFilteredTransactions] = useState<Transaction[]>([]);
+  const [totals, setTotals] = useState<TransactionTotals | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [filterOptions, setFilterOptions] = useState<TransactionFilters>({ types: [], categories: [] });
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(searchTerm), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const filterQuery = () => {
+    const params = new URLSearchParams();
+    if (debouncedSearch.trim()) params.set('q', debouncedSearch.trim());
+    if (selectedType !== 'all') params.set('type', selectedType);
+    if (selectedCategory !== 'all') params.set('category', selectedCategory);
+    if (selectedAccount !== 'all') params.set('account', selectedAccount);
+    return params.toString();
+  };
+
+  const searchUrl = (cursor?: string) => {
+    const params = new URLSearchParams(filterQuery());
+    if (cursor) params.set('cursor', cursor);
+    return `${API_URL}/transactions/search?${params}`;
+  };
+
+  // The filters a response was requested with must still be the current ones when it arrives
+  const currentQuery = useRef(filterQuery());
+  currentQuery.current = filterQuery();
+  // The summary totals cover what the filters match, which is all transactions when none are set
+  const filtersActive = currentQuery.current !== '';
+
+  const fetchFirstPage = (signal: AbortSignal): Promise<TransactionSearchResult> =>
+    fetch(searchUrl(), { signal, headers: readHeaders() }).then(response => {
+      if (!response.ok) throw new Error('Transaction search failed.');
+      return response.json();
+    });
+
+  const logSearchError = (error: Error) => {
+    if (error.name !== 'AbortError') console.error('Error searching transactions:', error);
+  };
+
+  useEffect(() => {
+    const controller = new AbortController();
+    fetch(`${API_URL}/transactions/filters`, { signal: controller.signal, headers: readHeaders() })
+      .then(response => {
+        if (!response.ok) throw new Error('Loading transaction filters failed.');
+        return response.json();
+      })
+      .then(setFilterOptions)
+      .catch(error => {
+        if (error.name !== 'AbortError') console.error('Error loading transaction filters:', error);
+      });
+    return () => controller.abort();
+  }, []);
+
+  // Filtering, text search and totals run on the server; the first page carries the totals.
+  // Changing a filter starts over from the first page.
+  useEffect(() => {
+    const controller = new AbortController();
+    fetchFirstPage(controller.signal)
+      .then(result => {
+        setFilteredTransactions(result.transactions);
+        setTotals(result.totals);
+        setNextCursor(result.next_cursor);
+      })
+      .catch(logSearchError);
+    return () => controller.abort();
+  }, [debouncedSearch, selectedType, selectedCategory, selectedAccount]);
+
+  // New transactions (pushed into `transactions` by the update stream) are always the newest,
+  // so a fresh first page goes on top of what is loaded; pages loaded further down stay.
+  const seenTransactions = useRef(transactions);
+  useEffect(() => {
+    if (seenTransactions.current === transactions) return;
+    seenTransactions.current = transactions;
+    const query = filterQuery();
+    const controller = new AbortController();
+    fetchFirstPage(controller.signal)
+      .then(result => {
+        if (currentQuery.current !== query) return;
+        setTotals(result.totals);
+        setFilteredTransactions(prev => {
+          const fresh = new Set(result.transactions.map(t => t.id));
+          return [...result.transactions, ...prev.filter(t => !fresh.has(t.id))];
+        });
+        // Everything matched fits on the first page
+        if (!result.next_cursor) setNextCursor(null);
+      })
+      .catch(logSearchError);
+    return () => controller.abort();
+  }, [transactions]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetch(searchUrl(nextCursor), { headers: readHeaders() });
+      if (!response.ok) throw new Error('Transaction search failed.');
+      const result: TransactionSearchResult = await response.json();
+      setFilteredTransactions(prev => [...prev, ...result.transactions]);
+      setNextCursor(result.next_cursor);
+    } catch (error) {
+      console.error('Error loading more transactions:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   const getAccountName = (accountId: string) => {
     const account = accounts.find(acc => acc.id === accountId);
     return account ? account.name : 'Unknown Account';
   };
 
-  const filteredTransactions = transactions.filter(transaction => {
-    const matchesSearch = transaction.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         transaction.category.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesType = selectedType === 'all' || transaction.type === selectedType;
-    const matchesCategory = selectedCategory === 'all' || transaction.category === selectedCategory;
-    const matchesAccount = selectedAccount === 'all' || transaction.from_account_id === selectedAccount;
-
-    return matchesSearch && matchesType && matchesCategory && matchesAccount;
-  });
-
-  const categories = [...new Set(transactions.map(t => t.category))];
-  const types = [...new Set(transactions.map(t => t.type))];
+  // A category or type first seen on the update stream is offered too
+  const categories = [...new Set([...filterOptions.categories, ...transactions.map(t => t.category)])].sort();
+  const types = [...new Set([...filterOptions.types, ...transactions.map(t => t.type)])].sort();
 
   const getTransactionIcon = (type: string) => {
     switch (type) {
@@ -119,9 +222,9 @@ const Transactions: React.FC<TransactionsProps> = ({ transactions, accounts }) =
           <div className="bg-green-50 rounded-lg p-4">
             <div className="flex items-center justify-between">
               <div>
-                <p className="text-sm text-green-600 font-medium">Total Income</p>
+                <p className="text-sm text-green-600 font-medium">{filtersActive ? 'Income (matching filters)' : 'Total Income'}</p>
                 <p className="text-2xl font-bold text-green-700">
-                  ${transactions.filter(t => t.type === 'deposit').reduce((sum, t) => sum + t.amount, 0).toLocaleString()}
+                  ${(totals?.deposit ?? 0).toLocaleString()}
                 </p>
               </div>
               <TrendingUp className="h-8 w-8 text-green-600" />
@@ -130,9 +233,9 @@ const Transactions: React.FC<TransactionsProps> = ({ transactions, accounts }) =
           <div className="bg-red-50 rounded-lg p-4">
             <div className="flex items-center justify-between">
               <div>
-                <p className="text-sm text-red-600 font-medium">Total Expenses</p>
+                <p className="text-sm text-red-600 font-medium">{filtersActive ? 'Expenses (matching filters)' : 'Total Expenses'}</p>
                 <p className="text-2xl font-bold text-red-700">
-                  ${transactions.filter(t => t.type === 'payment').reduce((sum, t) => sum + t.amount, 0).toLocaleString()}
+                  ${(totals?.payment ?? 0).toLocaleString()}
                 </p>
               </div>
               <TrendingDown className="h-8 w-8 text-red-600" />
@@ -141,9 +244,9 @@ const Transactions: React.FC<TransactionsProps> = ({ transactions, accounts }) =
           <div className="bg-blue-50 rounded-lg p-4">
             <div className="flex items-center justify-between">
               <div>
-                <p className="text-sm text-blue-600 font-medium">Total Transfers</p>
+                <p className="text-sm text-blue-600 font-medium">{filtersActive ? 'Transfers (matching filters)' : 'Total Transfers'}</p>
                 <p className="text-2xl font-bold text-blue-700">
-                  ${transactions.filter(t => t.type === 'transfer').reduce((sum, t) => sum + t.amount, 0).toLocaleString()}
+                  ${(totals?.transfer ?? 0).toLocaleString()}
                 </p>
               </div>
               <ArrowUpRight className="h-8 w-8 text-blue-600" />
@@ -206,6 +309,13 @@ const Transactions: React.FC<TransactionsProps> = ({ transactions, accounts }) =
             ))
           )}
         </div>
+        {nextCursor && (
+          <div className="p-4 text-center border-t border-gray-200">
+            <button onClick={loadMore} disabled={loadingMore} className="px-4 py-2 bg-blue-50 text-blue-600 rounded-lg hover:bg-blue-100 transition-colors disabled:opacity-50">
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -0,0 +1,13 @@
+// The banking API may serve reads from a lagging replica. After a write it returns an
+// X-Last-Write marker; sending it back on the next reads keeps them on the primary.
+const LAST_WRITE_HEADER = 'X-Last-Write';
+
+let lastWrite: string | null = null;
+
+export const rememberWrite = (response: Response) => {
+  const marker = response.headers.get(LAST_WRITE_HEADER);
+  if (marker) lastWrite = marker;
+};
+
+export const readHeaders = (): Record<string, string> =>
+  lastWrite ? { [LAST_WRITE_HEADER]: lastWrite } : {};
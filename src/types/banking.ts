@@ -20,6 +20,33 @@ export interface Transaction {
   created_at: string;
 }
 
+export interface TransactionTotals {
+  count: number;
+  deposit: number;
+  payment: number;
+  transfer: number;
+}
+
+// A page of GET /api/transactions/search; totals cover every match and come with the first page only
+export interface TransactionSearchResult {
+  transactions: Transaction[];
+  next_cursor: string | null;
+  totals: TransactionTotals | null;
+}
+
+// GET /api/transactions/filters
+export interface TransactionFilters {
+  types: string[];
+  categories: string[];
+}
+
+// Delta pushed on /api/stream/updates when a ledger write commits
+export interface BankingUpdate {
+  accounts: Account[];
+  balances: Record<string, number>;
+  transactions: Transaction[];
+}
+
 export interface ChatMessage {
   id: string;
   message: string;